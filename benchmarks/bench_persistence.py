@@ -0,0 +1,63 @@
+"""
+Measure library.json save latency and file size for large synthetic libraries.
+
+The catalog code doesn't need Blender, so this runs in plain Python:
+
+    python benchmarks/bench_persistence.py -- 10000 100000
+
+Each size is saved in indented, compact and (if installed) orjson mode.
+"""
+
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+# Import the catalog module on its own; the package itself needs bpy
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent / "node_library_manager"))
+sys.path.insert(0, str(Path(__file__).resolve().parent))
+
+import core as nlm
+from synthetic import make_library
+
+REPEATS = 3
+
+def time_save(path, data, compact):
+    best = float("inf")
+    size = 0
+    for _ in range(REPEATS):
+        start = time.perf_counter()
+        size = nlm.write_library_file(path, data, compact=compact)
+        best = min(best, time.perf_counter() - start)
+    return best, size
+
+def time_load(path):
+    best = float("inf")
+    for _ in range(REPEATS):
+        start = time.perf_counter()
+        nlm._read_library_file(path)
+        best = min(best, time.perf_counter() - start)
+    return best
+
+def main(sizes):
+    orjson = nlm.orjson
+    with tempfile.TemporaryDirectory() as tmp:
+        path = Path(tmp) / "library.json"
+        print(f"{'groups':>8} {'mode':>9} {'save ms':>9} {'load ms':>9} {'size MB':>9}")
+        for size in sizes:
+            data = make_library(nlm, size)
+            modes = [("indent", False, False), ("compact", True, False)]
+            if orjson is not None:
+                modes.append(("orjson", True, True))
+            for label, compact, use_orjson in modes:
+                # Compare the stdlib encoder against orjson by toggling it
+                nlm.orjson = orjson if use_orjson else None
+                save, nbytes = time_save(path, data, compact)
+                load = time_load(path)
+                print(f"{size:>8} {label:>9} {save * 1000:>9.1f} {load * 1000:>9.1f} "
+                      f"{nbytes / 1e6:>9.2f}")
+            nlm.orjson = orjson
+
+if __name__ == "__main__":
+    argv = sys.argv[sys.argv.index("--") + 1:] if "--" in sys.argv else []
+    main([int(arg) for arg in argv] or [10000, 100000])
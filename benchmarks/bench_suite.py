@@ -0,0 +1,260 @@
+"""
+Time the add-on's main paths on synthetic libraries, without Blender.
+
+The add-on is imported against the bpy stand-in in fake_bpy.py, so this runs
+in plain Python:
+
+    python benchmarks/bench_suite.py
+    python benchmarks/bench_suite.py --sizes 1000 10000 100000 --versions 20 --backends json sqlite
+
+Each case is timed on libraries of every size and catalog backend: loading
+the catalog, saving a change, filtering and sorting, searching after another
+session saved, drawing the panel, expanding a row, deleting a version, and
+exporting and importing. Every run
+is appended to benchmarks/results.jsonl and compared with the previous run
+on the same machine, so regressions show up as a slower-than-usual case.
+"""
+
+import argparse
+import json
+import platform
+import subprocess
+import sys
+import tempfile
+import time
+import types
+from datetime import datetime
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+sys.path.insert(0, str(Path(__file__).resolve().parent))
+
+import fake_bpy
+import synthetic
+
+PREFERENCES = types.SimpleNamespace()
+fake_bpy.install(PREFERENCES)
+
+import node_library_manager as nlm
+from node_library_manager import core
+
+DEFAULT_SIZES = (1000, 10000)
+REPEATS = 5
+RESULTS_FILE = Path(__file__).resolve().parent / "results.jsonl"
+# Cases slower than the previous run by more than this fraction are flagged
+REGRESSION_THRESHOLD = 0.2
+# Export and import need a file per version, so they are skipped above this
+EXPORT_MAX_GROUPS = 10000
+BLOB_SIZE = 1024
+
+def use_library(root, backend):
+    """Point the add-on at a library folder, as its preferences would"""
+    PREFERENCES.__dict__.update(
+        library_path=str(root),
+        storage_backend=backend.upper(),
+        compact_library=True,
+        lock_timeout=core.DEFAULT_LOCK_TIMEOUT,
+        page_size=nlm.DEFAULT_PAGE_SIZE,
+        show_previews=True,
+        link_node_groups=False,
+        background_saves=False,
+        keep_versions=core.DEFAULT_KEEP_VERSIONS,
+        weekly_after_days=core.DEFAULT_WEEKLY_AFTER_DAYS,
+        keep_noted_versions=False,
+        profiling=False,
+    )
+    core.configure(nlm.get_preferences)
+
+def best_of(run, repeats, setup=None):
+    """Best time of run(i) over repeats calls; setup(i) runs untimed before each"""
+    best = float("inf")
+    for i in range(repeats):
+        if setup is not None:
+            setup(i)
+        start = time.perf_counter()
+        run(i)
+        best = min(best, time.perf_counter() - start)
+    return best
+
+def cold_cache(i=None):
+    core.reset_catalogs()
+    core.invalidate_library_cache()
+
+def fresh_search(i=None):
+    library = nlm.load_library()
+    library.search = core.SearchIndex(library)
+
+def first_page(context):
+    library = nlm.load_library()
+    scene = context.scene
+    filtered = library.search.query(context.space_data.tree_type, scene.nodelib_search,
+                                    scene.nodelib_sort)
+    return [entry["name"] for entry in filtered[:nlm.get_page_size()]]
+
+def run_cases(root, backend, size, versions, repeats):
+    """Time every case on one synthetic library; returns {case: seconds}"""
+    use_library(root / "library", backend)
+    # Registering checks the panel and operator callbacks as Blender would
+    nlm.register()
+    with_files = size <= EXPORT_MAX_GROUPS
+    data = synthetic.make_library(core, size, versions, BLOB_SIZE if with_files else 0)
+    synthetic.write_library(core, data, BLOB_SIZE if with_files else 0)
+    del data
+    context = fake_bpy.make_context()
+    panel = nlm.NODELIB_PT_LibraryPanel()
+    results = {}
+
+    def draw(i=None):
+        panel.layout = fake_bpy.Layout()
+        panel.draw(context)
+
+    results["load"] = best_of(lambda i: nlm.load_library(validate=True), repeats, cold_cache)
+
+    def filter_all_sorts(i):
+        for sort_mode in ('NAME', 'DATE', 'VERSIONS'):
+            nlm.load_library().search.query(context.space_data.tree_type, "", sort_mode)
+    results["filter_sort"] = best_of(filter_all_sorts, repeats, fresh_search)
+
+    def type_search(i):
+        for n in range(1, len("group_0001") + 1):
+            nlm.load_library().search.query(context.space_data.tree_type, "group_0001"[:n], 'NAME')
+    results["filter_typing"] = best_of(type_search, repeats, fresh_search)
+
+    def warm_search(i):
+        fresh_search()
+        nlm.load_library().search.query(context.space_data.tree_type, "zzz", 'NAME')
+    results["filter_typing_warm"] = best_of(type_search, repeats, warm_search)
+
+    results["draw_cold"] = best_of(draw, repeats, cold_cache)
+    results["draw"] = best_of(draw, repeats)
+
+    names = first_page(context)
+
+    def expand(i):
+        nlm.NODELIB_OT_ToggleExpand(node_name=names[i % len(names)]).execute(context)
+        draw()
+
+    def collapse(i):
+        nlm._expanded_groups.clear()
+    results["expand"] = best_of(expand, repeats, collapse)
+    collapse(None)
+
+    def save(i):
+        with core.library_transaction() as library:
+            library.set_tags(names[i % len(names)], ["procedural", f"bench{i}"])
+    results["save"] = best_of(save, repeats)
+
+    def other_session_saves(i):
+        nlm.load_library().search.query(context.space_data.tree_type, "group_0001", 'NAME')
+        with core.catalog_transaction(core.get_catalog()) as library:
+            library.set_tags(names[i % len(names)], ["procedural", f"other{i}"])
+
+    def reload_search(i):
+        nlm.load_library(validate=True).search.query(context.space_data.tree_type, "group_0001", 'NAME')
+    results["search_reload"] = best_of(reload_search, repeats, other_session_saves)
+
+    def delete(i):
+        # Oldest version of a group that has more than one
+        library = nlm.load_library()
+        candidates = [e["name"] for e in library if e["version_count"] > 1]
+        name = candidates[i % len(candidates)]
+        version = library.versions(name)[0]["version"]
+        nlm.NODELIB_OT_DeleteVersion(node_name=name, version=version).execute(context)
+    results["delete"] = best_of(delete, repeats)
+
+    if with_files:
+        zip_path = root / "export.zip"
+        library = nlm.load_library(validate=True)
+        results["export"] = best_of(lambda i: core.export_library(zip_path, library), repeats)
+
+        def empty_library(i):
+            use_library(root / f"imported{i}", backend)
+        results["import"] = best_of(lambda i: core.import_library(zip_path), repeats, empty_library)
+    nlm.unregister()
+    return results
+
+def git_commit():
+    try:
+        return subprocess.run(["git", "rev-parse", "--short", "HEAD"], capture_output=True,
+                              text=True, cwd=Path(__file__).parent, check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+def previous_run(path, machine):
+    """The last recorded run from this machine, or None"""
+    previous = None
+    try:
+        with open(path, encoding="utf-8") as f:
+            for line in f:
+                try:
+                    record = json.loads(line)
+                except ValueError:
+                    continue
+                if record.get("machine") == machine:
+                    previous = record
+    except FileNotFoundError:
+        pass
+    return previous
+
+def report(results, previous, threshold):
+    """Print the results next to the previous run; returns the regressed cases"""
+    before = previous["results"] if previous else {}
+    if previous:
+        print(f"Compared with {previous['commit'] or 'unknown commit'} "
+              f"from {previous['timestamp'][:16]}")
+    print(f"{'case':<34} {'ms':>10} {'before':>10} {'change':>8}")
+    regressions = []
+    for case, seconds in results.items():
+        line = f"{case:<34} {seconds * 1000:>10.2f}"
+        if before.get(case):
+            change = seconds / before[case] - 1
+            line += f" {before[case] * 1000:>10.2f} {change:>+8.0%}"
+            if change > threshold:
+                line += "  slower"
+                regressions.append(case)
+        print(line)
+    return regressions
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--sizes", type=int, nargs="+", default=DEFAULT_SIZES,
+                        help="node groups per library (default: %(default)s)")
+    parser.add_argument("--versions", type=int, default=5,
+                        help="average versions per node group (default: %(default)s)")
+    parser.add_argument("--backends", nargs="+", choices=("json", "sqlite"),
+                        default=("json", "sqlite"))
+    parser.add_argument("--repeats", type=int, default=REPEATS)
+    parser.add_argument("--results", type=Path, default=RESULTS_FILE,
+                        help="file the run is appended to and compared with")
+    parser.add_argument("--no-record", action="store_true", help="don't append this run")
+    parser.add_argument("--threshold", type=float, default=REGRESSION_THRESHOLD,
+                        help="flag cases this much slower than before (default: %(default)s)")
+    parser.add_argument("--check", action="store_true",
+                        help="exit with status 1 if any case regressed")
+    args = parser.parse_args(argv)
+
+    results = {}
+    for backend in args.backends:
+        for size in args.sizes:
+            print(f"{backend} {size} groups...", file=sys.stderr)
+            with tempfile.TemporaryDirectory() as tmp:
+                for case, seconds in run_cases(Path(tmp), backend, size, args.versions,
+                                               args.repeats).items():
+                    results[f"{backend}/{size}x{args.versions}/{case}"] = seconds
+            core.reset_catalogs()
+
+    record = {
+        "timestamp": datetime.now().isoformat(),
+        "commit": git_commit(),
+        "machine": platform.node(),
+        "python": platform.python_version(),
+        "results": results,
+    }
+    regressions = report(results, previous_run(args.results, record["machine"]), args.threshold)
+    if not args.no_record:
+        with open(args.results, "a", encoding="utf-8") as f:
+            f.write(json.dumps(record) + "\n")
+    return 1 if args.check and regressions else 0
+
+if __name__ == "__main__":
+    sys.exit(main())
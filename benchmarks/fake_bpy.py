@@ -0,0 +1,208 @@
+"""
+A minimal stand-in for Blender's bpy module, enough to import the add-on and
+run its panel and operators headless:
+
+    import fake_bpy
+    bpy = fake_bpy.install()
+    import node_library_manager as nlm
+
+Properties declared with bpy.props are plain attributes on the stand-ins, and
+layouts only count what would be drawn. Node groups are empty, and the
+"blend files" bpy.data.libraries writes and loads only keep their names,
+types and ID properties. Nothing here talks to Blender, so timings cover the
+add-on's own Python, not Blender's UI or .blend I/O.
+"""
+
+import json
+import sys
+import tempfile
+import types
+from contextlib import contextmanager
+
+class Layout:
+    """Records how many widgets a draw() call creates"""
+
+    def __init__(self, counter=None):
+        self.counter = counter if counter is not None else {"widgets": 0}
+        self.enabled = True
+        self.scale_y = 1.0
+
+    def _child(self, *args, **kwargs):
+        self.counter["widgets"] += 1
+        return Layout(self.counter)
+
+    row = column = box = split = _child
+
+    def _widget(self, *args, **kwargs):
+        self.counter["widgets"] += 1
+
+    label = prop = separator = template_icon = _widget
+
+    def operator(self, idname, **kwargs):
+        self.counter["widgets"] += 1
+        return types.SimpleNamespace()
+
+    @property
+    def widgets(self):
+        return self.counter["widgets"]
+
+class _Struct:
+    """Base for the bpy.types classes the add-on subclasses"""
+
+    def __init__(self, **properties):
+        self.reports = []
+        for name, value in properties.items():
+            setattr(self, name, value)
+
+    def report(self, level, message):
+        self.reports.append((next(iter(level)), message))
+
+class NodeTree(dict):
+    """
+    An empty node group. Its items are the ID properties, so
+    node_tree.get(key) and node_tree[key] work as in Blender.
+    """
+    
+    def __init__(self, name, bl_idname='ShaderNodeTree'):
+        super().__init__()
+        self.name = name
+        self.bl_idname = bl_idname
+        self.nodes = []
+        self.links = []
+        self.interface = types.SimpleNamespace(items_tree=[])
+        self.library = None
+        self.use_fake_user = False
+    
+    __hash__ = object.__hash__
+    __eq__ = object.__eq__
+
+class _NodeGroups(list):
+    def new(self, name, bl_idname='ShaderNodeTree'):
+        node_tree = NodeTree(name, bl_idname)
+        self.append(node_tree)
+        return node_tree
+
+class _Libraries(list):
+    """Writes and loads "blend files" holding node group names, types and ID properties"""
+    
+    def __init__(self, node_groups):
+        super().__init__()
+        self.node_groups = node_groups
+    
+    def write(self, path, datablocks, fake_user=False):
+        with open(path, "w", encoding="utf-8") as f:
+            json.dump([{"name": block.name, "type": block.bl_idname, "properties": dict(block)}
+                       for block in datablocks], f)
+    
+    @contextmanager
+    def load(self, path, link=False):
+        with open(path, encoding="utf-8") as f:
+            stored = {block["name"]: block for block in json.load(f)}
+        data_from = types.SimpleNamespace(node_groups=list(stored))
+        data_to = types.SimpleNamespace(node_groups=[])
+        yield data_from, data_to
+        loaded = []
+        for name in data_to.node_groups:
+            block = stored.get(name)
+            if block is None:
+                loaded.append(None)
+                continue
+            node_tree = self.node_groups.new(name, block["type"])
+            node_tree.update(block["properties"])
+            loaded.append(node_tree)
+        data_to.node_groups = loaded
+
+def _property(**kwargs):
+    return kwargs.get("default")
+
+class _Previews(dict):
+    """A preview collection handing out increasing icon ids"""
+
+    _next_id = 1
+
+    def load(self, name, path, kind):
+        preview = types.SimpleNamespace(icon_id=_Previews._next_id)
+        _Previews._next_id += 1
+        self[name] = preview
+        return preview
+
+class _Timers:
+    def __init__(self):
+        self.callbacks = set()
+
+    def register(self, callback, first_interval=0):
+        self.callbacks.add(callback)
+
+    def unregister(self, callback):
+        self.callbacks.discard(callback)
+
+    def is_registered(self, callback):
+        return callback in self.callbacks
+
+# Arguments Blender requires of callbacks when a class is registered
+_CALLBACK_ARGS = {"execute": 2, "draw": 2, "invoke": 3, "modal": 3}
+
+def _register_class(cls):
+    """Reject callbacks with the wrong number of arguments, as Blender does"""
+    for name, count in _CALLBACK_ARGS.items():
+        code = getattr(getattr(cls, name, None), "__code__", None)
+        if code is not None and code.co_argcount != count:
+            raise ValueError(f'expected {cls.__name__} class "{name}" function to have '
+                             f'{count} args, found {code.co_argcount}')
+
+def make_context(tree_type='ShaderNodeTree', search="", sort='NAME'):
+    """A context for panel draws and operator execute() calls"""
+    return types.SimpleNamespace(
+        scene=types.SimpleNamespace(nodelib_search=search, nodelib_sort=sort, nodelib_page=0),
+        space_data=types.SimpleNamespace(type='NODE_EDITOR', tree_type=tree_type, edit_tree=None),
+        area=types.SimpleNamespace(tag_redraw=lambda: None),
+    )
+
+def install(preferences=None):
+    """
+    Put the stand-in into sys.modules as bpy and return it.
+
+    preferences becomes the add-on's preferences object; set its attributes
+    (library_path, page_size, ...) before using the add-on.
+    """
+    bpy = types.ModuleType("bpy")
+    bpy.__fake__ = True
+
+    bpy.types = types.SimpleNamespace(
+        ID=type("ID", (_Struct,), {}),
+        Operator=type("Operator", (_Struct,), {}),
+        Panel=type("Panel", (_Struct,), {"layout": None}),
+        AddonPreferences=type("AddonPreferences", (_Struct,), {}),
+        Scene=type("Scene", (_Struct,), {}),
+    )
+    bpy.props = types.SimpleNamespace(
+        BoolProperty=_property, EnumProperty=_property, FloatProperty=_property,
+        IntProperty=_property, StringProperty=_property,
+    )
+
+    previews = types.ModuleType("bpy.utils.previews")
+    previews.new = _Previews
+    previews.remove = lambda collection: collection.clear()
+    scripts = tempfile.mkdtemp(prefix="fake_bpy_scripts_")
+    bpy.utils = types.ModuleType("bpy.utils")
+    bpy.utils.previews = previews
+    bpy.utils.register_class = _register_class
+    bpy.utils.unregister_class = lambda cls: None
+    bpy.utils.user_resource = lambda kind, path="": f"{scripts}/{path}"
+
+    bpy.app = types.SimpleNamespace(timers=_Timers())
+    bpy.path = types.SimpleNamespace(abspath=lambda path: path)
+    node_groups = _NodeGroups()
+    bpy.data = types.SimpleNamespace(libraries=_Libraries(node_groups), node_groups=node_groups)
+
+    addons = {"node_library_manager": types.SimpleNamespace(
+        preferences=preferences or types.SimpleNamespace())}
+    bpy.context = types.SimpleNamespace(
+        preferences=types.SimpleNamespace(addons=addons),
+        window_manager=types.SimpleNamespace(windows=[]),
+    )
+
+    sys.modules["bpy"] = bpy
+    sys.modules["bpy.utils"] = bpy.utils
+    sys.modules["bpy.utils.previews"] = previews
+    return bpy
@@ -0,0 +1,103 @@
+"""
+Stress-test concurrent saves into one shared library.
+
+Starts several background Blender processes that all save new versions of the
+same node group into a temporary library at once, then checks that every save
+got its own version number and .blend file:
+
+    blender --background --factory-startup --python benchmarks/stress_concurrent_saves.py -- 8 25 json
+
+Arguments are the number of processes, saves per process and the storage
+backend (json or sqlite).
+"""
+
+import os
+import subprocess
+import sys
+import tempfile
+import time
+import types
+from pathlib import Path
+
+import bpy
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+import node_library_manager as nlm
+
+GROUP_NAME = "StressGroup"
+
+def use_library(root, backend):
+    """Point the addon at a library folder without registering it"""
+    prefs = types.SimpleNamespace(
+        library_path=str(root),
+        storage_backend=backend.upper(),
+        compact_library=True,
+        lock_timeout=120.0,
+        page_size=nlm.DEFAULT_PAGE_SIZE,
+    )
+    nlm.core.configure(lambda: prefs)
+
+def worker(root, backend, saves):
+    use_library(root, backend)
+    node_tree = bpy.data.node_groups.new(GROUP_NAME, 'ShaderNodeTree')
+    for i in range(saves):
+        node_tree.nodes.new('ShaderNodeMath')
+        nlm.save_node_group_version(node_tree, notes=f"pid {os.getpid()} save {i}", tags=["stress"])
+
+def check(root, backend, expected):
+    use_library(root, backend)
+    nlm.reset_catalogs()
+    library = nlm.load_library(validate=True)
+    entry = library.get(GROUP_NAME)
+    problems = []
+    
+    history = library.versions(GROUP_NAME) if entry else []
+    versions = [v["version"] for v in history]
+    if len(versions) != expected:
+        problems.append(f"expected {expected} versions, catalog has {len(versions)}")
+    if len(set(versions)) != len(versions):
+        problems.append("duplicate version numbers in catalog")
+    
+    blends = nlm.get_blends_path()
+    missing = [v["version"] for v in history
+               if not nlm.get_version_blend_path(GROUP_NAME, v).exists()]
+    if missing:
+        problems.append(f"missing blend files for versions {missing[:10]}")
+    leftovers = [p.name for p in blends.iterdir() if p.name.endswith(".tmp")]
+    if leftovers:
+        problems.append(f"temp files left behind: {leftovers[:10]}")
+    if (Path(root) / "library.lock").exists():
+        problems.append("library.lock left behind")
+    return problems
+
+def main(processes, saves, backend):
+    with tempfile.TemporaryDirectory() as root:
+        command = [bpy.app.binary_path, "--background", "--factory-startup",
+                   "--python-exit-code", "1", "--python", __file__,
+                   "--", "worker", root, backend, str(saves)]
+        start = time.perf_counter()
+        children = [subprocess.Popen(command, stdout=subprocess.DEVNULL) for _ in range(processes)]
+        failed = sum(1 for child in children if child.wait() != 0)
+        elapsed = time.perf_counter() - start
+        
+        problems = check(root, backend, processes * saves)
+        if failed:
+            problems.append(f"{failed} worker processes failed")
+        
+        print(f"{processes} processes x {saves} saves ({backend}) in {elapsed:.1f}s")
+        for problem in problems:
+            print(f"FAIL: {problem}")
+        if not problems:
+            print("OK: every save got a unique version and blend file")
+        return 1 if problems else 0
+
+if __name__ == "__main__":
+    argv = sys.argv[sys.argv.index("--") + 1:] if "--" in sys.argv else []
+    if argv and argv[0] == "worker":
+        worker(argv[1], argv[2], int(argv[3]))
+    else:
+        processes = int(argv[0]) if len(argv) > 0 else 8
+        saves = int(argv[1]) if len(argv) > 1 else 25
+        backend = argv[2] if len(argv) > 2 else "json"
+        sys.exit(main(processes, saves, backend))
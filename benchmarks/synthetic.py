@@ -0,0 +1,145 @@
+"""
+Synthetic libraries for benchmarks.
+
+make_library() builds a catalog document shaped like the ones the add-on
+writes: a mix of tree types, shared tags and version histories with notes,
+timestamps and fingerprints. Each version's fingerprint and tree hash come
+from the add-on's own signature_fingerprint() and signature_hash(), applied
+to a made-up node tree signature that changes a little from one version to
+the next. Hashing signatures is slow, so groups draw their histories from a
+pool of TREE_POOL such revision chains.
+
+write_library() stores a document in a library folder through the catalog
+backends, optionally with a small .blend stand-in per version so export,
+import and integrity checks have files to work on.
+"""
+
+import hashlib
+import random
+from datetime import datetime, timedelta
+
+TREE_TYPES = ('ShaderNodeTree', 'CompositorNodeTree', 'GeometryNodeTree')
+NODE_TYPES = ('ShaderNodeMath', 'ShaderNodeMix', 'ShaderNodeMapping', 'ShaderNodeTexNoise',
+              'ShaderNodeValToRGB', 'ShaderNodeVectorMath')
+OPERATIONS = ('ADD', 'MULTIPLY', 'POWER', 'MINIMUM')
+TAG_COUNT = 50
+# Distinct made-up node trees; histories of larger libraries repeat them
+TREE_POOL = 250
+START = datetime(2024, 1, 1, 12, 0)
+
+def _node(rng):
+    # "Value_002" is left out of the inputs: like a linked socket, it is set by a link
+    return {
+        "type": rng.choice(NODE_TYPES),
+        "properties": {"operation": rng.choice(OPERATIONS), "use_clamp": rng.random() < 0.5},
+        "inputs": {"Value": round(rng.random(), 3), "Value_001": round(rng.random(), 3),
+                   "Color": [round(rng.random(), 3) for _ in range(3)] + [1.0]},
+    }
+
+def _signature(rng, name, tree_type, node_count=8):
+    """A node tree signature shaped like the add-on's node_tree_signature()"""
+    nodes = {f"Node.{n:03d}": _node(rng) for n in range(node_count)}
+    nodes["Group Input"] = {"type": "NodeGroupInput", "properties": {}, "inputs": {}}
+    nodes["Group Output"] = {"type": "NodeGroupOutput", "properties": {}, "inputs": {}}
+    links = [(f"Node.{n:03d}", "Value", f"Node.{n + 1:03d}", "Value_002")
+             for n in range(node_count - 1)]
+    links += [("Group Input", "Socket_0", "Node.000", "Value_002"),
+              (f"Node.{node_count - 1:03d}", "Value", "Group Output", "Socket_1")]
+    interface = [
+        {"name": "Factor", "in_out": "INPUT", "socket_type": "NodeSocketFloat",
+         "default_value": round(rng.random(), 3)},
+        {"name": "Result", "in_out": "OUTPUT", "socket_type": "NodeSocketFloat"},
+    ]
+    tree = {"type": tree_type, "nodes": nodes, "links": sorted(links), "interface": interface}
+    return {"root": name, "trees": {name: tree}}
+
+def _revise(rng, signature):
+    """The next version of a signature: one input tweaked, and now and then a node added"""
+    tree = signature["trees"][signature["root"]]
+    nodes = dict(tree["nodes"])
+    links = tree["links"]
+    node_names = [n for n in nodes if n.startswith("Node.")]
+    name = rng.choice(node_names)
+    nodes[name] = dict(nodes[name], inputs=dict(nodes[name]["inputs"], Value=round(rng.random(), 3)))
+    if rng.random() < 0.2:
+        added = f"Node.{len(node_names):03d}"
+        nodes[added] = _node(rng)
+        links = sorted(links + [(name, "Value", added, "Value_002")])
+    return {"root": signature["root"], "trees": {signature["root"]: dict(tree, nodes=nodes, links=links)}}
+
+class _TreePool:
+    """Revision chains of made-up node trees, as (tree_hash, fingerprint), built on demand"""
+    
+    def __init__(self, core, seed):
+        self.core = core
+        self.seed = seed
+        self.chains = {}
+    
+    def history(self, index, tree_type, count):
+        chain, rng, signature = self.chains.get((index, tree_type), ([], None, None))
+        if rng is None:
+            rng = random.Random(f"{self.seed}:{index}:{tree_type}")
+            signature = _signature(rng, f"Tree_{index:04d}", tree_type)
+        while len(chain) < count:
+            if chain:
+                signature = _revise(rng, signature)
+            chain.append((self.core.signature_hash(signature), self.core.signature_fingerprint(signature)))
+        self.chains[(index, tree_type)] = (chain, rng, signature)
+        return chain[:count]
+
+def _blob(name, version, size):
+    seed = f"{name}:{version}".encode()
+    return (seed * (size // len(seed) + 1))[:size]
+
+def make_library(core, group_count, versions_per_group=5, blob_size=0, seed=0):
+    """
+    Return a catalog document with group_count node groups.
+    
+    core is the add-on's core module, used for fingerprints and tree hashes.
+    Each group gets between one and versions_per_group * 2 - 1 versions
+    (versions_per_group on average), one day apart. With blob_size the
+    versions carry the sha256 of a blob_size byte file that write_library()
+    can create.
+    """
+    rng = random.Random(seed)
+    trees = _TreePool(core, seed)
+    node_groups = []
+    for i in range(group_count):
+        name = f"Group_{i:06d}"
+        tree_type = TREE_TYPES[i % len(TREE_TYPES)]
+        count = rng.randint(1, versions_per_group * 2 - 1)
+        history = trees.history(rng.randrange(TREE_POOL), tree_type, count)
+        versions = []
+        for v, (tree_hash, fingerprint) in enumerate(history, 1):
+            version_info = {
+                "version": v,
+                "timestamp": (START + timedelta(days=v, minutes=i)).isoformat(),
+                "notes": f"Tweaked inputs for revision {v}" if v % 3 == 0 else "",
+                "tree_hash": tree_hash,
+                "fingerprint": fingerprint,
+            }
+            if blob_size:
+                version_info["sha256"] = hashlib.sha256(_blob(name, v, blob_size)).hexdigest()
+            versions.append(version_info)
+        node_groups.append({
+            "name": name,
+            "type": tree_type,
+            "latest_version": count,
+            "tags": ["procedural", f"set{i % TAG_COUNT}"],
+            "versions": versions,
+        })
+    return {"node_groups": node_groups, "tags": []}
+
+def write_library(core, data, blob_size=0):
+    """Store a make_library() document in the configured library folder"""
+    core.reset_catalogs()
+    core.invalidate_library_cache()
+    if blob_size:
+        blends_path = core.get_blends_path()
+        for entry in data["node_groups"]:
+            for version_info in entry["versions"]:
+                blob = _blob(entry["name"], version_info["version"], blob_size)
+                (blends_path / f"{version_info['sha256']}.blend").write_bytes(blob)
+    # The catalog takes ownership of the entries
+    core.get_catalog().replace(data)
+    core.invalidate_library_cache()
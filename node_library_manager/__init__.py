@@ -0,0 +1,1963 @@
+bl_info = {
+    "name": "Node Group Library Manager",
+    "author": "Clay MacDonald",
+    "version": (1, 1, 0),
+    "blender": (3, 0, 0),
+    "location": "Shader Editor & Compositor > N-Panel > Node Library",
+    "description": "Manage and version control your node groups with a professional library system",
+    "category": "Node",
+}
+
+import bpy
+import bpy.utils.previews
+import atexit
+import math
+import os
+import queue
+import tempfile
+import threading
+import zipfile
+from collections import OrderedDict
+from datetime import datetime
+from pathlib import Path
+
+from . import core
+from .core import (
+    DEFAULT_KEEP_VERSIONS, DEFAULT_LOCK_TIMEOUT, DEFAULT_WEEKLY_AFTER_DAYS, LibraryLockTimeout,
+    SqliteCatalog, adopt_library, check_library, deduplicate_library, export_library, find_stored_version,
+    get_blends_path, get_catalog, get_library_path, get_lock_timeout, get_version_blend_path,
+    get_version_preview_path, import_library, invalidate_library_cache, library_transaction,
+    load_library, migrate_library, profiled, profiler, prune_library, read_export_manifest, remove_node_group,
+    remove_node_group_version, set_version_pinned, signature_fingerprint, signature_hash,
+    store_save_job, store_save_jobs, version_diff,
+)
+
+# Node groups drawn per page when preferences are unavailable
+DEFAULT_PAGE_SIZE = 20
+
+# Preview icons kept loaded; the least recently drawn are released
+PREVIEW_CACHE_SIZE = 256
+
+# Lines shown at most in the version comparison popup
+DIFF_MAX_LINES = 40
+
+# Slowest calls listed in the profiling panel
+PROFILE_PANEL_ROWS = 12
+
+# Preferences
+def _storage_backend_changed(self, context):
+    # Never migrate lazily from a draw: convert now, under the library lock
+    try:
+        migrate_library()
+    except Exception as e:
+        print(f"Node Library: Couldn't convert the catalog: {e}")
+
+class NODELIB_Preferences(bpy.types.AddonPreferences):
+    bl_idname = __name__
+    
+    library_path: bpy.props.StringProperty(
+        name="Library Path",
+        description="Custom path for node library storage. Leave empty for default location",
+        default="",
+        subtype='DIR_PATH'
+    )
+    
+    page_size: bpy.props.IntProperty(
+        name="Node Groups per Page",
+        description="How many node groups the library panel shows at once",
+        default=DEFAULT_PAGE_SIZE,
+        min=5,
+        max=200
+    )
+    
+    storage_backend: bpy.props.EnumProperty(
+        name="Storage",
+        description="How the library catalog is stored. Switching converts the existing catalog",
+        items=[
+            ('JSON', "JSON File", "Single library.json file, rewritten on every change"),
+            ('SQLITE', "SQLite Database", "library.db, updated one row at a time. "
+                                          "Best for large libraries"),
+        ],
+        default='JSON',
+        update=_storage_backend_changed
+    )
+    
+    background_saves: bpy.props.BoolProperty(
+        name="Save in Background",
+        description="Copy saved node groups to the library on a background thread, "
+                    "so Blender stays responsive on slow network shares",
+        default=True
+    )
+    
+    lock_timeout: bpy.props.FloatProperty(
+        name="Lock Timeout",
+        description="Seconds to wait while another Blender session is changing a shared library",
+        default=DEFAULT_LOCK_TIMEOUT,
+        min=1.0,
+        max=300.0,
+        subtype='TIME',
+        unit='TIME'
+    )
+    
+    compact_library: bpy.props.BoolProperty(
+        name="Compact Library File",
+        description="Write library.json without indentation. Smaller and faster to save, "
+                    "but harder to read by hand",
+        default=True
+    )
+    
+    link_node_groups: bpy.props.BoolProperty(
+        name="Link Instead of Append",
+        description="Link node groups from the library instead of copying them into the "
+                    "scene. Keeps scene files small, but the library must stay reachable",
+        default=False
+    )
+    
+    show_previews: bpy.props.BoolProperty(
+        name="Show Previews",
+        description="Show a snapshot of each node group's graph in the library panel",
+        default=True
+    )
+    
+    keep_versions: bpy.props.IntProperty(
+        name="Keep Newest Versions",
+        description="Prune Versions always keeps this many of the newest versions of each node group",
+        default=DEFAULT_KEEP_VERSIONS,
+        min=1,
+        max=1000
+    )
+    
+    weekly_after_days: bpy.props.IntProperty(
+        name="Weekly After (Days)",
+        description="Keep every version younger than this, and one per week of older ones. "
+                    "0 keeps only the newest versions",
+        default=DEFAULT_WEEKLY_AFTER_DAYS,
+        min=0,
+        max=3650
+    )
+    
+    keep_noted_versions: bpy.props.BoolProperty(
+        name="Keep Versions with Notes",
+        description="Never prune versions that were saved with notes",
+        default=False
+    )
+    
+    profiling: bpy.props.BoolProperty(
+        name="Record Timings",
+        description="Time panel drawing, operators and library reads and writes, and show the "
+                    "results in a Profiling panel. Useful when reporting a slow library",
+        default=False,
+        update=lambda self, context: setattr(profiler, "enabled", self.profiling)
+    )
+    
+    def draw(self, context):
+        layout = self.layout
+        layout.label(text="Node Library Settings:", icon='PREFERENCES')
+        
+        box = layout.box()
+        box.prop(self, "library_path")
+        
+        row = box.row()
+        row.label(text="Current Location:", icon='FILE_FOLDER')
+        row.label(text=str(get_library_path()))
+        
+        box.prop(self, "page_size")
+        box.prop(self, "show_previews")
+        box.prop(self, "storage_backend")
+        in_use = 'SQLITE' if isinstance(get_catalog(), SqliteCatalog) else 'JSON'
+        if in_use != self.storage_backend:
+            row = box.row()
+            row.label(text=f"Library still uses {get_catalog().path.name}", icon='ERROR')
+            row.operator("nodelib.migrate_library", icon='FILE_REFRESH')
+        row = box.row()
+        row.enabled = self.storage_backend == 'JSON'
+        row.prop(self, "compact_library")
+        box.prop(self, "lock_timeout")
+        box.prop(self, "background_saves")
+        box.prop(self, "link_node_groups")
+        box.prop(self, "profiling")
+        
+        row = box.row()
+        row.operator("nodelib.open_library_folder", icon='FOLDER_REDIRECT')
+        row.operator("nodelib.export_library", icon='EXPORT')
+        row.operator("nodelib.import_library", icon='IMPORT')
+        
+        row = box.row()
+        row.operator("nodelib.deduplicate_library", icon='DUPLICATE')
+        row.operator("nodelib.check_library", icon='CHECKMARK')
+        
+        box = layout.box()
+        box.label(text="Version Retention:", icon='SORTTIME')
+        row = box.row()
+        row.prop(self, "keep_versions")
+        row.prop(self, "weekly_after_days")
+        box.prop(self, "keep_noted_versions")
+        box.operator("nodelib.prune_versions", icon='TRASH')
+
+# Utility functions
+def get_preferences():
+    addon = bpy.context.preferences.addons.get(__name__)
+    return addon.preferences if addon else None
+
+core.configure(get_preferences,
+               Path(bpy.utils.user_resource('SCRIPTS', path="addons")) / "node_library_data")
+
+def get_page_size():
+    prefs = get_preferences()
+    return prefs.page_size if prefs else DEFAULT_PAGE_SIZE
+
+# Names of node groups whose version history is expanded in the panel. This is
+# per-session UI state, so it is kept out of library.json.
+_expanded_groups = set()
+_selected_groups = set()
+
+def is_expanded(name):
+    return name in _expanded_groups
+
+def is_selected(name):
+    return name in _selected_groups
+
+def get_selected_node_group(context):
+    """Get the node group from the currently selected node group node"""
+    space = context.space_data
+    if not space or space.type != 'NODE_EDITOR':
+        return None
+    
+    node_tree = space.edit_tree
+    if not node_tree:
+        return None
+    
+    active_node = node_tree.nodes.active
+    if not active_node:
+        return None
+    
+    if hasattr(active_node, 'node_tree') and active_node.node_tree:
+        return active_node.node_tree
+    
+    return None
+
+def format_timestamp(iso_string):
+    """Format ISO timestamp to readable format"""
+    try:
+        dt = datetime.fromisoformat(iso_string)
+        return dt.strftime("%b %d, %Y %I:%M %p")
+    except:
+        return iso_string
+
+# Node tree hashing
+# Node properties that only affect how the node is drawn in the editor
+_UI_ONLY_PROPERTIES = {
+    "rna_type", "name", "label", "location", "width", "width_hidden", "height",
+    "dimensions", "select", "hide", "show_options", "show_preview", "show_texture",
+    "color", "use_custom_color", "parent", "inputs", "outputs", "internal_links",
+    "type", "bl_idname", "bl_label", "bl_description", "bl_icon", "bl_static_type",
+    "bl_width_default", "bl_width_min", "bl_width_max", "bl_height_default",
+    "bl_height_min", "bl_height_max", "node_tree_interface", "warning_propagation",
+}
+
+# Of those, the ones a saved .blend keeps; they are part of the storage hash
+# so a save that only changes them still writes a new file
+_LAYOUT_PROPERTIES = ("label", "location", "width", "height", "hide", "color",
+                      "use_custom_color", "show_options", "show_preview", "show_texture")
+
+def _plain_value(value):
+    """Convert an RNA value to something JSON-serializable and stable between sessions"""
+    if isinstance(value, float):
+        return round(value, 6)
+    if value is None or isinstance(value, (bool, int, str)):
+        return value
+    if isinstance(value, (set, frozenset)):
+        return sorted(value)
+    if isinstance(value, bpy.types.ID):
+        return value.name
+    try:
+        return [_plain_value(v) for v in value]
+    except TypeError:
+        # Never fall back to repr(), it contains memory addresses
+        return type(value).__name__
+
+def _rna_signature(struct, skip=frozenset(), depth=0):
+    result = {}
+    for prop in struct.bl_rna.properties:
+        ident = prop.identifier
+        if ident in skip or ident == "rna_type":
+            continue
+        try:
+            value = getattr(struct, ident)
+        except AttributeError:
+            continue
+        
+        if prop.type == 'POINTER':
+            if value is None or isinstance(value, bpy.types.ID):
+                result[ident] = _plain_value(value)
+            elif depth < 2:
+                result[ident] = _rna_signature(value, depth=depth + 1)
+        elif prop.type == 'COLLECTION':
+            if depth < 2:
+                result[ident] = [_rna_signature(item, depth=depth + 1) for item in value]
+        else:
+            result[ident] = _plain_value(value)
+    return result
+
+def _socket_values(sockets):
+    return {
+        socket.identifier: _plain_value(getattr(socket, "default_value", None))
+        for socket in sockets if not socket.is_linked
+    }
+
+def _interface_items(node_tree):
+    if hasattr(node_tree, "interface"):
+        # Blender 4.0+
+        return list(node_tree.interface.items_tree)
+    return list(node_tree.inputs) + list(node_tree.outputs)
+
+def _tree_signature(node_tree):
+    nodes = {}
+    for node in node_tree.nodes:
+        nodes[node.name] = {
+            "type": node.bl_idname,
+            "properties": _rna_signature(node, skip=_UI_ONLY_PROPERTIES),
+            "inputs": _socket_values(node.inputs),
+        }
+    links = sorted(
+        (link.from_node.name, link.from_socket.identifier,
+         link.to_node.name, link.to_socket.identifier)
+        for link in node_tree.links
+    )
+    interface = [_rna_signature(item, skip={"parent", "index", "position", "select"})
+                 for item in _interface_items(node_tree)]
+    return {"type": node_tree.bl_idname, "nodes": nodes, "links": links, "interface": interface}
+
+def _tree_layout(node_tree):
+    nodes = {}
+    for node in node_tree.nodes:
+        layout = {ident: _plain_value(getattr(node, ident, None)) for ident in _LAYOUT_PROPERTIES}
+        layout["parent"] = node.parent.name if node.parent else None
+        nodes[node.name] = layout
+    links = sorted(
+        (link.from_node.name, link.from_socket.identifier,
+         link.to_node.name, link.to_socket.identifier, getattr(link, "is_muted", False))
+        for link in node_tree.links
+    )
+    return {"nodes": nodes, "links": links}
+
+def _nested_trees(node_tree):
+    """
+    The node tree and every node group nested in it, each once.
+    
+    Nested groups are written into the same .blend, so a change inside them
+    changes the saved group.
+    """
+    trees = {}
+    pending = [node_tree]
+    while pending:
+        tree = pending.pop()
+        if tree.name in trees:
+            continue
+        trees[tree.name] = tree
+        pending.extend(node.node_tree for node in tree.nodes
+                       if getattr(node, "node_tree", None) is not None)
+    return trees.values()
+
+def node_tree_signature(node_tree):
+    """
+    Canonical description of what a node group does, ignoring layout.
+    
+    The root tree goes by its library name, so an appended "Wood v2"
+    hashes like the "Wood" it came from.
+    """
+    root = library_name(node_tree)
+    trees = {tree.name: _tree_signature(tree) for tree in _nested_trees(node_tree)}
+    trees[root] = trees.pop(node_tree.name)
+    return {"root": root, "trees": trees}
+
+def node_tree_hash(node_tree):
+    return signature_hash(node_tree_signature(node_tree))
+
+def node_tree_storage_hash(node_tree, signature):
+    """
+    Hash of everything a saved .blend keeps: the signature plus labels,
+    locations, sizes, colors and muted links.
+    
+    A stored file is only reused for a save with the same storage hash;
+    the layout-blind tree hash would lose edits that only touch layout.
+    """
+    layouts = {tree.name: _tree_layout(tree) for tree in _nested_trees(node_tree)}
+    return signature_hash({"signature": signature, "layout": layouts})
+
+class SaveJob:
+    """A node group captured on the main thread, waiting to be stored in the library"""
+    
+    def __init__(self, node_tree, notes, tags):
+        self.name = library_name(node_tree)
+        # Name of the node group inside the saved .blend
+        self.node_group = node_tree.name
+        self.tree_type = node_tree.bl_idname
+        self.notes = notes
+        self.tags = tags
+        signature = node_tree_signature(node_tree)
+        self.tree_hash = signature_hash(signature)
+        self.storage_hash = node_tree_storage_hash(node_tree, signature)
+        self.fingerprint = signature_fingerprint(signature)
+        self.layout = capture_node_layout(node_tree)
+        self.preview_path = None
+        self.catalog = get_catalog()
+        self.blends_path = get_blends_path()
+        self.lock_timeout = get_lock_timeout()
+        self.blend_path = None
+        self.status = 'PENDING'
+        self.error = ""
+        self.version = None
+        self.library = None
+        
+        # Only write a .blend if no stored version has the same content and
+        # layout. The write goes to the local temp folder, which is fast even
+        # when the library itself lives on a network share.
+        if find_stored_version(load_library(), self.name, self.storage_hash,
+                               self.blends_path) is None:
+            fd, path = tempfile.mkstemp(prefix="nodelib_", suffix=".blend")
+            os.close(fd)
+            self.blend_path = Path(path)
+            with profiler.timed("blend.write"):
+                bpy.data.libraries.write(path, {node_tree}, fake_user=True)
+    
+    def discard(self):
+        if self.blend_path is not None and self.blend_path.exists():
+            self.blend_path.unlink()
+
+def save_node_group_version(node_tree, notes="", tags=None):
+    """Save a node group to the library as a new version and return its number"""
+    job = SaveJob(node_tree, notes, tags)
+    try:
+        store_save_job(job)
+    finally:
+        job.discard()
+    adopt_library(job.catalog, job.library)
+    _preview_cache.discard(job.preview_path)
+    return job.version
+
+def save_node_group_versions(node_trees, notes="", tags=None):
+    """Save several node groups with a single catalog write and return their version numbers"""
+    jobs = [SaveJob(node_tree, notes, tags) for node_tree in node_trees]
+    try:
+        versions = store_save_jobs(jobs)
+    finally:
+        for job in jobs:
+            job.discard()
+    if jobs:
+        adopt_library(jobs[0].catalog, jobs[0].library)
+    for job in jobs:
+        _preview_cache.discard(job.preview_path)
+    return versions
+
+class SavePipeline:
+    """
+    Stores captured node groups on a worker thread.
+    
+    Finished jobs are picked up on the main thread by a bpy.app.timers
+    callback, which refreshes the library cache and the panel. Failed jobs
+    stay in `jobs` (with their captured .blend) until retried or dismissed.
+    """
+    
+    poll_interval = 0.2
+    
+    def __init__(self):
+        self.jobs = []
+        self._queue = queue.Queue()
+        self._finished = queue.Queue()
+        self._thread = None
+        # Jobs submitted but not yet collected by poll(); main thread only.
+        # A job's status turns DONE on the worker before it is queued as
+        # finished, so status alone can't tell poll() to keep running.
+        self._uncollected = 0
+    
+    def submit(self, job):
+        self.jobs.append(job)
+        self._uncollected += 1
+        self._queue.put(job)
+        if self._thread is None or not self._thread.is_alive():
+            self._thread = threading.Thread(target=self._run, name="nodelib-save", daemon=True)
+            self._thread.start()
+        if not bpy.app.timers.is_registered(self.poll):
+            bpy.app.timers.register(self.poll, first_interval=self.poll_interval)
+    
+    def retry_failed(self):
+        for job in self.failed():
+            job.status = 'PENDING'
+            job.error = ""
+            # The library may have moved to another backend or folder since
+            job.catalog = get_catalog(refresh=True)
+            job.blends_path = get_blends_path()
+            self.jobs.remove(job)
+            self.submit(job)
+    
+    def dismiss_failed(self):
+        for job in self.failed():
+            job.discard()
+            self.jobs.remove(job)
+    
+    def pending(self):
+        return [job for job in self.jobs if job.status == 'PENDING']
+    
+    def failed(self):
+        return [job for job in self.jobs if job.status == 'FAILED']
+    
+    def _run(self):
+        while True:
+            job = self._queue.get()
+            if job is None:
+                break
+            try:
+                store_save_job(job)
+            except Exception as e:
+                job.status = 'FAILED'
+                job.error = str(e)
+            self._finished.put(job)
+    
+    def poll(self):
+        changed = False
+        while True:
+            try:
+                job = self._finished.get_nowait()
+            except queue.Empty:
+                break
+            changed = True
+            self._uncollected -= 1
+            if job.status == 'DONE':
+                self.jobs.remove(job)
+                adopt_library(job.catalog, job.library)
+                _preview_cache.discard(job.preview_path)
+                job.library = None
+                print(f"Node Library: saved {job.name} v{job.version}")
+            else:
+                print(f"Node Library: saving {job.name} failed: {job.error}")
+        
+        if changed:
+            for window in bpy.context.window_manager.windows:
+                for area in window.screen.areas:
+                    if area.type == 'NODE_EDITOR':
+                        area.tag_redraw()
+        return self.poll_interval if self._uncollected else None
+    
+    def shutdown(self):
+        """Finish queued saves before Blender exits or the addon is disabled"""
+        if self._thread is not None and self._thread.is_alive():
+            self._queue.put(None)
+            self._thread.join()
+        self._thread = None
+        if bpy.app.timers.is_registered(self.poll):
+            bpy.app.timers.unregister(self.poll)
+
+_save_pipeline = SavePipeline()
+atexit.register(_save_pipeline.shutdown)
+
+# Previews
+# Node header colors by node kind (bl_idname without its editor prefix),
+# roughly following the default theme
+_NODE_PREFIXES = ("ShaderNode", "GeometryNode", "CompositorNode", "FunctionNode", "Node")
+_PREVIEW_COLORS = (
+    (("GroupInput", "GroupOutput"), (0.25, 0.25, 0.25)),
+    (("Group",), (0.23, 0.41, 0.25)),
+    (("Output",), (0.40, 0.11, 0.11)),
+    (("Bsdf", "Shader", "Emission", "Volume", "Holdout"), (0.16, 0.52, 0.24)),
+    (("Tex",), (0.75, 0.44, 0.15)),
+    (("Mix", "RGB", "Hue", "Gamma", "BrightContrast", "Invert", "Curve"), (0.42, 0.42, 0.16)),
+    (("Vector", "Mapping", "Normal", "Bump", "Displacement"), (0.25, 0.25, 0.55)),
+    (("Math", "Map", "Combine", "Separate", "ValToRGB", "Clamp", "Switch"), (0.22, 0.40, 0.55)),
+    (("Input", "Value", "Attribute", "Coord"), (0.56, 0.20, 0.22)),
+)
+
+def _node_color(node):
+    if getattr(node, "use_custom_color", False):
+        return tuple(node.color)
+    kind = node.bl_idname
+    for prefix in _NODE_PREFIXES:
+        if kind.startswith(prefix):
+            kind = kind[len(prefix):]
+            break
+    for names, color in _PREVIEW_COLORS:
+        if any(name in kind for name in names):
+            return color
+    return (0.35, 0.35, 0.35)
+
+def _node_location(node):
+    """Node location in editor space; nodes in frames are relative to their frame"""
+    x, y = node.location
+    parent = node.parent
+    while parent is not None:
+        x += parent.location[0]
+        y += parent.location[1]
+        parent = parent.parent
+    return x, y
+
+def capture_node_layout(node_tree):
+    """
+    Record node boxes and links for a preview, as plain data.
+    
+    Runs on the main thread; render_preview_png() can then draw the result
+    anywhere. Node sizes are estimated when the editor hasn't drawn the
+    tree yet (e.g. in background mode).
+    """
+    boxes = {}
+    frames = []
+    nodes = []
+    for node in node_tree.nodes:
+        x, y = _node_location(node)
+        if node.bl_idname == 'NodeFrame':
+            width, height = node.width, node.height
+            frames.append((x, y, width, height))
+            continue
+        outputs = [s for s in node.outputs if s.enabled and not s.hide]
+        inputs = [s for s in node.inputs if s.enabled and not s.hide]
+        width = node.width
+        height = node.dimensions[1] or 40 + 22 * (len(outputs) + len(inputs))
+        boxes[node.name] = (x, y, width, outputs, inputs)
+        nodes.append((x, y, width, height, _node_color(node)))
+    
+    links = []
+    for link in node_tree.links:
+        start = boxes.get(link.from_node.name)
+        end = boxes.get(link.to_node.name)
+        if start is None or end is None:
+            continue
+        x, y, width, outputs, _ = start
+        index = outputs.index(link.from_socket) if link.from_socket in outputs else 0
+        from_point = (x + width, y - 35 - 22 * index)
+        x, y, _, outputs, inputs = end
+        index = inputs.index(link.to_socket) if link.to_socket in inputs else 0
+        to_point = (x, y - 35 - 22 * (len(outputs) + index))
+        links.append(from_point + to_point)
+    
+    return {"frames": frames, "nodes": nodes, "links": links}
+
+class PreviewCache:
+    """
+    Preview icons for the panel, loaded into a bpy.utils.previews collection.
+    
+    Icons are loaded the first time a row is drawn and at most
+    PREVIEW_CACHE_SIZE are kept, releasing the least recently drawn.
+    Versions without a preview are remembered too, so drawing them doesn't
+    touch the disk again.
+    """
+    
+    def __init__(self):
+        self._collection = None
+        self._icons = OrderedDict()
+    
+    def open(self):
+        self._collection = bpy.utils.previews.new()
+    
+    def close(self):
+        if self._collection is not None:
+            bpy.utils.previews.remove(self._collection)
+        self._collection = None
+        self._icons.clear()
+    
+    def icon_id(self, path):
+        """Return the icon id of a preview image, or 0 if there is none"""
+        key = str(path)
+        icon_id = self._icons.get(key)
+        if icon_id is not None:
+            self._icons.move_to_end(key)
+            return icon_id
+        
+        icon_id = 0
+        if self._collection is not None and os.path.exists(key):
+            icon_id = self._collection.load(key, key, 'IMAGE').icon_id
+        self._icons[key] = icon_id
+        if len(self._icons) > PREVIEW_CACHE_SIZE:
+            self._release(*self._icons.popitem(last=False))
+        return icon_id
+    
+    def discard(self, path):
+        """Forget a preview, e.g. once a background save has written it"""
+        key = str(path)
+        if key in self._icons:
+            self._release(key, self._icons.pop(key))
+    
+    def _release(self, key, icon_id):
+        if icon_id and self._collection is not None:
+            del self._collection[key]
+
+_preview_cache = PreviewCache()
+
+# Node groups appended from the library
+# ID properties that tag an appended node group with where it came from
+IMPORT_NAME_KEY = "nodelib_name"
+IMPORT_VERSION_KEY = "nodelib_version"
+IMPORT_HASH_KEY = "nodelib_sha256"
+
+def library_name(node_tree):
+    """The library entry a node group saves to: the one it was appended from, or its own name"""
+    return node_tree.get(IMPORT_NAME_KEY) or node_tree.name
+
+class ImportCache:
+    """
+    Finds node groups already appended from the library, by (name, version).
+    
+    The map is rebuilt from the ID properties on bpy.data.node_groups
+    whenever a lookup misses or hits a removed datablock, e.g. after
+    loading another .blend file.
+    """
+    
+    def __init__(self):
+        self._groups = {}
+    
+    def rescan(self):
+        self._groups = {}
+        for node_group in bpy.data.node_groups:
+            name = node_group.get(IMPORT_NAME_KEY)
+            if name is not None:
+                self._groups[(name, node_group.get(IMPORT_VERSION_KEY))] = node_group
+    
+    def _lookup(self, key, sha):
+        node_group = self._groups.get(key)
+        if node_group is None:
+            return None
+        try:
+            matches = node_group.get(IMPORT_HASH_KEY, "") == sha
+        except ReferenceError:
+            return None
+        return node_group if matches else None
+    
+    def get(self, name, version, sha):
+        key = (name, version)
+        node_group = self._lookup(key, sha)
+        if node_group is None:
+            self.rescan()
+            node_group = self._lookup(key, sha)
+        return node_group
+    
+    def add(self, node_group):
+        self._groups[(node_group[IMPORT_NAME_KEY], node_group[IMPORT_VERSION_KEY])] = node_group
+    
+    def groups(self):
+        self.rescan()
+        return list(self._groups.values())
+
+_import_cache = ImportCache()
+
+def use_link(import_mode):
+    """Whether an operator's import_mode resolves to linking"""
+    if import_mode == 'PREFERENCES':
+        prefs = get_preferences()
+        return bool(prefs and prefs.link_node_groups)
+    return import_mode == 'LINK'
+
+IMPORT_MODE_ITEMS = [
+    ('PREFERENCES', "Default", "Link or append as set in the add-on preferences"),
+    ('APPEND', "Append", "Copy the node group into this file"),
+    ('LINK', "Link", "Reference the node group in the library file"),
+]
+
+def _same_file(a, b):
+    return os.path.normcase(os.path.abspath(a)) == os.path.normcase(os.path.abspath(b))
+
+def find_linked_node_group(name, blend_path):
+    """Return the node group linked as name from blend_path, or None"""
+    for node_group in bpy.data.node_groups:
+        library = node_group.library
+        if (library is not None and node_group.name == name
+                and _same_file(bpy.path.abspath(library.filepath), str(blend_path))):
+            return node_group
+    return None
+
+def import_node_groups(requests, link=False):
+    """
+    Return node groups for (name, version_info, blend_path) requests, in order.
+    
+    Versions already in the file are reused; the rest are loaded with one
+    libraries.load per .blend file. Appended groups are renamed to
+    "<name> v<N>" so several versions can be used in one file, and tagged so
+    later requests reuse them. Linked groups keep their name and are found
+    again by their library file. Groups missing from their file come back as None.
+    """
+    results = [None] * len(requests)
+    by_file = {}
+    for i, (name, version_info, blend_path) in enumerate(requests):
+        sha = version_info.get("sha256", "")
+        # Versions saved from an appended copy hold it under the copy's name
+        block = version_info.get("node_group", name)
+        if link:
+            node_group = find_linked_node_group(block, blend_path)
+        else:
+            node_group = _import_cache.get(name, version_info["version"], sha)
+        if node_group is not None:
+            results[i] = node_group
+            continue
+        # Identical requests share the loaded group
+        wanted = by_file.setdefault(str(blend_path), {})
+        wanted.setdefault((name, version_info["version"], sha, block), []).append(i)
+    
+    for blend_path, wanted in by_file.items():
+        keys = list(wanted)
+        with profiler.timed("blend.read"), \
+                bpy.data.libraries.load(blend_path, link=link) as (data_from, data_to):
+            available = set(data_from.node_groups)
+            keys = [key for key in keys if key[3] in available]
+            data_to.node_groups = [key[3] for key in keys]
+        
+        for (name, version, sha, block), node_group in zip(keys, data_to.node_groups):
+            if node_group is None:
+                continue
+            if not link:
+                node_group.name = f"{name} v{version}"
+                # Saved with a fake user so the library file keeps it; in the
+                # scene it should be dropped again when nothing uses it
+                node_group.use_fake_user = False
+                node_group[IMPORT_NAME_KEY] = name
+                node_group[IMPORT_VERSION_KEY] = version
+                node_group[IMPORT_HASH_KEY] = sha
+                _import_cache.add(node_group)
+            for i in wanted[(name, version, sha, block)]:
+                results[i] = node_group
+    
+    return results
+
+def import_node_group(name, version_info, blend_path, link=False):
+    """Return the node group for one library version, loading it only if needed"""
+    return import_node_groups([(name, version_info, blend_path)], link)[0]
+
+def find_linked_version(library, name, filename):
+    """Return the version of name stored in filename, also matching pre-deduplication names"""
+    entry = library.get(name)
+    if entry is None:
+        return None
+    for version_info in library.versions(name):
+        if filename in (get_version_blend_path(name, version_info).name,
+                        f"{name}_v{version_info['version']}.blend"):
+            return version_info
+    return None
+
+def relink_libraries(to_latest=False):
+    """
+    Point linked library files at the current library path.
+    
+    With to_latest, node groups are moved to the newest version in the
+    library. Returns (relinked, missing) counts.
+    """
+    library = load_library()
+    linked_names = {}
+    for node_group in bpy.data.node_groups:
+        if node_group.library is not None:
+            linked_names.setdefault(node_group.library, set()).add(node_group.name)
+    
+    in_use = {os.path.normcase(os.path.abspath(bpy.path.abspath(lib.filepath)))
+              for lib in bpy.data.libraries}
+    relinked = missing = 0
+    for lib, names in linked_names.items():
+        filename = Path(bpy.path.abspath(lib.filepath)).name
+        for name in sorted(names):
+            version_info = find_linked_version(library, name, filename)
+            if version_info is not None:
+                break
+        else:
+            continue
+        
+        if to_latest:
+            version_info = library.get(name)["last_version"]
+        target = get_version_blend_path(name, version_info)
+        if _same_file(bpy.path.abspath(lib.filepath), str(target)):
+            continue
+        # Blender cannot have two libraries for one file
+        if not target.exists() or os.path.normcase(os.path.abspath(str(target))) in in_use:
+            missing += 1
+            continue
+        
+        lib.filepath = str(target)
+        lib.reload()
+        in_use.add(os.path.normcase(os.path.abspath(str(target))))
+        relinked += 1
+    
+    return relinked, missing
+
+def evict_unused_imports(name=None, keep=None):
+    """Remove appended library node groups that no node uses. Returns the count."""
+    removed = 0
+    for node_group in _import_cache.groups():
+        if name is not None and node_group[IMPORT_NAME_KEY] != name:
+            continue
+        if node_group == keep:
+            continue
+        if node_group.users - int(node_group.use_fake_user) == 0:
+            bpy.data.node_groups.remove(node_group)
+            removed += 1
+    if removed:
+        _import_cache.rescan()
+    return removed
+
+_GROUP_NODE_TYPES = {
+    'ShaderNodeTree': 'ShaderNodeGroup',
+    'CompositorNodeTree': 'CompositorNodeGroup',
+    'GeometryNodeTree': 'GeometryNodeGroup',
+}
+
+# Blender only keeps enum item strings alive while Python references them
+_tag_items = []
+
+def library_tag_items():
+    """EnumProperty items for the tags used in the library"""
+    _tag_items[:] = [(tag, tag, "") for tag in sorted(load_library().by_tag)] or [("", "No tags", "")]
+    return _tag_items
+
+# Spacing of nodes placed by batch adds, in node editor units
+BATCH_GRID_SPACING = (300, 250)
+
+def add_group_node(node_tree, tree_type, node_group, location):
+    """Add a group node using node_group to node_tree and select it"""
+    node = node_tree.nodes.new(_GROUP_NODE_TYPES.get(tree_type, 'NodeGroup'))
+    node.node_tree = node_group
+    node.location = location
+    node.select = True
+    node_tree.nodes.active = node
+    return node
+
+# Operators
+class NODELIB_OT_AddToLibrary(bpy.types.Operator):
+    bl_idname = "nodelib.add_to_library"
+    bl_label = "Add to Library"
+    bl_description = "Save selected node group to library with version notes"
+    
+    notes: bpy.props.StringProperty(
+        name="Version Notes",
+        description="Describe what changed in this version",
+        default=""
+    )
+    
+    tags: bpy.props.StringProperty(
+        name="Tags",
+        description="Comma-separated tags (e.g., metal, procedural, pbr)",
+        default=""
+    )
+    
+    unchanged_since: bpy.props.IntProperty(options={'HIDDEN', 'SKIP_SAVE'})
+    
+    def invoke(self, context, event):
+        node_tree = get_selected_node_group(context)
+        if node_tree:
+            # Load existing tags if this is an update
+            existing = load_library().get(library_name(node_tree))
+            if existing and existing.get("tags"):
+                self.tags = ", ".join(existing["tags"])
+            last = existing["last_version"] if existing else None
+            if last and last.get("tree_hash") == node_tree_hash(node_tree):
+                self.unchanged_since = last["version"]
+        return context.window_manager.invoke_props_dialog(self, width=400)
+    
+    def draw(self, context):
+        layout = self.layout
+        if self.unchanged_since:
+            layout.label(text=f"No changes since v{self.unchanged_since}", icon='INFO')
+        layout.prop(self, "notes")
+        layout.prop(self, "tags")
+    
+    def execute(self, context):
+        node_tree = get_selected_node_group(context)
+        
+        if not node_tree:
+            self.report({'ERROR'}, "No node group selected")
+            return {'CANCELLED'}
+        
+        # Process tags
+        tag_list = [t.strip() for t in self.tags.split(",") if t.strip()]
+        
+        prefs = get_preferences()
+        if prefs and prefs.background_saves:
+            _save_pipeline.submit(SaveJob(node_tree, self.notes, tag_list))
+            self.report({'INFO'}, f"Saving {library_name(node_tree)} to library...")
+            return {'FINISHED'}
+        
+        try:
+            version_num = save_node_group_version(node_tree, self.notes, tag_list)
+        except (LibraryLockTimeout, RuntimeError) as e:
+            self.report({'ERROR'}, str(e))
+            return {'CANCELLED'}
+        
+        self.report({'INFO'}, f"✓ Added {library_name(node_tree)} v{version_num} to library")
+        return {'FINISHED'}
+
+class NODELIB_OT_AddNodeFromLibrary(bpy.types.Operator):
+    """Click to add this node group to your editor"""
+    bl_idname = "nodelib.add_node_from_library"
+    bl_label = "Add Node"
+    
+    node_name: bpy.props.StringProperty()
+    version: bpy.props.IntProperty(default=-1)
+    
+    import_mode: bpy.props.EnumProperty(
+        name="Mode",
+        description="Link or append the node group",
+        items=IMPORT_MODE_ITEMS,
+        default='PREFERENCES'
+    )
+    
+    def execute(self, context):
+        library = load_library(validate=True)
+        entry = library.get(self.node_name)
+        
+        if not entry:
+            return {'CANCELLED'}
+        
+        version = self.version if self.version > 0 else entry["latest_version"]
+        version_info = library.get_version(self.node_name, version)
+        if not version_info:
+            self.report({'ERROR'}, f"{self.node_name} has no version {version}")
+            return {'CANCELLED'}
+        
+        blend_path = get_version_blend_path(self.node_name, version_info)
+        if not blend_path.exists():
+            self.report({'ERROR'}, f"File not found: {blend_path.name} (run Check Library in the add-on preferences)")
+            return {'CANCELLED'}
+        
+        link = use_link(self.import_mode)
+        imported_group = import_node_group(self.node_name, version_info, blend_path, link)
+        if not imported_group:
+            self.report({'ERROR'}, f"{blend_path.name} does not contain {self.node_name}")
+            return {'CANCELLED'}
+        
+        # Other versions of this group that were appended earlier but not used
+        if not link:
+            evict_unused_imports(self.node_name, keep=imported_group)
+        
+        if context.space_data.type == 'NODE_EDITOR':
+            node_tree = context.space_data.edit_tree
+            if node_tree:
+                add_group_node(node_tree, entry["type"], imported_group,
+                               context.space_data.cursor_location)
+                
+                self.report({'INFO'}, f"✓ Added {self.node_name} v{version}")
+        
+        return {'FINISHED'}
+    
+    def invoke(self, context, event):
+        self.execute(context)
+        return {'FINISHED'}
+
+class NODELIB_OT_AddBatchFromLibrary(bpy.types.Operator):
+    """Add several node groups at once, opening each .blend file only once"""
+    bl_idname = "nodelib.add_batch_from_library"
+    bl_label = "Add Node Groups"
+    bl_options = {'REGISTER', 'UNDO'}
+    
+    use_tag: bpy.props.BoolProperty(
+        name="By Tag",
+        description="Add every node group with a tag instead of the selected ones",
+        default=False
+    )
+    
+    tag: bpy.props.EnumProperty(
+        name="Tag",
+        description="Tag of the node groups to add",
+        items=lambda self, context: library_tag_items()
+    )
+    
+    import_mode: bpy.props.EnumProperty(
+        name="Mode",
+        description="Link or append the node groups",
+        items=IMPORT_MODE_ITEMS,
+        default='PREFERENCES'
+    )
+    
+    def invoke(self, context, event):
+        if self.use_tag:
+            return context.window_manager.invoke_props_dialog(self)
+        return self.execute(context)
+    
+    def draw(self, context):
+        self.layout.prop(self, "tag")
+        self.layout.prop(self, "import_mode")
+    
+    def execute(self, context):
+        node_tree = context.space_data.edit_tree
+        if not node_tree:
+            self.report({'ERROR'}, "No node tree to add to")
+            return {'CANCELLED'}
+        
+        library = load_library()
+        tree_type = context.space_data.tree_type
+        if self.use_tag:
+            entries = [e for e in library.with_tag(self.tag) if e["type"] == tree_type]
+        else:
+            entries = [e for e in map(library.get, _selected_groups)
+                       if e and e["type"] == tree_type]
+        entries.sort(key=lambda e: e["name"].lower())
+        if not entries:
+            self.report({'ERROR'}, "No node groups to add")
+            return {'CANCELLED'}
+        
+        requests = []
+        for entry in entries:
+            version_info = entry["last_version"]
+            requests.append((entry["name"], version_info,
+                             get_version_blend_path(entry["name"], version_info)))
+        missing = [path.name for _, _, path in requests if not path.exists()]
+        if missing:
+            self.report({'ERROR'}, f"File not found: {', '.join(missing)}")
+            return {'CANCELLED'}
+        
+        link = use_link(self.import_mode)
+        groups = import_node_groups(requests, link)
+        
+        for node in node_tree.nodes:
+            node.select = False
+        
+        # Lay the nodes out in a roughly square grid, starting at the cursor
+        columns = math.ceil(math.sqrt(len(groups)))
+        x0, y0 = context.space_data.cursor_location
+        dx, dy = BATCH_GRID_SPACING
+        added = 0
+        for (name, version_info, _), node_group in zip(requests, groups):
+            if node_group is None:
+                continue
+            row, column = divmod(added, columns)
+            add_group_node(node_tree, tree_type, node_group, (x0 + column * dx, y0 - row * dy))
+            if not link:
+                evict_unused_imports(name, keep=node_group)
+            added += 1
+        
+        skipped = len(groups) - added
+        if skipped:
+            self.report({'WARNING'}, f"Added {added} node groups, {skipped} missing from their files")
+        else:
+            self.report({'INFO'}, f"✓ Added {added} node groups")
+        return {'FINISHED'}
+
+class NODELIB_OT_CompareVersions(bpy.types.Operator):
+    """Show what changed between two versions, from their stored fingerprints"""
+    bl_idname = "nodelib.compare_versions"
+    bl_label = "Compare Versions"
+    
+    node_name: bpy.props.StringProperty()
+    old_version: bpy.props.IntProperty(name="From", min=1)
+    new_version: bpy.props.IntProperty(name="To", min=1)
+    
+    def invoke(self, context, event):
+        return context.window_manager.invoke_props_dialog(self, width=500)
+    
+    def draw(self, context):
+        layout = self.layout
+        layout.label(text=self.node_name, icon='NODETREE')
+        row = layout.row(align=True)
+        row.prop(self, "old_version")
+        row.prop(self, "new_version")
+        
+        library = load_library()
+        old_info = library.get_version(self.node_name, self.old_version)
+        new_info = library.get_version(self.node_name, self.new_version)
+        if old_info is None or new_info is None:
+            layout.label(text="Version not found", icon='ERROR')
+            return
+        
+        lines = version_diff(old_info, new_info)
+        col = layout.column(align=True)
+        for icon, text in lines[:DIFF_MAX_LINES]:
+            col.label(text=text, icon=icon)
+        if len(lines) > DIFF_MAX_LINES:
+            col.label(text=f"...and {len(lines) - DIFF_MAX_LINES} more changes")
+    
+    def execute(self, context):
+        return {'FINISHED'}
+
+class NODELIB_OT_DeleteFromLibrary(bpy.types.Operator):
+    bl_idname = "nodelib.delete_from_library"
+    bl_label = "Delete Node Group"
+    bl_description = "Delete this entire node group and all versions from library"
+    bl_options = {'INTERNAL'}
+    
+    node_name: bpy.props.StringProperty()
+    
+    def invoke(self, context, event):
+        return context.window_manager.invoke_confirm(self, event)
+    
+    def execute(self, context):
+        try:
+            with library_transaction() as library:
+                if remove_node_group(library, self.node_name):
+                    _expanded_groups.discard(self.node_name)
+                    _selected_groups.discard(self.node_name)
+                    self.report({'INFO'}, f"✓ Deleted {self.node_name} from library")
+        except LibraryLockTimeout as e:
+            self.report({'ERROR'}, str(e))
+            return {'CANCELLED'}
+        
+        return {'FINISHED'}
+
+class NODELIB_OT_DeleteVersion(bpy.types.Operator):
+    bl_idname = "nodelib.delete_version"
+    bl_label = "Delete Version"
+    bl_description = "Delete this specific version"
+    bl_options = {'INTERNAL'}
+    
+    node_name: bpy.props.StringProperty()
+    version: bpy.props.IntProperty()
+    
+    def invoke(self, context, event):
+        return context.window_manager.invoke_confirm(self, event)
+    
+    def execute(self, context):
+        try:
+            with library_transaction() as library:
+                if remove_node_group_version(library, self.node_name, self.version) is None:
+                    return {'CANCELLED'}
+        except LibraryLockTimeout as e:
+            self.report({'ERROR'}, str(e))
+            return {'CANCELLED'}
+        
+        if load_library().get(self.node_name) is None:
+            self.report({'INFO'}, f"✓ Deleted last version - removed {self.node_name}")
+        else:
+            self.report({'INFO'}, f"✓ Deleted {self.node_name} v{self.version}")
+        return {'FINISHED'}
+
+class NODELIB_OT_TogglePinVersion(bpy.types.Operator):
+    bl_idname = "nodelib.toggle_pin_version"
+    bl_label = "Pin Version"
+    bl_description = "Pin this version so pruning never removes it"
+    bl_options = {'INTERNAL'}
+    
+    node_name: bpy.props.StringProperty()
+    version: bpy.props.IntProperty()
+    
+    def execute(self, context):
+        try:
+            with library_transaction() as library:
+                version_info = library.get_version(self.node_name, self.version)
+                if version_info is None:
+                    return {'CANCELLED'}
+                set_version_pinned(library, self.node_name, self.version,
+                                   not version_info.get("pinned"))
+        except LibraryLockTimeout as e:
+            self.report({'ERROR'}, str(e))
+            return {'CANCELLED'}
+        
+        context.area.tag_redraw()
+        return {'FINISHED'}
+
+class NODELIB_OT_PruneVersions(bpy.types.Operator):
+    bl_idname = "nodelib.prune_versions"
+    bl_label = "Prune Versions"
+    bl_description = "Remove old versions the retention settings don't keep"
+    
+    dry_run: bpy.props.BoolProperty(
+        name="Only Report",
+        description="List what would be removed in the system console without removing anything",
+        default=True
+    )
+    
+    def invoke(self, context, event):
+        return context.window_manager.invoke_props_dialog(self)
+    
+    def execute(self, context):
+        try:
+            report = prune_library(dry_run=self.dry_run)
+        except LibraryLockTimeout as e:
+            self.report({'ERROR'}, str(e))
+            return {'CANCELLED'}
+        
+        verb = "would remove" if self.dry_run else "removed"
+        for name, version in report.removed:
+            print(f"Node Library: {verb} {name} v{version}")
+        self.report({'INFO'}, f"✓ {report.summary()}")
+        return {'FINISHED'}
+
+class NODELIB_OT_RetryFailedSaves(bpy.types.Operator):
+    bl_idname = "nodelib.retry_failed_saves"
+    bl_label = "Retry"
+    bl_description = "Try the failed saves again"
+    bl_options = {'INTERNAL'}
+    
+    def execute(self, context):
+        _save_pipeline.retry_failed()
+        return {'FINISHED'}
+
+class NODELIB_OT_DismissFailedSaves(bpy.types.Operator):
+    bl_idname = "nodelib.dismiss_failed_saves"
+    bl_label = "Dismiss"
+    bl_description = "Discard the failed saves"
+    bl_options = {'INTERNAL'}
+    
+    def execute(self, context):
+        _save_pipeline.dismiss_failed()
+        context.area.tag_redraw()
+        return {'FINISHED'}
+
+class NODELIB_OT_PurgeUnusedImports(bpy.types.Operator):
+    bl_idname = "nodelib.purge_unused_imports"
+    bl_label = "Purge Unused"
+    bl_description = "Remove node groups appended from the library that no node uses"
+    bl_options = {'REGISTER', 'UNDO'}
+    
+    def execute(self, context):
+        removed = evict_unused_imports()
+        self.report({'INFO'}, f"✓ Removed {removed} unused library node groups")
+        return {'FINISHED'}
+
+class NODELIB_OT_RelinkLibrary(bpy.types.Operator):
+    bl_idname = "nodelib.relink_library"
+    bl_label = "Relink Library"
+    bl_description = "Point node groups linked from the library at the current library path"
+    bl_options = {'REGISTER', 'UNDO'}
+    
+    to_latest: bpy.props.BoolProperty(
+        name="Update to Latest",
+        description="Also switch linked node groups to the newest version in the library",
+        default=False
+    )
+    
+    def invoke(self, context, event):
+        return context.window_manager.invoke_props_dialog(self)
+    
+    def execute(self, context):
+        relinked, missing = relink_libraries(self.to_latest)
+        if missing:
+            self.report({'WARNING'}, f"Relinked {relinked} library files, {missing} could not be relinked")
+        else:
+            self.report({'INFO'}, f"✓ Relinked {relinked} library files")
+        return {'FINISHED'}
+
+class NODELIB_OT_RefreshLibrary(bpy.types.Operator):
+    bl_idname = "nodelib.refresh_library"
+    bl_label = "Refresh"
+    bl_description = "Refresh library list"
+    
+    def execute(self, context):
+        invalidate_library_cache()
+        context.area.tag_redraw()
+        return {'FINISHED'}
+
+class NODELIB_OT_SaveProfile(bpy.types.Operator):
+    bl_idname = "nodelib.save_profile"
+    bl_label = "Save Timings"
+    bl_description = "Write the recorded timings to a JSON file, e.g. to attach to a bug report"
+    
+    filepath: bpy.props.StringProperty(subtype="FILE_PATH")
+    
+    def invoke(self, context, event):
+        self.filepath = "node_library_profile.json"
+        context.window_manager.fileselect_add(self)
+        return {'RUNNING_MODAL'}
+    
+    def execute(self, context):
+        try:
+            profiler.dump(self.filepath)
+        except OSError as e:
+            self.report({'ERROR'}, f"Could not save timings: {e}")
+            return {'CANCELLED'}
+        
+        self.report({'INFO'}, f"✓ Saved timings to {self.filepath}")
+        return {'FINISHED'}
+
+class NODELIB_OT_ResetProfile(bpy.types.Operator):
+    bl_idname = "nodelib.reset_profile"
+    bl_label = "Reset Timings"
+    bl_description = "Forget the timings recorded so far"
+    bl_options = {'INTERNAL'}
+    
+    def execute(self, context):
+        profiler.reset()
+        context.area.tag_redraw()
+        return {'FINISHED'}
+
+class NODELIB_OT_OpenLibraryFolder(bpy.types.Operator):
+    bl_idname = "nodelib.open_library_folder"
+    bl_label = "Open Library Folder"
+    bl_description = "Open the library folder in your file browser"
+    
+    def execute(self, context):
+        import subprocess
+        import platform
+        
+        path = str(get_library_path())
+        
+        if platform.system() == "Windows":
+            os.startfile(path)
+        elif platform.system() == "Darwin":
+            subprocess.Popen(["open", path])
+        else:
+            subprocess.Popen(["xdg-open", path])
+        
+        return {'FINISHED'}
+
+class NODELIB_OT_MigrateLibrary(bpy.types.Operator):
+    bl_idname = "nodelib.migrate_library"
+    bl_label = "Convert Catalog"
+    bl_description = "Convert the library catalog to the storage selected in preferences"
+    
+    def execute(self, context):
+        try:
+            catalog = migrate_library()
+        except (LibraryLockTimeout, RuntimeError, OSError) as e:
+            self.report({'ERROR'}, str(e))
+            return {'CANCELLED'}
+        
+        self.report({'INFO'}, f"Library catalog is {catalog.path.name}")
+        return {'FINISHED'}
+
+class NODELIB_OT_DeduplicateLibrary(bpy.types.Operator):
+    bl_idname = "nodelib.deduplicate_library"
+    bl_label = "Deduplicate Library"
+    bl_description = "Convert older version files to content-addressed storage, merging identical ones"
+    
+    def invoke(self, context, event):
+        return context.window_manager.invoke_confirm(self, event)
+    
+    def execute(self, context):
+        try:
+            converted, freed = deduplicate_library()
+        except LibraryLockTimeout as e:
+            self.report({'ERROR'}, str(e))
+            return {'CANCELLED'}
+        
+        self.report({'INFO'}, f"✓ Converted {converted} files, freed {freed / 1e6:.1f} MB")
+        return {'FINISHED'}
+
+class NODELIB_OT_CheckLibrary(bpy.types.Operator):
+    bl_idname = "nodelib.check_library"
+    bl_label = "Check Library"
+    bl_description = "Find version files that are missing, damaged or no longer used"
+    
+    remove_orphans: bpy.props.BoolProperty(
+        name="Remove Unused Files",
+        description="Delete files in node_groups that no version refers to",
+        default=True
+    )
+    
+    remove_missing: bpy.props.BoolProperty(
+        name="Remove Missing Versions",
+        description="Drop versions whose file is missing from the catalog",
+        default=False
+    )
+    
+    verify: bpy.props.BoolProperty(
+        name="Verify Checksums",
+        description="Read files that changed since the last check and compare their checksums",
+        default=True
+    )
+    
+    verify_budget: bpy.props.IntProperty(
+        name="Read at Most (MB)",
+        description="Stop verifying after this much data; the next check continues. 0 reads everything",
+        default=2048,
+        min=0
+    )
+    
+    def invoke(self, context, event):
+        return context.window_manager.invoke_props_dialog(self)
+    
+    def draw(self, context):
+        layout = self.layout
+        layout.prop(self, "remove_orphans")
+        layout.prop(self, "remove_missing")
+        layout.prop(self, "verify")
+        row = layout.row()
+        row.enabled = self.verify
+        row.prop(self, "verify_budget")
+    
+    def execute(self, context):
+        try:
+            report = check_library(self.remove_orphans, self.remove_missing, self.verify,
+                                   self.verify_budget * 1024 * 1024 or None)
+        except LibraryLockTimeout as e:
+            self.report({'ERROR'}, str(e))
+            return {'CANCELLED'}
+        
+        if report.damaged or (report.missing and not report.removed_versions):
+            self.report({'WARNING'}, f"{report.summary()} (details in the system console)")
+        else:
+            self.report({'INFO'}, f"✓ {report.summary()}")
+        return {'FINISHED'}
+
+class NODELIB_OT_ExportLibrary(bpy.types.Operator):
+    bl_idname = "nodelib.export_library"
+    bl_label = "Export Library"
+    bl_description = "Export entire library as a zip file for backup or sharing"
+    
+    filepath: bpy.props.StringProperty(subtype="FILE_PATH")
+    
+    compress_blends: bpy.props.BoolProperty(
+        name="Compress Blend Files",
+        description="Deflate .blend files in the zip. Slower, and rarely smaller "
+                    "since Blender already compresses them",
+        default=False
+    )
+    
+    incremental: bpy.props.BoolProperty(
+        name="Only Changes",
+        description="Only export versions added since a previous export",
+        default=False
+    )
+    
+    base_export: bpy.props.StringProperty(
+        name="Previous Export",
+        description="Earlier export zip (or its manifest) to compare against",
+        subtype="FILE_PATH"
+    )
+    
+    def invoke(self, context, event):
+        self.filepath = "node_library_backup.zip"
+        context.window_manager.fileselect_add(self)
+        return {'RUNNING_MODAL'}
+    
+    def draw(self, context):
+        layout = self.layout
+        layout.prop(self, "compress_blends")
+        layout.prop(self, "incremental")
+        row = layout.row()
+        row.enabled = self.incremental
+        row.prop(self, "base_export", text="")
+    
+    def execute(self, context):
+        base_manifest = None
+        if self.incremental:
+            try:
+                base_manifest = read_export_manifest(bpy.path.abspath(self.base_export))
+            except (OSError, KeyError, ValueError) as e:
+                self.report({'ERROR'}, f"Can't read previous export: {e}")
+                return {'CANCELLED'}
+        
+        wm = context.window_manager
+        wm.progress_begin(0, 100)
+        try:
+            written, total = export_library(
+                self.filepath, load_library(validate=True),
+                compress_blends=self.compress_blends,
+                base_manifest=base_manifest,
+                progress=lambda done, size: wm.progress_update(int(100 * done / max(size, 1)))
+            )
+        finally:
+            wm.progress_end()
+        
+        self.report({'INFO'}, f"✓ Library exported to {self.filepath} ({written} of {total} files)")
+        return {'FINISHED'}
+
+class NODELIB_OT_ImportLibrary(bpy.types.Operator):
+    bl_idname = "nodelib.import_library"
+    bl_label = "Import Library"
+    bl_description = "Import a library from a zip file (merges with existing)"
+    
+    filepath: bpy.props.StringProperty(subtype="FILE_PATH")
+    
+    def invoke(self, context, event):
+        context.window_manager.fileselect_add(self)
+        return {'RUNNING_MODAL'}
+    
+    def execute(self, context):
+        wm = context.window_manager
+        wm.progress_begin(0, 100)
+        try:
+            stats = import_library(
+                self.filepath,
+                progress=lambda done, total: wm.progress_update(int(100 * done / max(total, 1)))
+            )
+        except LibraryLockTimeout as e:
+            self.report({'ERROR'}, str(e))
+            return {'CANCELLED'}
+        except (OSError, ValueError, KeyError, zipfile.BadZipFile) as e:
+            self.report({'ERROR'}, f"Import failed: {e}")
+            return {'CANCELLED'}
+        finally:
+            wm.progress_end()
+        
+        if stats["unsafe"] or stats["missing"]:
+            self.report({'WARNING'}, f"Skipped {stats['unsafe']} unsafe entries and "
+                                     f"{stats['missing']} versions without files")
+        self.report({'INFO'}, f"✓ Imported {stats['groups_added']} new node groups and "
+                              f"{stats['versions_added']} versions "
+                              f"({stats['versions_skipped']} already in library)")
+        return {'FINISHED'}
+
+# UI Panel
+class NODELIB_PT_LibraryPanel(bpy.types.Panel):
+    bl_label = "Node Library"
+    bl_idname = "NODELIB_PT_library_panel"
+    bl_space_type = 'NODE_EDITOR'
+    bl_region_type = 'UI'
+    bl_category = "Node Library"
+    
+    @classmethod
+    def poll(cls, context):
+        return context.space_data.tree_type in {'ShaderNodeTree', 'CompositorNodeTree', 'GeometryNodeTree'}
+    
+    @profiled("panel.draw")
+    def draw(self, context):
+        layout = self.layout
+        scene = context.scene
+        
+        # Header with save current
+        box = layout.box()
+        col = box.column(align=True)
+        
+        node_tree = get_selected_node_group(context)
+        if node_tree:
+            row = col.row(align=True)
+            name = library_name(node_tree)
+            row.label(text=name if name == node_tree.name else f"{node_tree.name} → {name}",
+                      icon='NODETREE')
+            row.operator("nodelib.add_to_library", text="Save", icon='EXPORT')
+        else:
+            col.label(text="Select a node group to save", icon='INFO')
+        
+        # Background saves
+        pending = _save_pipeline.pending()
+        failed = _save_pipeline.failed()
+        if pending or failed:
+            box = layout.box()
+            col = box.column(align=True)
+            for job in pending:
+                col.label(text=f"Saving {job.name}...", icon='SORTTIME')
+            for job in failed:
+                col.label(text=f"{job.name}: {job.error}", icon='ERROR')
+            if failed:
+                row = box.row(align=True)
+                row.operator("nodelib.retry_failed_saves", icon='FILE_REFRESH')
+                row.operator("nodelib.dismiss_failed_saves", icon='X')
+        
+        layout.separator()
+        
+        # Search and controls
+        row = layout.row(align=True)
+        row.prop(scene, "nodelib_search", text="", icon='VIEWZOOM')
+        row.operator("nodelib.refresh_library", text="", icon='FILE_REFRESH')
+        row.operator("nodelib.purge_unused_imports", text="", icon='ORPHAN_DATA')
+        if bpy.data.libraries:
+            row.operator("nodelib.relink_library", text="", icon='LINKED')
+        
+        # Sort options
+        row = layout.row(align=True)
+        row.prop(scene, "nodelib_sort", text="")
+        
+        layout.separator()
+        
+        # Library contents
+        library = load_library()
+        
+        if not library:
+            box = layout.box()
+            col = box.column(align=True)
+            col.label(text="Library is empty", icon='INFO')
+            col.label(text="Select a node group and")
+            col.label(text="click 'Save' to start")
+            return
+        
+        # Filter and sort
+        current_type = context.space_data.tree_type
+        filtered = library.search.query(current_type, scene.nodelib_search, scene.nodelib_sort)
+        profiler.count("panel.filtered", len(filtered))
+        
+        # Stats
+        box = layout.box()
+        row = box.row(align=True)
+        row.label(text=f"{len(filtered)} Node Groups", icon='ASSET_MANAGER')
+        op = row.operator("nodelib.add_batch_from_library", text="", icon='BOOKMARKS')
+        op.use_tag = True
+        
+        # Batch add
+        selected = [name for name in _selected_groups if name in library.by_name]
+        if selected:
+            row = box.row(align=True)
+            op = row.operator("nodelib.add_batch_from_library",
+                              text=f"Add {len(selected)} Selected", icon='IMPORT')
+            op.use_tag = False
+            row.operator("nodelib.clear_selection", text="", icon='X')
+        
+        if not filtered:
+            layout.label(text="No results found", icon='INFO')
+            return
+        
+        # Only build layout for the visible page
+        page_size = get_page_size()
+        page_count = (len(filtered) + page_size - 1) // page_size
+        page = min(scene.nodelib_page, page_count - 1)
+        
+        if page_count > 1:
+            row = box.row(align=True)
+            sub = row.row(align=True)
+            sub.enabled = page > 0
+            op = sub.operator("nodelib.change_page", text="", icon='TRIA_LEFT')
+            op.delta = -1
+            row.label(text=f"Page {page + 1} of {page_count}")
+            sub = row.row(align=True)
+            sub.enabled = page < page_count - 1
+            op = sub.operator("nodelib.change_page", text="", icon='TRIA_RIGHT')
+            op.delta = 1
+        
+        # Node groups; previews are only loaded for the rows on this page
+        prefs = get_preferences()
+        show_previews = prefs.show_previews if prefs else True
+        for entry in filtered[page * page_size:(page + 1) * page_size]:
+            box = layout.box()
+            
+            # Main header
+            row = box.row(align=True)
+            row.scale_y = 1.2
+            
+            # Collapsible arrow
+            expanded = is_expanded(entry["name"])
+            icon = 'TRIA_DOWN' if expanded else 'TRIA_RIGHT'
+            op = row.operator("nodelib.toggle_expand", text="", icon=icon, emboss=False)
+            op.node_name = entry["name"]
+            
+            # Batch selection
+            icon = 'CHECKBOX_HLT' if is_selected(entry["name"]) else 'CHECKBOX_DEHLT'
+            op = row.operator("nodelib.toggle_select", text="", icon=icon, emboss=False)
+            op.node_name = entry["name"]
+            
+            # Add button (main action), with the preview as its icon
+            latest_v = entry["last_version"]
+            icon_id = 0
+            if show_previews and latest_v:
+                icon_id = _preview_cache.icon_id(get_version_preview_path(entry["name"], latest_v))
+            if icon_id:
+                op = row.operator("nodelib.add_node_from_library", text=entry["name"], icon_value=icon_id)
+            else:
+                op = row.operator("nodelib.add_node_from_library", text=entry["name"], icon='NODETREE')
+            op.node_name = entry["name"]
+            op.version = -1
+            
+            # Delete button
+            op = row.operator("nodelib.delete_from_library", text="", icon='TRASH')
+            op.node_name = entry["name"]
+            
+            # Tags row
+            if entry.get("tags"):
+                row = box.row()
+                row.scale_y = 0.7
+                row.label(text=" ".join([f"#{tag}" for tag in entry["tags"]]), icon='BOOKMARKS')
+            
+            # Version info row
+            row = box.row()
+            row.scale_y = 0.7
+            version_text = f"v{entry['latest_version']} • {entry['version_count']} versions"
+            if latest_v and latest_v.get('notes'):
+                version_text += f" • {latest_v['notes'][:40]}"
+            row.label(text=version_text, icon='DOCUMENTS')
+            
+            # Expanded version history
+            if expanded:
+                if icon_id:
+                    box.template_icon(icon_value=icon_id, scale=6.0)
+                box.separator()
+                col = box.column(align=True)
+                
+                # History is only loaded for expanded rows
+                history = library.versions(entry["name"])
+                previous = {b["version"]: a["version"] for a, b in zip(history, history[1:])}
+                for v in reversed(history[-5:]):  # Show last 5
+                    version_box = col.box()
+                    version_row = version_box.row(align=True)
+                    
+                    # Version info
+                    version_col = version_row.column(align=True)
+                    version_col.scale_y = 0.8
+                    version_col.label(text=f"Version {v['version']}", icon='DOT')
+                    if v.get('notes'):
+                        version_col.label(text=f"  {v['notes']}")
+                    version_col.label(text=f"  {format_timestamp(v['timestamp'])}")
+                    
+                    # Actions
+                    action_col = version_row.column(align=True)
+                    op = action_col.operator("nodelib.add_node_from_library", text="", icon='IMPORT')
+                    op.node_name = entry["name"]
+                    op.version = v["version"]
+                    
+                    if v["version"] in previous:
+                        op = action_col.operator("nodelib.compare_versions", text="", icon='ARROW_LEFTRIGHT')
+                        op.node_name = entry["name"]
+                        op.old_version = previous[v["version"]]
+                        op.new_version = v["version"]
+                    
+                    icon = 'PINNED' if v.get("pinned") else 'UNPINNED'
+                    op = action_col.operator("nodelib.toggle_pin_version", text="", icon=icon)
+                    op.node_name = entry["name"]
+                    op.version = v["version"]
+                    
+                    op = action_col.operator("nodelib.delete_version", text="", icon='X')
+                    op.node_name = entry["name"]
+                    op.version = v["version"]
+
+class NODELIB_PT_ProfilingPanel(bpy.types.Panel):
+    bl_label = "Profiling"
+    bl_idname = "NODELIB_PT_profiling_panel"
+    bl_parent_id = "NODELIB_PT_library_panel"
+    bl_space_type = 'NODE_EDITOR'
+    bl_region_type = 'UI'
+    bl_category = "Node Library"
+    bl_options = {'DEFAULT_CLOSED'}
+    
+    @classmethod
+    def poll(cls, context):
+        return profiler.enabled
+    
+    def draw(self, context):
+        layout = self.layout
+        row = layout.row(align=True)
+        row.operator("nodelib.save_profile", icon='FILE_TICK')
+        row.operator("nodelib.reset_profile", text="", icon='X')
+        
+        rows = profiler.stats()
+        if not rows:
+            layout.label(text="No calls recorded yet", icon='INFO')
+            return
+        
+        # Slowest first, by 90th percentile
+        col = layout.column(align=True)
+        col.scale_y = 0.8
+        col.label(text="Call: p50 / p90 / max ms (calls)")
+        for name, calls, p50, p90, p99, slowest in rows[:PROFILE_PANEL_ROWS]:
+            col.label(text=f"{name}: {p50:.1f} / {p90:.1f} / {slowest:.1f} ({calls})")
+        
+        if profiler.counters:
+            col = layout.column(align=True)
+            col.scale_y = 0.8
+            for name, value in sorted(profiler.counters.items()):
+                col.label(text=f"{name}: {value}")
+
+class NODELIB_OT_ToggleExpand(bpy.types.Operator):
+    bl_idname = "nodelib.toggle_expand"
+    bl_label = ""
+    bl_description = "Show/hide version history"
+    bl_options = {'INTERNAL'}
+    
+    node_name: bpy.props.StringProperty()
+    
+    def execute(self, context):
+        if self.node_name in _expanded_groups:
+            _expanded_groups.discard(self.node_name)
+        else:
+            _expanded_groups.add(self.node_name)
+        context.area.tag_redraw()
+        return {'FINISHED'}
+
+class NODELIB_OT_ToggleSelect(bpy.types.Operator):
+    bl_idname = "nodelib.toggle_select"
+    bl_label = ""
+    bl_description = "Select this node group for adding several at once"
+    bl_options = {'INTERNAL'}
+    
+    node_name: bpy.props.StringProperty()
+    
+    def execute(self, context):
+        if self.node_name in _selected_groups:
+            _selected_groups.discard(self.node_name)
+        else:
+            _selected_groups.add(self.node_name)
+        context.area.tag_redraw()
+        return {'FINISHED'}
+
+class NODELIB_OT_ClearSelection(bpy.types.Operator):
+    bl_idname = "nodelib.clear_selection"
+    bl_label = "Clear"
+    bl_description = "Deselect all node groups"
+    bl_options = {'INTERNAL'}
+    
+    def execute(self, context):
+        _selected_groups.clear()
+        context.area.tag_redraw()
+        return {'FINISHED'}
+
+class NODELIB_OT_ChangePage(bpy.types.Operator):
+    bl_idname = "nodelib.change_page"
+    bl_label = "Change Page"
+    bl_description = "Show the previous or next page of node groups"
+    bl_options = {'INTERNAL'}
+    
+    delta: bpy.props.IntProperty(default=1)
+    
+    def execute(self, context):
+        scene = context.scene
+        filtered = load_library().search.query(
+            context.space_data.tree_type, scene.nodelib_search, scene.nodelib_sort)
+        page_size = get_page_size()
+        last_page = max(0, (len(filtered) - 1) // page_size)
+        scene.nodelib_page = max(0, min(scene.nodelib_page + self.delta, last_page))
+        context.area.tag_redraw()
+        return {'FINISHED'}
+
+# Scene properties
+def reset_page(self, context):
+    self.nodelib_page = 0
+
+def register_properties():
+    bpy.types.Scene.nodelib_search = bpy.props.StringProperty(
+        name="Search",
+        description="Search node groups by name or tag",
+        update=reset_page
+    )
+    
+    bpy.types.Scene.nodelib_sort = bpy.props.EnumProperty(
+        name="Sort By",
+        items=[
+            ('NAME', "Name", "Sort alphabetically"),
+            ('DATE', "Date", "Sort by most recent"),
+            ('VERSIONS', "Versions", "Sort by version count")
+        ],
+        default='NAME',
+        update=reset_page
+    )
+    
+    bpy.types.Scene.nodelib_page = bpy.props.IntProperty(
+        name="Page",
+        description="Current page of the library list",
+        default=0,
+        min=0
+    )
+
+def unregister_properties():
+    del bpy.types.Scene.nodelib_search
+    del bpy.types.Scene.nodelib_sort
+    del bpy.types.Scene.nodelib_page
+
+# Registration
+classes = (
+    NODELIB_Preferences,
+    NODELIB_OT_AddToLibrary,
+    NODELIB_OT_AddNodeFromLibrary,
+    NODELIB_OT_AddBatchFromLibrary,
+    NODELIB_OT_CompareVersions,
+    NODELIB_OT_DeleteFromLibrary,
+    NODELIB_OT_DeleteVersion,
+    NODELIB_OT_TogglePinVersion,
+    NODELIB_OT_PruneVersions,
+    NODELIB_OT_RetryFailedSaves,
+    NODELIB_OT_DismissFailedSaves,
+    NODELIB_OT_PurgeUnusedImports,
+    NODELIB_OT_RelinkLibrary,
+    NODELIB_OT_RefreshLibrary,
+    NODELIB_OT_SaveProfile,
+    NODELIB_OT_ResetProfile,
+    NODELIB_OT_OpenLibraryFolder,
+    NODELIB_OT_MigrateLibrary,
+    NODELIB_OT_DeduplicateLibrary,
+    NODELIB_OT_CheckLibrary,
+    NODELIB_OT_ExportLibrary,
+    NODELIB_OT_ImportLibrary,
+    NODELIB_OT_ToggleExpand,
+    NODELIB_OT_ToggleSelect,
+    NODELIB_OT_ClearSelection,
+    NODELIB_OT_ChangePage,
+    NODELIB_PT_LibraryPanel,
+    NODELIB_PT_ProfilingPanel,
+)
+
+# Time every operator under its idname while profiling is on
+for cls in classes:
+    if issubclass(cls, bpy.types.Operator):
+        cls.execute = profiled(cls.bl_idname)(cls.execute)
+
+def register():
+    for cls in classes:
+        bpy.utils.register_class(cls)
+    register_properties()
+    _preview_cache.open()
+    prefs = get_preferences()
+    profiler.enabled = bool(prefs and prefs.profiling)
+
+def unregister():
+    _save_pipeline.shutdown()
+    _preview_cache.close()
+    for cls in reversed(classes):
+        bpy.utils.unregister_class(cls)
+    unregister_properties()
+
+if __name__ == "__main__":
+    register()
\ No newline at end of file
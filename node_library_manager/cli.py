@@ -0,0 +1,360 @@
+"""
+Command line tool for bulk library maintenance.
+
+Catalog commands run in plain Python, without Blender:
+
+    python node_library_manager/cli.py --library ~/NodeLibrary list --tag metal
+    python node_library_manager/cli.py --library ~/NodeLibrary tag add wood --match "Wood*"
+    python node_library_manager/cli.py --library ~/NodeLibrary prune --keep 5 --all --dry-run
+
+Saving node groups from .blend files needs Blender:
+
+    blender --background --factory-startup --python node_library_manager/cli.py -- \\
+        --library ~/NodeLibrary save assets.blend --tags shared
+
+Every command that changes the library runs in one locked transaction, so the
+catalog is written once however many node groups it touches.
+"""
+
+import argparse
+import importlib
+import os
+import sys
+import types
+import zipfile
+from pathlib import Path
+
+try:
+    import bpy
+except ImportError:
+    bpy = None
+
+if __package__:
+    from . import core
+elif bpy is not None:
+    # Blender doesn't put the script's folder on sys.path; import the add-on
+    # next to this file rather than an installed copy
+    sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+    from node_library_manager import core
+else:
+    import core
+
+# Short names accepted by --type
+TREE_TYPES = {
+    "shader": "ShaderNodeTree",
+    "compositor": "CompositorNodeTree",
+    "geometry": "GeometryNodeTree",
+}
+
+# Environment variable used when --library isn't given
+LIBRARY_ENV = "NODELIB_LIBRARY"
+
+class CommandError(Exception):
+    pass
+
+# Settings
+def configure(args):
+    """Point the catalog module at the library given on the command line"""
+    library = args.library or os.environ.get(LIBRARY_ENV)
+    if not library:
+        raise CommandError(f"No library given: use --library or set {LIBRARY_ENV}")
+    root = Path(library).expanduser().resolve()
+    if not root.is_dir() and args.command not in ("import", "save"):
+        raise CommandError(f"Library folder not found: {root}")
+    
+    # The catalog in the folder always wins; the backend only picks the
+    # storage of a new library and the target of "migrate"
+    backend = args.backend or ("sqlite" if (root / "library.db").exists() else "json")
+    prefs = types.SimpleNamespace(
+        library_path=str(root),
+        storage_backend=backend.upper(),
+        compact_library=True,
+        lock_timeout=args.lock_timeout,
+    )
+    core.configure(lambda: prefs)
+    return prefs
+
+def _addon():
+    """The add-on module, for commands that need Blender"""
+    package = core.__name__.rpartition(".")[0]
+    if bpy is None or not package:
+        raise CommandError("This command needs Blender: "
+                           "blender --background --python cli.py -- ...")
+    return importlib.import_module(package)
+
+def _parse_tags(text):
+    return [t.strip() for t in text.split(",") if t.strip()]
+
+def _tree_type(value):
+    if value is None:
+        return None
+    return TREE_TYPES.get(value.lower(), value)
+
+def _select(library, args):
+    """Entries picked by the selection options, sorted by name"""
+    if not (args.group or args.match or args.type or args.tag or args.all):
+        raise CommandError("Select node groups with --group, --match, --type, --tag or --all")
+    missing = [name for name in args.group or () if library.get(name) is None]
+    if missing:
+        raise CommandError(f"Not in library: {', '.join(missing)}")
+    entries = core.find_entries(library, names=args.group or (), pattern=args.match,
+                                tree_type=_tree_type(args.type), tag=args.tag)
+    return sorted(entries, key=lambda e: e["name"].lower())
+
+# Commands
+def cmd_info(args):
+    library = core.load_library(validate=True)
+    by_type = {}
+    for entry in library:
+        by_type[entry["type"]] = by_type.get(entry["type"], 0) + 1
+    versions = sum(entry.get("version_count", 0) for entry in library)
+    blends = list(core.get_blends_path().glob("*.blend"))
+    size = sum(p.stat().st_size for p in blends)
+    
+    print(f"Library:     {core.get_library_path()}")
+    print(f"Storage:     {core.get_catalog().path.name}")
+    print(f"Node groups: {len(library)}")
+    for tree_type, count in sorted(by_type.items()):
+        print(f"  {tree_type}: {count}")
+    print(f"Versions:    {versions}")
+    print(f"Tags:        {len(library.by_tag)}")
+    print(f"Files:       {len(blends)} ({size / 1e6:.1f} MB)")
+
+def cmd_list(args):
+    library = core.load_library(validate=True)
+    if args.group or args.match or args.type or args.tag:
+        entries = _select(library, args)
+    else:
+        entries = sorted(library, key=lambda e: e["name"].lower())
+    
+    for entry in entries:
+        if args.names:
+            print(entry["name"])
+            continue
+        last = entry.get("last_version") or {}
+        tags = " ".join(f"#{tag}" for tag in entry.get("tags", []))
+        print(f"{entry['name']}\t{entry['type']}\tv{entry['latest_version']}"
+              f"\t{entry.get('version_count', 0)} versions\t{last.get('timestamp', '')[:10]}\t{tags}")
+
+def cmd_tag(args):
+    tags = _parse_tags(",".join(args.tags))
+    lowered = {tag.lower() for tag in tags}
+    changed = 0
+    with core.library_transaction() as library:
+        for entry in _select(library, args):
+            current = entry.get("tags", [])
+            if args.action == "add":
+                have = {tag.lower() for tag in current}
+                new = current + [tag for tag in tags if tag.lower() not in have]
+            else:
+                new = [tag for tag in current if tag.lower() not in lowered]
+            if new != current:
+                library.set_tags(entry["name"], new)
+                changed += 1
+    print(f"Updated tags of {changed} node groups")
+
+def cmd_prune(args):
+    if args.keep < 1:
+        raise CommandError("--keep must be at least 1")
+    policy = core.RetentionPolicy(args.keep, args.weekly_after, args.keep_noted)
+    names = [entry["name"] for entry in _select(core.load_library(validate=True), args)]
+    report = core.prune_library(policy, names, dry_run=args.dry_run)
+    if args.dry_run:
+        for name, version in report.removed:
+            print(f"would remove {name} v{version}")
+    print(report.summary())
+
+def cmd_pin(args):
+    with core.library_transaction() as library:
+        for version in args.versions:
+            if core.set_version_pinned(library, args.name, version, not args.off) is None:
+                raise CommandError(f"Not in library: {args.name} v{version}")
+    verb = "Unpinned" if args.off else "Pinned"
+    print(f"{verb} {len(args.versions)} versions of {args.name}")
+
+def cmd_delete(args):
+    with core.library_transaction() as library:
+        entries = _select(library, args)
+        for entry in entries:
+            if args.dry_run:
+                print(f"would delete {entry['name']}")
+            else:
+                core.remove_node_group(library, entry["name"])
+    verb = "Would delete" if args.dry_run else "Deleted"
+    print(f"{verb} {len(entries)} node groups")
+
+def cmd_export(args):
+    base_manifest = None
+    if args.base:
+        try:
+            base_manifest = core.read_export_manifest(args.base)
+        except (OSError, KeyError, ValueError) as e:
+            raise CommandError(f"Can't read previous export: {e}")
+    written, total = core.export_library(args.zip, core.load_library(validate=True),
+                                         compress_blends=args.compress,
+                                         base_manifest=base_manifest)
+    print(f"Exported {written} of {total} files to {args.zip}")
+
+def cmd_import(args):
+    stats = core.import_library(args.zip)
+    if stats["unsafe"] or stats["missing"]:
+        print(f"Skipped {stats['unsafe']} unsafe entries and "
+              f"{stats['missing']} versions without files")
+    print(f"Imported {stats['groups_added']} new node groups and "
+          f"{stats['versions_added']} versions ({stats['versions_skipped']} already in library)")
+
+def cmd_migrate(args):
+    prefs = core.get_preferences()
+    target = args.target.upper()
+    if isinstance(core.get_catalog(refresh=True), core.SqliteCatalog) == (target == 'SQLITE'):
+        raise CommandError(f"Library already uses {args.target}")
+    
+    prefs.storage_backend = target
+    catalog = core.migrate_library()
+    print(f"Migrated {len(core.load_library(validate=True))} node groups to {catalog.path.name}")
+
+def cmd_check(args):
+    budget = int(args.budget * 1024 * 1024) if args.budget else None
+    report = core.check_library(args.remove_orphans, args.remove_missing, args.verify, budget)
+    print(report.summary())
+    if report.damaged or (report.missing and not report.removed_versions):
+        return 1
+    return 0
+
+def cmd_dedupe(args):
+    converted, freed = core.deduplicate_library()
+    print(f"Converted {converted} files, freed {freed / 1e6:.1f} MB")
+
+def cmd_save(args):
+    addon = _addon()
+    bpy.ops.wm.open_mainfile(filepath=str(Path(args.blend).resolve()))
+    
+    wanted = set(args.group or ())
+    node_trees = [
+        node_tree for node_tree in bpy.data.node_groups
+        if node_tree.library is None
+        and addon.IMPORT_NAME_KEY not in node_tree  # already a library version
+        and (not wanted or node_tree.name in wanted)
+    ]
+    missing = wanted - {node_tree.name for node_tree in node_trees}
+    if missing:
+        raise CommandError(f"Not found in {args.blend}: {', '.join(sorted(missing))}")
+    
+    tags = _parse_tags(args.tags) if args.tags is not None else None
+    versions = addon.save_node_group_versions(node_trees, notes=args.notes, tags=tags)
+    for node_tree, version in zip(node_trees, versions):
+        print(f"{node_tree.name} v{version}")
+    print(f"Saved {len(versions)} node groups")
+
+# Arguments
+def _add_selection(parser):
+    group = parser.add_argument_group("selection")
+    group.add_argument("--group", action="append", metavar="NAME",
+                       help="node group name (repeatable)")
+    group.add_argument("--match", metavar="PATTERN",
+                       help="wildcard matched against names, e.g. 'Wood*'")
+    group.add_argument("--type", help="shader, compositor, geometry or a node tree idname")
+    group.add_argument("--tag", help="only node groups with this tag")
+    group.add_argument("--all", action="store_true", help="every node group")
+
+def build_parser():
+    parser = argparse.ArgumentParser(
+        prog="cli.py", description="Bulk operations on a Node Library Manager library")
+    parser.add_argument("--library", help=f"library folder (default: ${LIBRARY_ENV})")
+    parser.add_argument("--backend", choices=("json", "sqlite"),
+                        help="storage for a new library (default: whichever the library uses)")
+    parser.add_argument("--lock-timeout", type=float, default=core.DEFAULT_LOCK_TIMEOUT,
+                        help="seconds to wait for other sessions (default: %(default)s)")
+    commands = parser.add_subparsers(dest="command", required=True)
+    
+    sub = commands.add_parser("info", help="summary of the library")
+    sub.set_defaults(func=cmd_info)
+    
+    sub = commands.add_parser("list", help="list node groups")
+    sub.add_argument("--names", action="store_true", help="print names only")
+    _add_selection(sub)
+    sub.set_defaults(func=cmd_list)
+    
+    sub = commands.add_parser("tag", help="add or remove tags")
+    sub.add_argument("action", choices=("add", "remove"))
+    sub.add_argument("tags", nargs="+", help="tags, separated by spaces or commas")
+    _add_selection(sub)
+    sub.set_defaults(func=cmd_tag)
+    
+    sub = commands.add_parser("prune", help="remove old versions")
+    sub.add_argument("--keep", type=int, default=core.DEFAULT_KEEP_VERSIONS,
+                     help="newest versions to keep (default: %(default)s)")
+    sub.add_argument("--weekly-after", type=int, default=core.DEFAULT_WEEKLY_AFTER_DAYS,
+                     metavar="DAYS",
+                     help="also keep versions younger than DAYS and one per week of older "
+                          "ones; 0 keeps only the newest (default: %(default)s)")
+    sub.add_argument("--keep-noted", action="store_true", help="keep versions that have notes")
+    sub.add_argument("--dry-run", action="store_true", help="only list what would be removed")
+    _add_selection(sub)
+    sub.set_defaults(func=cmd_prune)
+    
+    sub = commands.add_parser("pin", help="pin versions so pruning keeps them")
+    sub.add_argument("name", help="node group name")
+    sub.add_argument("versions", type=int, nargs="+", help="version numbers")
+    sub.add_argument("--off", action="store_true", help="unpin instead")
+    sub.set_defaults(func=cmd_pin)
+    
+    sub = commands.add_parser("delete", help="delete node groups with all their versions")
+    sub.add_argument("--dry-run", action="store_true", help="only list what would be deleted")
+    _add_selection(sub)
+    sub.set_defaults(func=cmd_delete)
+    
+    sub = commands.add_parser("export", help="export the library to a zip")
+    sub.add_argument("zip")
+    sub.add_argument("--base", metavar="ZIP",
+                     help="previous export; only write what changed since")
+    sub.add_argument("--compress", action="store_true", help="deflate .blend files")
+    sub.set_defaults(func=cmd_export)
+    
+    sub = commands.add_parser("import", help="merge an exported library zip")
+    sub.add_argument("zip")
+    sub.set_defaults(func=cmd_import)
+    
+    sub = commands.add_parser("migrate", help="convert the catalog to another storage")
+    sub.add_argument("target", choices=("json", "sqlite"))
+    sub.set_defaults(func=cmd_migrate)
+    
+    sub = commands.add_parser("check", help="find missing, damaged and unused files")
+    sub.add_argument("--remove-orphans", action="store_true", help="delete unused files")
+    sub.add_argument("--remove-missing", action="store_true",
+                     help="drop versions whose file is missing")
+    sub.add_argument("--verify", action="store_true", help="compare checksums")
+    sub.add_argument("--budget", type=float, metavar="MB",
+                     help="stop verifying after this much data")
+    sub.set_defaults(func=cmd_check)
+    
+    sub = commands.add_parser("dedupe", help="move older version files to shared storage")
+    sub.set_defaults(func=cmd_dedupe)
+    
+    sub = commands.add_parser("save", help="save node groups from a .blend (needs Blender)")
+    sub.add_argument("blend")
+    sub.add_argument("--group", action="append", metavar="NAME",
+                     help="node group to save (repeatable, default: all)")
+    sub.add_argument("--notes", default="", help="version notes")
+    sub.add_argument("--tags", help="comma separated tags")
+    sub.set_defaults(func=cmd_save)
+    return parser
+
+def main(argv=None):
+    if argv is None:
+        # Blender passes the script's own arguments after "--"
+        if "--" in sys.argv:
+            argv = sys.argv[sys.argv.index("--") + 1:]
+        else:
+            argv = [] if bpy is not None else sys.argv[1:]
+    args = build_parser().parse_args(argv)
+    try:
+        configure(args)
+        return args.func(args) or 0
+    except (CommandError, core.LibraryLockTimeout, RuntimeError, OSError,
+            ValueError, zipfile.BadZipFile) as e:
+        print(f"error: {e}", file=sys.stderr)
+        return 1
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,2517 @@
+"""
+Library storage and maintenance for the Node Group Library Manager.
+
+Everything here works without Blender: the catalog backends, locking,
+caching, content-addressed blend storage, integrity checks, previews and
+export/import. The add-on and the command line tool (cli.py) both build
+on it, so plain Python scripts can maintain a library as well.
+"""
+
+import fnmatch
+import functools
+import json
+import os
+import time
+import hashlib
+import itertools
+from collections import Counter, OrderedDict, deque
+from datetime import datetime, timedelta
+from pathlib import Path
+import platform
+import shutil
+import socket
+import sqlite3
+import struct
+import threading
+import zipfile
+import zlib
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import closing, contextmanager
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+# Seconds between freshness checks of library.json while the cache is warm
+LIBRARY_STAT_INTERVAL = 1.0
+
+# Number of (tree type, search, sort) results kept by the search index
+SEARCH_MEMO_SIZE = 64
+
+# Previous versions of library.json kept as library.json.bak1, .bak2, ...
+LIBRARY_BACKUP_COUNT = 3
+
+# Previous versions kept of each per-group history file
+HISTORY_BACKUP_COUNT = 1
+
+# Seconds to wait for another session to release the library lock
+DEFAULT_LOCK_TIMEOUT = 10.0
+
+# A lock file older than this is assumed to belong to a crashed session;
+# held locks are touched every LOCK_HEARTBEAT seconds so they never get there
+LOCK_STALE_AGE = 120.0
+LOCK_HEARTBEAT = LOCK_STALE_AGE / 4
+
+# Width and height of generated preview images, in pixels
+PREVIEW_SIZE = 128
+
+# Unreferenced files younger than this may belong to a save still in
+# progress in another session, so integrity checks leave them alone
+ORPHAN_MIN_AGE = 3600.0
+
+# Stat of every blend whose checksum has been verified, so later checks
+# only hash new or changed files
+INTEGRITY_STATE = "integrity.json"
+
+# Manifest written into every export, listing the library files at that time
+EXPORT_MANIFEST = "export_manifest.json"
+
+# Files larger than this are streamed into exports instead of read ahead
+EXPORT_PREFETCH_LIMIT = 64 * 1024 * 1024
+
+# Default retention: newest versions always kept, and the age after which
+# older versions are thinned to one per week
+DEFAULT_KEEP_VERSIONS = 10
+DEFAULT_WEEKLY_AFTER_DAYS = 30
+
+# Timings kept per profiled call, for rolling percentiles
+PROFILE_SAMPLES = 1000
+
+# Settings
+# Set by configure(); the add-on points these at its preferences
+_preferences_source = None
+_default_library_path = None
+
+def configure(preferences=None, default_library_path=None):
+    """
+    Set where library settings come from.
+    
+    preferences is a function returning an object with the add-on's
+    preference attributes (library_path, storage_backend, compact_library,
+    lock_timeout), or returning None for the defaults. default_library_path
+    is used when no library_path is set.
+    """
+    global _preferences_source, _default_library_path
+    _preferences_source = preferences
+    _default_library_path = default_library_path
+    reset_catalogs()
+
+def get_preferences():
+    return _preferences_source() if _preferences_source else None
+
+# Profiling
+def _percentile(ordered, fraction):
+    """Nearest-rank percentile of sorted durations, in milliseconds"""
+    return ordered[min(len(ordered) - 1, int(fraction * len(ordered)))] * 1000
+
+class Profiler:
+    """
+    Opt-in timings of add-on calls, kept in memory.
+    
+    Each name keeps its last PROFILE_SAMPLES durations, from which stats()
+    computes rolling percentiles, and counters hold the latest value of
+    gauges such as the number of node groups. While disabled, timed() and
+    profiled() only check a flag. Safe to use from the save thread.
+    """
+    
+    def __init__(self):
+        self.enabled = False
+        self._lock = threading.Lock()
+        self.reset()
+    
+    def reset(self):
+        with self._lock:
+            self.samples = {}
+            self.calls = Counter()
+            self.counters = {}
+            self.started = datetime.now().isoformat()
+    
+    def record(self, name, seconds):
+        with self._lock:
+            samples = self.samples.get(name)
+            if samples is None:
+                samples = self.samples[name] = deque(maxlen=PROFILE_SAMPLES)
+            samples.append(seconds)
+            self.calls[name] += 1
+    
+    def count(self, name, value):
+        if self.enabled:
+            with self._lock:
+                self.counters[name] = value
+    
+    @contextmanager
+    def timed(self, name):
+        if not self.enabled:
+            yield
+            return
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.record(name, time.perf_counter() - start)
+    
+    def stats(self):
+        """Rows of (name, calls, p50, p90, p99, max) in milliseconds, slowest p90 first"""
+        rows = []
+        with self._lock:
+            for name, samples in self.samples.items():
+                ordered = sorted(samples)
+                rows.append((name, self.calls[name], _percentile(ordered, 0.5),
+                             _percentile(ordered, 0.9), _percentile(ordered, 0.99),
+                             ordered[-1] * 1000))
+        rows.sort(key=lambda row: row[3], reverse=True)
+        return rows
+    
+    def dump(self, path):
+        """Write the statistics, counters and raw samples to a JSON file"""
+        with self._lock:
+            samples = {name: [round(s * 1000, 3) for s in values]
+                       for name, values in self.samples.items()}
+            counters = dict(self.counters)
+        data = {
+            "started": self.started,
+            "written": datetime.now().isoformat(),
+            "platform": platform.platform(),
+            "python": platform.python_version(),
+            "stats": [dict(zip(("name", "calls", "p50_ms", "p90_ms", "p99_ms", "max_ms"),
+                               (row[0], row[1], *(round(ms, 3) for ms in row[2:]))))
+                      for row in self.stats()],
+            "counters": counters,
+            "samples_ms": samples,
+        }
+        write_library_file(Path(path), data, compact=False, backups=0)
+
+profiler = Profiler()
+
+def profiled(name):
+    """
+    Decorator recording a bpy callback's duration under name while profiling is on.
+    
+    For methods taking (self, context), such as execute() and draw(): Blender
+    checks the argument count of registered callbacks, so the wrapper has
+    that exact signature rather than *args.
+    """
+    def decorate(func):
+        @functools.wraps(func)
+        def wrapper(self, context):
+            if not profiler.enabled:
+                return func(self, context)
+            start = time.perf_counter()
+            try:
+                return func(self, context)
+            finally:
+                profiler.record(name, time.perf_counter() - start)
+        return wrapper
+    return decorate
+
+# Utility functions
+_ensured_dirs = set()
+
+def _ensure_dir(path, parents=False):
+    """Create a directory once per session instead of on every call"""
+    if path not in _ensured_dirs:
+        path.mkdir(parents=parents, exist_ok=True)
+        _ensured_dirs.add(path)
+    return path
+
+def get_library_path():
+    prefs = get_preferences()
+    if prefs and prefs.library_path:
+        path = Path(prefs.library_path)
+    elif _default_library_path is not None:
+        path = Path(_default_library_path)
+    else:
+        raise RuntimeError("No library path configured")
+    
+    return _ensure_dir(path, parents=True)
+
+def get_library_file():
+    return get_library_path() / "library.json"
+
+def get_blends_path():
+    return _ensure_dir(get_library_path() / "node_groups")
+
+def _file_stamp(path):
+    """Return (mtime_ns, size, inode) for a file, or None if it doesn't exist"""
+    try:
+        st = os.stat(path)
+    except FileNotFoundError:
+        return None
+    # Atomic saves always create a new inode, which catches rewrites that
+    # a coarse network-share mtime would miss
+    return (st.st_mtime_ns, st.st_size, st.st_ino)
+
+# Persistence
+def encode_library(data, compact=True):
+    """Serialize a library document to bytes, using orjson when it is installed"""
+    if not compact:
+        return json.dumps(data, indent=2).encode("utf-8")
+    if orjson is not None:
+        return orjson.dumps(data)
+    return json.dumps(data, separators=(",", ":"), ensure_ascii=False).encode("utf-8")
+
+def decode_library(payload):
+    if orjson is not None:
+        return orjson.loads(payload)
+    return json.loads(payload)
+
+def _backup_path(path, index):
+    return path.with_name(f"{path.name}.bak{index}")
+
+def _rotate_backups(path, count):
+    """Shift path.bak1..bakN down by one and keep the current file as .bak1"""
+    for index in range(count - 1, 0, -1):
+        older = _backup_path(path, index)
+        if older.exists():
+            os.replace(older, _backup_path(path, index + 1))
+    
+    newest = _backup_path(path, 1)
+    if newest.exists():
+        newest.unlink()
+    try:
+        # A hard link costs nothing; the old file stays intact after the rename
+        os.link(path, newest)
+    except OSError:
+        shutil.copy2(path, newest)
+
+def _fsync_directory(path):
+    if os.name == 'nt':
+        return
+    try:
+        fd = os.open(path, os.O_RDONLY)
+    except OSError:
+        return
+    try:
+        os.fsync(fd)
+    except OSError:
+        pass
+    finally:
+        os.close(fd)
+
+def write_library_file(path, data, compact=True, backups=LIBRARY_BACKUP_COUNT):
+    """
+    Atomically replace a library file.
+    
+    The new contents are written to a temp file in the same directory,
+    fsynced and renamed over the old file, so a crash leaves either the old
+    or the new catalog, never a partial one.
+    """
+    path = Path(path)
+    payload = encode_library(data, compact)
+    tmp_path = path.with_name(f".{path.name}.{os.getpid()}.tmp")
+    try:
+        with open(tmp_path, 'wb') as f:
+            f.write(payload)
+            f.flush()
+            os.fsync(f.fileno())
+        if backups and path.exists():
+            _rotate_backups(path, backups)
+        os.replace(tmp_path, path)
+    except BaseException:
+        try:
+            tmp_path.unlink()
+        except FileNotFoundError:
+            pass
+        raise
+    _fsync_directory(path.parent)
+    return len(payload)
+
+def _read_library_file(path, backups=LIBRARY_BACKUP_COUNT):
+    if not path.exists():
+        return {"node_groups": [], "tags": []}
+    
+    try:
+        return decode_library(path.read_bytes())
+    except ValueError:
+        # Fall back to the newest readable backup (e.g. a file damaged by
+        # a pre-atomic-save version of the addon or an external tool)
+        for index in range(1, backups + 1):
+            backup = _backup_path(path, index)
+            try:
+                data = decode_library(backup.read_bytes())
+            except (OSError, ValueError):
+                continue
+            print(f"Node Library: {path.name} is unreadable, using {backup.name}")
+            return data
+        raise
+
+def _trigrams(text):
+    return {text[i:i + 3] for i in range(len(text) - 2)}
+
+def _sort_key(sort_mode):
+    if sort_mode == 'DATE':
+        return (lambda x: (x["last_version"] or {}).get("timestamp", "")), True
+    if sort_mode == 'VERSIONS':
+        return (lambda x: x["version_count"]), True
+    return (lambda x: x["name"].lower()), False
+
+def _sort_fields(entry):
+    """The entry fields _sort_key() orders by"""
+    return (entry["name"], entry["version_count"], (entry["last_version"] or {}).get("timestamp"))
+
+class SearchIndex:
+    """
+    Pre-normalized search keys and sort orders for the panel's filter.
+    
+    Names and tags are lower-cased once into one search text per entry and
+    indexed by trigram. Changed entries are re-keyed incrementally; the
+    per-type sort orders and the memoized query results are dropped for
+    that tree type and rebuilt on the next query. The index itself is only
+    built on the first query, and carry_over() moves it to a reloaded copy
+    of the library.
+    
+    Matches are collected by walking a sort order, so they never need
+    sorting, and a search that extends the previous one only re-checks the
+    previous matches, which keeps typing in the search field cheap.
+    """
+    
+    def __init__(self, library):
+        self.library = library
+        self._keys = None
+        self._trigrams = {}
+        self._orders = {}
+        self._results = OrderedDict()
+        self._last = None
+    
+    def _build(self):
+        self._keys = {}
+        for entry in self.library:
+            self._add_keys(entry)
+    
+    def _add_keys(self, entry):
+        name = entry["name"]
+        # One newline-separated text: a search can't contain a newline, so it
+        # matches within a name or tag but never across two of them
+        text = "\n".join([name.lower()] + [tag.lower() for tag in entry.get("tags", [])])
+        self._keys[name] = text
+        for gram in _trigrams(text):
+            self._trigrams.setdefault(gram, set()).add(name)
+    
+    def _drop_keys(self, name):
+        text = self._keys.pop(name, None)
+        if text is None:
+            return
+        for gram in _trigrams(text):
+            names = self._trigrams.get(gram)
+            if names is not None:
+                names.discard(name)
+                if not names:
+                    del self._trigrams[gram]
+    
+    def _invalidate(self, tree_type):
+        for key in [k for k in self._orders if k[0] == tree_type]:
+            del self._orders[key]
+        for key in [k for k in self._results if k[0] == tree_type]:
+            del self._results[key]
+    
+    def update(self, entry):
+        if self._keys is not None:
+            self._drop_keys(entry["name"])
+            self._add_keys(entry)
+        self._invalidate(entry["type"])
+    
+    def remove(self, entry):
+        if self._keys is not None:
+            self._drop_keys(entry["name"])
+        self._invalidate(entry["type"])
+    
+    def carry_over(self, previous):
+        """
+        Take over the index of an older copy of the same library.
+        
+        Only entries added, removed or re-tagged since are re-keyed, and the
+        sort orders of tree types whose entries sort the same are kept, so a
+        reload after another session saved doesn't rebuild the index. The
+        previous index is emptied and rebuilds itself if queried again.
+        """
+        old_entries = previous.library.by_name
+        entries = self.library.by_name
+        if previous._keys is not None:
+            self._keys, self._trigrams = previous._keys, previous._trigrams
+        changed_types = set()
+        for name, old in old_entries.items():
+            if name not in entries:
+                changed_types.add(old["type"])
+                if self._keys is not None:
+                    self._drop_keys(name)
+        for name, entry in entries.items():
+            old = old_entries.get(name)
+            if old is not None and old["type"] == entry["type"] \
+                    and _sort_fields(old) == _sort_fields(entry):
+                if self._keys is not None and old.get("tags") != entry.get("tags"):
+                    self._drop_keys(name)
+                    self._add_keys(entry)
+                continue
+            changed_types.add(entry["type"])
+            if old is not None:
+                changed_types.add(old["type"])
+            if self._keys is not None:
+                self._drop_keys(name)
+                self._add_keys(entry)
+        
+        for key, (ordered, rank) in previous._orders.items():
+            if key[0] not in changed_types:
+                self._orders[key] = ([entries[entry["name"]] for entry in ordered], rank)
+        previous._keys = None
+        previous._trigrams = {}
+        previous._orders = {}
+        previous._results.clear()
+        previous._last = None
+    
+    def _ranked(self, tree_type, sort_mode):
+        """Return (ordered entries, name -> position) for one type and sort mode"""
+        key = (tree_type, sort_mode)
+        ranked = self._orders.get(key)
+        if ranked is None:
+            sort_key, reverse = _sort_key(sort_mode)
+            ordered = sorted(self.library.of_type(tree_type), key=sort_key, reverse=reverse)
+            ranked = (ordered, {entry["name"]: i for i, entry in enumerate(ordered)})
+            self._orders[key] = ranked
+        return ranked
+    
+    def query(self, tree_type, search, sort_mode):
+        """
+        Return the entries of a tree type matching a search string, in sort order.
+        
+        The returned list is shared with the memo and must not be modified.
+        """
+        search = search.lower()
+        key = (tree_type, search, sort_mode)
+        results = self._results.get(key)
+        if results is not None:
+            self._results.move_to_end(key)
+            self._last = key
+            return results
+        
+        ordered, rank = self._ranked(tree_type, sort_mode)
+        if not search:
+            results = ordered
+        else:
+            if self._keys is None:
+                self._build()
+            keys = self._keys
+            last = self._last
+            if last is not None and last[1] and last[0] == tree_type and last[2] == sort_mode \
+                    and search.startswith(last[1]) and last in self._results:
+                # Typing on: only what matched the shorter search can still match
+                results = [entry for entry in self._results[last] if search in keys[entry["name"]]]
+            else:
+                # The smallest trigram posting bounds the matches; when it is a
+                # small part of the type, ranking its hits beats a full walk
+                candidates = None
+                if len(search) >= 3:
+                    candidates = min((self._trigrams.get(gram, ()) for gram in _trigrams(search)),
+                                     key=len)
+                if candidates is not None and len(candidates) * 8 < len(ordered):
+                    matches = [name for name in candidates if name in rank and search in keys[name]]
+                    matches.sort(key=rank.__getitem__)
+                    results = [ordered[rank[name]] for name in matches]
+                else:
+                    results = [entry for entry in ordered if search in keys[entry["name"]]]
+        
+        self._results[key] = results
+        if len(self._results) > SEARCH_MEMO_SIZE:
+            self._results.popitem(last=False)
+        self._last = key
+        return results
+
+# Per-entry history summary, kept in place of the full version list
+_SUMMARY_KEYS = ("version_count", "last_version")
+# Version fields too large to repeat in the summary
+_HISTORY_ONLY_KEYS = ("fingerprint",)
+
+def _summary_entry(entry):
+    last = entry.get("last_version")
+    if last and any(key in last for key in _HISTORY_ONLY_KEYS):
+        last = {k: v for k, v in last.items() if k not in _HISTORY_ONLY_KEYS}
+        entry = dict(entry, last_version=last)
+    return entry
+
+class Library:
+    """
+    In-memory model of the library catalog with lookup indexes.
+    
+    Entries carry a summary of their history ("version_count" and
+    "last_version", the most recently added version record) instead of the
+    full version list. versions() loads a group's history from the catalog
+    the first time it is needed, so the panel only pays for the rows it
+    expands; load_histories() reads all of them at once, through the
+    catalog's load_all_history() where given, for whole-library passes.
+    Entries are indexed by name, tree type and (lower-cased) tag. The
+    mutation methods keep the indexes and summaries in sync, so entries
+    should be added or removed through them rather than by editing the
+    underlying dicts.
+    
+    blob_ref_count() says how many versions use a content-addressed blend
+    without loading histories. Catalogs that can count rows pass
+    count_blob_refs(sha); otherwise the summary carries a "blob_refs" map
+    of every sha in the library, kept up to date by the mutation methods.
+    """
+    
+    def __init__(self, data, load_history=None, count_blob_refs=None, load_all_history=None):
+        self.meta = {k: v for k, v in data.items() if k != "node_groups"}
+        self.meta.setdefault("tags", [])
+        self.by_name = {}
+        self.by_type = {}
+        self.by_tag = {}
+        # Loaded histories, and their version-number maps
+        self._histories = {}
+        self._versions = {}
+        self._load_history = load_history
+        self._load_all_history = load_all_history
+        self._count_blob_refs = count_blob_refs
+        self.search = SearchIndex(self)
+        # Changes since the last save, for catalogs that update row by row
+        self.changes = []
+        # Set when a history turned out to be gone from the catalog
+        self.stale = False
+        # (sha256, blend path) of files to delete once the changes are saved
+        self.unused_files = []
+        for entry in data.get("node_groups", []):
+            self._index_entry(entry)
+        
+        if count_blob_refs is not None:
+            # Counts fetched so far, and reference changes not yet committed
+            self.meta.pop("blob_refs", None)
+            self._blob_refs = {}
+            self._pending_refs = Counter()
+        else:
+            self._blob_refs = self.meta.get("blob_refs")
+            if self._blob_refs is None and len(self._histories) == len(self.by_name):
+                # Every history is in memory already, so the map is cheap to build
+                self._blob_refs = self.meta["blob_refs"] = self._all_blob_refs()
+    
+    def __len__(self):
+        return len(self.by_name)
+    
+    def __iter__(self):
+        return iter(self.by_name.values())
+    
+    def summary_dict(self):
+        """The catalog document without version histories"""
+        data = dict(self.meta)
+        data["node_groups"] = [_summary_entry(entry) for entry in self.by_name.values()]
+        return data
+    
+    def to_dict(self):
+        """The full catalog document, loading every history"""
+        self.load_histories()
+        data = dict(self.meta)
+        data["node_groups"] = [self.full_entry(name) for name in self.by_name]
+        return data
+    
+    def full_entry(self, name):
+        """An entry as stored in library.json before histories were split out"""
+        entry = {k: v for k, v in self.by_name[name].items() if k not in _SUMMARY_KEYS}
+        entry["versions"] = self.versions(name)
+        return entry
+    
+    # Indexing
+    def _index_entry(self, entry):
+        # Older libraries stored the panel's expand state in the entry
+        entry.pop("expanded", None)
+        name = entry["name"]
+        versions = entry.pop("versions", None)
+        if versions is not None:
+            self._set_history(entry, versions)
+        self.by_name[name] = entry
+        self.by_type.setdefault(entry["type"], {})[name] = entry
+        for tag in entry.get("tags", []):
+            self.by_tag.setdefault(tag.lower(), {})[name] = entry
+    
+    def _set_history(self, entry, versions):
+        name = entry["name"]
+        self._histories[name] = versions
+        self._versions[name] = {v["version"]: v for v in versions}
+        entry["version_count"] = len(versions)
+        entry["last_version"] = versions[-1] if versions else None
+    
+    def _ref_blob(self, version_info, delta):
+        sha = version_info.get("sha256")
+        if not sha:
+            return
+        if self._count_blob_refs is not None:
+            self._pending_refs[sha] += delta
+            if sha not in self._blob_refs:
+                return
+        if self._blob_refs is not None:
+            count = self._blob_refs.get(sha, 0) + delta
+            if count > 0:
+                self._blob_refs[sha] = count
+            else:
+                self._blob_refs.pop(sha, None)
+    
+    def _unindex_tags(self, entry):
+        for tag in entry.get("tags", []):
+            tagged = self.by_tag.get(tag.lower())
+            if tagged is not None:
+                tagged.pop(entry["name"], None)
+                if not tagged:
+                    del self.by_tag[tag.lower()]
+    
+    # Lookups
+    def get(self, name):
+        return self.by_name.get(name)
+    
+    def of_type(self, tree_type):
+        return self.by_type.get(tree_type, {}).values()
+    
+    def with_tag(self, tag):
+        return self.by_tag.get(tag.lower(), {}).values()
+    
+    def versions(self, name):
+        """Return the version records of an entry, oldest first, loading them if needed"""
+        history = self._histories.get(name)
+        if history is None:
+            with profiler.timed("catalog.load_history"):
+                history = self._load_history(name) if self._load_history else []
+            history = self._loaded_history(name, history)
+            profiler.count("library.histories_loaded", len(self._histories))
+        return history
+    
+    def load_histories(self):
+        """Load every history not in memory yet, in one catalog read where the catalog can"""
+        missing = [name for name in self.by_name if name not in self._histories]
+        if len(missing) < 2 or self._load_all_history is None:
+            for name in missing:
+                self.versions(name)
+            return
+        with profiler.timed("catalog.load_all_history"):
+            histories = self._load_all_history()
+        for name in missing:
+            self._loaded_history(name, histories.get(name))
+        profiler.count("library.histories_loaded", len(self._histories))
+    
+    def _loaded_history(self, name, history):
+        if history is None:
+            # Deleted by another session since this copy was loaded. Keep the
+            # summary for drawing; the cache reloads the catalog next time.
+            self.stale = True
+            self._histories[name] = []
+            self._versions[name] = {}
+            return self._histories[name]
+        self._set_history(self.by_name[name], history)
+        return history
+    
+    def get_version(self, name, version):
+        if name not in self.by_name:
+            return None
+        self.versions(name)
+        return self._versions[name].get(version)
+    
+    def _all_blob_refs(self):
+        self.load_histories()
+        refs = {}
+        for name in self.by_name:
+            for version_info in self.versions(name):
+                sha = version_info.get("sha256")
+                if sha:
+                    refs[sha] = refs.get(sha, 0) + 1
+        return refs
+    
+    def blob_ref_count(self, sha):
+        """How many versions point at a content-addressed blend"""
+        if self._count_blob_refs is not None:
+            if sha not in self._blob_refs:
+                self._blob_refs[sha] = self._count_blob_refs(sha) + self._pending_refs[sha]
+            return self._blob_refs[sha]
+        if self._blob_refs is None:
+            # Summaries written before the map existed: count once, then keep it
+            self._blob_refs = self.meta["blob_refs"] = self._all_blob_refs()
+        return self._blob_refs.get(sha, 0)
+    
+    def clear_changes(self):
+        """Forget the change journal once the catalog has saved it"""
+        self.changes.clear()
+        if self._count_blob_refs is not None:
+            self._pending_refs.clear()
+    
+    # Mutations
+    def add_entry(self, entry):
+        if entry["name"] in self.by_name:
+            self.remove_entry(entry["name"])
+        self._index_entry(entry)
+        for version_info in self.versions(entry["name"]):
+            self._ref_blob(version_info, 1)
+        self.search.update(entry)
+        self.changes.append(("put_entry", entry["name"]))
+        return entry
+    
+    def remove_entry(self, name):
+        """Remove an entry; the returned entry has its "versions" filled in"""
+        entry = self.by_name.get(name)
+        if entry is None:
+            return None
+        versions = self.versions(name)
+        del self.by_name[name]
+        
+        typed = self.by_type.get(entry["type"])
+        if typed is not None:
+            typed.pop(name, None)
+            if not typed:
+                del self.by_type[entry["type"]]
+        self._unindex_tags(entry)
+        del self._histories[name]
+        del self._versions[name]
+        for version_info in versions:
+            self._ref_blob(version_info, -1)
+        self.search.remove(entry)
+        self.changes.append(("delete_entry", name))
+        entry["versions"] = versions
+        return entry
+    
+    def set_tags(self, name, tags):
+        entry = self.by_name[name]
+        self._unindex_tags(entry)
+        entry["tags"] = tags
+        for tag in tags:
+            self.by_tag.setdefault(tag.lower(), {})[name] = entry
+        self.search.update(entry)
+        self.changes.append(("put_tags", name))
+    
+    def add_version(self, name, version_info):
+        entry = self.by_name[name]
+        history = self.versions(name)
+        history.append(version_info)
+        self._versions[name][version_info["version"]] = version_info
+        self._ref_blob(version_info, 1)
+        entry["latest_version"] = max(entry["latest_version"], version_info["version"])
+        entry["version_count"] = len(history)
+        entry["last_version"] = version_info
+        self.search.update(entry)
+        self.changes.append(("put_version", name, version_info["version"]))
+        return version_info
+    
+    def remove_version(self, name, version):
+        """Remove one version, dropping the entry when it was the last one"""
+        entry = self.by_name[name]
+        history = self.versions(name)
+        version_info = self._versions[name].pop(version)
+        history.remove(version_info)
+        self._ref_blob(version_info, -1)
+        
+        if not history:
+            self.remove_entry(name)
+        else:
+            if version == entry["latest_version"]:
+                entry["latest_version"] = max(self._versions[name])
+            entry["version_count"] = len(history)
+            entry["last_version"] = history[-1]
+            self.search.update(entry)
+            self.changes.append(("delete_version", name, version))
+        return version_info
+    
+    def update_version(self, name, version, **fields):
+        version_info = self.get_version(name, version)
+        self._ref_blob(version_info, -1)
+        version_info.update(fields)
+        self._ref_blob(version_info, 1)
+        self.changes.append(("put_version", name, version))
+        return version_info
+
+# Catalog storage backends
+class JsonCatalog:
+    """
+    Catalog stored as library.json plus one history file per node group.
+    
+    library.json holds the entry summaries the panel draws from; each
+    group's full version list is in history/<sha1 of name>.json and is read
+    when first needed. Saves rewrite library.json and the history files of
+    the groups that changed. A library.json from before the split still
+    loads, and is converted on its next save.
+    """
+    
+    filename = "library.json"
+    # Re-read inside transactions: the whole file is rewritten from memory,
+    # so it must not be based on a copy another session has since replaced
+    reload_in_transaction = True
+    # Blob reference counts are kept in the summary
+    count_blob_refs = None
+    
+    def __init__(self, root, compact=True):
+        self.path = Path(root) / self.filename
+        self.history_path = Path(root) / "history"
+        self.compact = compact
+    
+    def exists(self):
+        return self.path.exists()
+    
+    def stamp(self):
+        return _file_stamp(self.path)
+    
+    def history_file(self, name):
+        return self.history_path / f"{hashlib.sha1(name.encode('utf-8')).hexdigest()}.json"
+    
+    def load(self):
+        return _read_library_file(self.path)
+    
+    def load_history(self, name):
+        """A group's version list, or None if another session has deleted the group"""
+        path = self.history_file(name)
+        if not path.exists():
+            return None
+        return _read_library_file(path, backups=HISTORY_BACKUP_COUNT)["versions"]
+    
+    def load_all_history(self):
+        """Every group's version list by name, read in one pass over history/"""
+        histories = {}
+        try:
+            listing = os.scandir(self.history_path)
+        except FileNotFoundError:
+            return histories
+        with listing:
+            for item in listing:
+                if not item.name.endswith(".json"):
+                    continue
+                data = _read_library_file(Path(item.path), backups=HISTORY_BACKUP_COUNT)
+                # A file deleted since the listing reads as an empty catalog
+                if "name" in data:
+                    histories[data["name"]] = data["versions"]
+        return histories
+    
+    def _write_history(self, library, name):
+        _ensure_dir(self.history_path)
+        write_library_file(self.history_file(name),
+                           {"name": name, "versions": library.versions(name)},
+                           compact=self.compact, backups=HISTORY_BACKUP_COUNT)
+    
+    def _delete_history(self, name):
+        path = self.history_file(name)
+        for stale in [path] + [_backup_path(path, i) for i in range(1, HISTORY_BACKUP_COUNT + 1)]:
+            try:
+                stale.unlink()
+            except FileNotFoundError:
+                pass
+    
+    def commit(self, library):
+        _check_new_catalog(self.path)
+        self._write(library)
+    
+    def _write(self, library):
+        if library.meta.get("history_split"):
+            changed = {change[1] for change in library.changes if change[0] != "put_tags"}
+        else:
+            changed = set(library.by_name)
+            library.meta["history_split"] = True
+        
+        # Histories first: a summary must never point at history that isn't written
+        removed = []
+        for name in changed:
+            if name in library.by_name:
+                self._write_history(library, name)
+            else:
+                removed.append(name)
+        write_library_file(self.path, library.summary_dict(), compact=self.compact)
+        for name in removed:
+            self._delete_history(name)
+    
+    def replace(self, data):
+        library = Library(data)
+        library.meta.pop("history_split", None)
+        if self.history_path.exists():
+            for path in self.history_path.iterdir():
+                path.unlink()
+        self._write(library)
+
+# Entry and version keys that have their own SQLite columns; anything else
+# is kept in the row's "extra" JSON so the catalog round-trips unchanged.
+_GROUP_COLUMNS = {"name", "type", "latest_version", "tags", "versions",
+                  "version_count", "last_version"}
+_VERSION_COLUMNS = {"version", "timestamp", "notes", "sha256"}
+
+_SQLITE_SCHEMA = """
+CREATE TABLE IF NOT EXISTS meta (
+    key TEXT PRIMARY KEY,
+    value TEXT NOT NULL
+);
+CREATE TABLE IF NOT EXISTS groups (
+    name TEXT PRIMARY KEY,
+    type TEXT NOT NULL,
+    latest_version INTEGER NOT NULL,
+    extra TEXT
+);
+CREATE TABLE IF NOT EXISTS versions (
+    group_name TEXT NOT NULL REFERENCES groups(name) ON DELETE CASCADE,
+    version INTEGER NOT NULL,
+    timestamp TEXT NOT NULL,
+    notes TEXT NOT NULL DEFAULT '',
+    sha256 TEXT,
+    extra TEXT,
+    PRIMARY KEY (group_name, version)
+);
+CREATE TABLE IF NOT EXISTS tags (
+    group_name TEXT NOT NULL REFERENCES groups(name) ON DELETE CASCADE,
+    position INTEGER NOT NULL,
+    tag TEXT NOT NULL,
+    PRIMARY KEY (group_name, position)
+);
+CREATE INDEX IF NOT EXISTS groups_type ON groups(type);
+CREATE INDEX IF NOT EXISTS tags_tag ON tags(tag COLLATE NOCASE);
+CREATE INDEX IF NOT EXISTS versions_timestamp ON versions(timestamp);
+"""
+
+def _extra_json(record, columns):
+    extra = {k: v for k, v in record.items() if k not in columns}
+    return json.dumps(extra) if extra else None
+
+class SqliteCatalog:
+    """
+    Catalog stored in library.db with tables for groups, versions and tags.
+    
+    Saves apply the library's change journal, so adding or deleting a version
+    touches a few rows in one transaction instead of rewriting the catalog.
+    """
+    
+    filename = "library.db"
+    reload_in_transaction = False
+    
+    def __init__(self, root):
+        self.path = Path(root) / self.filename
+        self._schema_ready = False
+    
+    def exists(self):
+        return self.path.exists()
+    
+    def stamp(self):
+        # The default rollback journal (WAL needs shared memory, which network
+        # shares don't provide) updates the file's mtime on every commit.
+        return _file_stamp(self.path)
+    
+    def _connect(self):
+        conn = sqlite3.connect(str(self.path), timeout=30)
+        conn.execute("PRAGMA foreign_keys = ON")
+        if not self._schema_ready:
+            conn.executescript(_SQLITE_SCHEMA)
+            self._upgrade(conn)
+            self._schema_ready = True
+        return conn
+    
+    @staticmethod
+    def _upgrade(conn):
+        """Move sha256 out of "extra" into its own column in databases that predate it"""
+        conn.execute("BEGIN IMMEDIATE")
+        try:
+            columns = {row[1] for row in conn.execute("PRAGMA table_info(versions)")}
+            if "sha256" not in columns:
+                conn.execute("ALTER TABLE versions ADD COLUMN sha256 TEXT")
+                updates = []
+                for name, version, extra in conn.execute(
+                        "SELECT group_name, version, extra FROM versions WHERE extra IS NOT NULL"):
+                    record = json.loads(extra)
+                    sha = record.pop("sha256", None)
+                    if sha:
+                        updates.append((sha, json.dumps(record) if record else None, name, version))
+                conn.executemany("UPDATE versions SET sha256 = ?, extra = ? "
+                                 "WHERE group_name = ? AND version = ?", updates)
+            conn.execute("CREATE INDEX IF NOT EXISTS versions_sha256 ON versions(sha256)")
+        except BaseException:
+            conn.rollback()
+            raise
+        conn.commit()
+    
+    def load(self):
+        """Load the catalog with history summaries; see load_history()"""
+        if not self.path.exists():
+            return {"node_groups": [], "tags": []}
+        
+        with closing(self._connect()) as conn:
+            data = {key: json.loads(value) for key, value in conn.execute("SELECT key, value FROM meta")}
+            groups = {}
+            for name, tree_type, latest, extra in conn.execute(
+                    "SELECT name, type, latest_version, extra FROM groups ORDER BY rowid"):
+                entry = {"name": name, "type": tree_type, "latest_version": latest,
+                         "tags": [], "version_count": 0, "last_version": None}
+                if extra:
+                    entry.update(json.loads(extra))
+                groups[name] = entry
+            for name, tag in conn.execute(
+                    "SELECT group_name, tag FROM tags ORDER BY group_name, position"):
+                groups[name]["tags"].append(tag)
+            # The newest version row of each group, and how many it has
+            for name, version, timestamp, notes, sha, extra, count in conn.execute(
+                    "SELECT v.group_name, v.version, v.timestamp, v.notes, v.sha256, v.extra, c.count "
+                    "FROM versions v JOIN (SELECT group_name, MAX(version) AS version, "
+                    "COUNT(*) AS count FROM versions GROUP BY group_name) c "
+                    "ON v.group_name = c.group_name AND v.version = c.version"):
+                groups[name]["last_version"] = self._version_record(version, timestamp, notes,
+                                                                     sha, extra)
+                groups[name]["version_count"] = count
+                groups[name] = _summary_entry(groups[name])
+        
+        data["node_groups"] = list(groups.values())
+        data.setdefault("tags", [])
+        return data
+    
+    @staticmethod
+    def _version_record(version, timestamp, notes, sha, extra):
+        version_info = {"version": version, "timestamp": timestamp, "notes": notes}
+        if sha:
+            version_info["sha256"] = sha
+        if extra:
+            version_info.update(json.loads(extra))
+        return version_info
+    
+    def load_history(self, name):
+        """A group's version list, or None if another session has deleted the group"""
+        with closing(self._connect()) as conn:
+            history = [self._version_record(*row) for row in conn.execute(
+                "SELECT version, timestamp, notes, sha256, extra FROM versions "
+                "WHERE group_name = ? ORDER BY version", (name,))]
+        # Groups are removed with their last version, so no rows means no group
+        return history or None
+    
+    def load_all_history(self):
+        """Every group's version list by name, in one query"""
+        histories = {}
+        if not self.path.exists():
+            return histories
+        with closing(self._connect()) as conn:
+            for row in conn.execute(
+                    "SELECT group_name, version, timestamp, notes, sha256, extra FROM versions "
+                    "ORDER BY group_name, version"):
+                histories.setdefault(row[0], []).append(self._version_record(*row[1:]))
+        return histories
+    
+    def count_blob_refs(self, sha):
+        """Committed versions using a content-addressed blend"""
+        if not self.path.exists():
+            return 0
+        with closing(self._connect()) as conn:
+            return conn.execute("SELECT COUNT(*) FROM versions WHERE sha256 = ?", (sha,)).fetchone()[0]
+    
+    # Row writers
+    def _put_group(self, conn, entry):
+        conn.execute(
+            "INSERT INTO groups (name, type, latest_version, extra) VALUES (?, ?, ?, ?) "
+            "ON CONFLICT(name) DO UPDATE SET type = excluded.type, "
+            "latest_version = excluded.latest_version, extra = excluded.extra",
+            (entry["name"], entry["type"], entry["latest_version"],
+             _extra_json(entry, _GROUP_COLUMNS)))
+    
+    def _put_tags(self, conn, entry):
+        conn.execute("DELETE FROM tags WHERE group_name = ?", (entry["name"],))
+        conn.executemany(
+            "INSERT INTO tags (group_name, position, tag) VALUES (?, ?, ?)",
+            [(entry["name"], i, tag) for i, tag in enumerate(entry.get("tags", []))])
+    
+    def _put_version(self, conn, name, version_info):
+        conn.execute(
+            "INSERT OR REPLACE INTO versions (group_name, version, timestamp, notes, sha256, extra) "
+            "VALUES (?, ?, ?, ?, ?, ?)",
+            (name, version_info["version"], version_info["timestamp"],
+             version_info.get("notes", ""), version_info.get("sha256"),
+             _extra_json(version_info, _VERSION_COLUMNS)))
+    
+    def _put_entry(self, conn, entry, versions):
+        conn.execute("DELETE FROM groups WHERE name = ?", (entry["name"],))
+        self._put_group(conn, entry)
+        self._put_tags(conn, entry)
+        for version_info in versions:
+            self._put_version(conn, entry["name"], version_info)
+    
+    def commit(self, library):
+        _check_new_catalog(self.path)
+        with closing(self._connect()) as conn, conn:
+            for change in library.changes:
+                kind, name = change[0], change[1]
+                entry = library.get(name)
+                if kind == "delete_entry":
+                    if entry is None:
+                        conn.execute("DELETE FROM groups WHERE name = ?", (name,))
+                    continue
+                if entry is None:
+                    # Removed again later in the same batch
+                    continue
+                if kind == "put_entry":
+                    self._put_entry(conn, entry, library.versions(name))
+                elif kind == "put_tags":
+                    self._put_tags(conn, entry)
+                elif kind == "put_version":
+                    version_info = library.get_version(name, change[2])
+                    if version_info is not None:
+                        self._put_version(conn, name, version_info)
+                    self._put_group(conn, entry)
+                elif kind == "delete_version":
+                    conn.execute("DELETE FROM versions WHERE group_name = ? AND version = ?",
+                                 (name, change[2]))
+                    self._put_group(conn, entry)
+    
+    def replace(self, data):
+        """Overwrite the whole catalog with a library document in one transaction"""
+        with closing(self._connect()) as conn, conn:
+            conn.execute("DELETE FROM groups")
+            conn.execute("DELETE FROM meta")
+            # Reference counts come from the versions table, not the JSON summary's map
+            conn.executemany(
+                "INSERT INTO meta (key, value) VALUES (?, ?)",
+                [(k, json.dumps(v)) for k, v in data.items() if k not in ("node_groups", "blob_refs")])
+            for entry in data.get("node_groups", []):
+                self._put_entry(conn, entry, entry["versions"])
+
+class CatalogConflict(RuntimeError):
+    """A catalog would be created next to another backend's catalog"""
+
+# Suffix of a catalog file that has been migrated to the other backend
+MIGRATED_SUFFIX = ".migrated"
+CATALOG_FILES = (JsonCatalog.filename, SqliteCatalog.filename)
+
+def _check_new_catalog(path):
+    """Refuse to start a catalog at path while the folder holds another backend's"""
+    if path.exists():
+        return
+    for filename in CATALOG_FILES:
+        other = path.with_name(filename)
+        if other != path and other.exists():
+            raise CatalogConflict(f"{path.parent} already keeps its catalog in {filename}")
+
+def migrate_catalog(source, target):
+    """
+    Copy a catalog into another backend and move the source aside.
+    
+    The old file is renamed with a ".migrated" suffix rather than deleted,
+    so switching backends can never lose a library. Call with the library
+    lock held.
+    """
+    if target.exists():
+        raise CatalogConflict(f"{target.path} already exists")
+    target.replace(Library(source.load(), source.load_history, source.count_blob_refs,
+                           source.load_all_history).to_dict())
+    os.replace(source.path, source.path.with_name(source.path.name + MIGRATED_SUFFIX))
+
+def _folder_backend(root, preferred):
+    """
+    The backend a library folder uses, going by its files.
+    
+    A catalog file decides; without one, a ".migrated" file names the backend
+    that was migrated away from. Only a new library, or one with both files
+    left by an interrupted migration, goes by preferred.
+    """
+    json_file, db_file = (root / filename for filename in CATALOG_FILES)
+    if json_file.exists() != db_file.exists():
+        return 'SQLITE' if db_file.exists() else 'JSON'
+    if not json_file.exists():
+        json_migrated = json_file.with_name(json_file.name + MIGRATED_SUFFIX).exists()
+        db_migrated = db_file.with_name(db_file.name + MIGRATED_SUFFIX).exists()
+        if json_migrated != db_migrated:
+            return 'SQLITE' if json_migrated else 'JSON'
+    return preferred
+
+# (root, backend, compact) -> (catalog, time its backend was checked)
+_catalogs = {}
+
+def get_catalog(refresh=False):
+    """
+    Return the catalog the library folder uses.
+    
+    The backend selected in preferences is only used for a new library;
+    switching an existing one is done by migrate_library(). The folder is
+    re-checked every LIBRARY_STAT_INTERVAL, or now with refresh, so no
+    one keeps using a catalog another session has migrated away.
+    """
+    prefs = get_preferences()
+    backend = prefs.storage_backend if prefs else 'JSON'
+    compact = prefs.compact_library if prefs else True
+    root = get_library_path()
+    
+    key = (root, backend, compact)
+    catalog, checked_at = _catalogs.get(key, (None, 0.0))
+    now = time.monotonic()
+    if catalog is None or refresh or now - checked_at >= LIBRARY_STAT_INTERVAL:
+        cls = SqliteCatalog if _folder_backend(root, backend) == 'SQLITE' else JsonCatalog
+        if not isinstance(catalog, cls):
+            catalog = SqliteCatalog(root) if cls is SqliteCatalog else JsonCatalog(root, compact)
+        _catalogs[key] = (catalog, now)
+    return catalog
+
+def migrate_library():
+    """
+    Move the library to the backend selected in preferences, under the library lock.
+    
+    Returns the catalog in use afterwards. Does nothing if the library already
+    uses that backend or has no catalog yet.
+    """
+    prefs = get_preferences()
+    backend = prefs.storage_backend if prefs else 'JSON'
+    compact = prefs.compact_library if prefs else True
+    root = get_library_path()
+    with LibraryLock(root, timeout=get_lock_timeout()):
+        current = get_catalog(refresh=True)
+        target = SqliteCatalog(root) if backend == 'SQLITE' else JsonCatalog(root, compact)
+        if type(current) is not type(target) and current.exists():
+            with profiler.timed("catalog.migrate"):
+                migrate_catalog(current, target)
+        reset_catalogs()
+        return get_catalog()
+
+def reset_catalogs():
+    """Forget open catalogs so the next access re-checks which backend the folder uses"""
+    _catalogs.clear()
+    invalidate_library_cache()
+
+# Locking
+class LibraryLockTimeout(Exception):
+    pass
+
+# One in-process lock per library folder, so threads of this session queue up
+# behind each other before contending for the lock file with other sessions.
+_thread_locks = {}
+_thread_locks_guard = threading.Lock()
+# Re-entry depth per lock file, and the contents this session wrote to it;
+# only touched while holding its thread lock
+_lock_depths = {}
+_lock_tokens = {}
+_lock_heartbeats = {}
+
+def _lock_heartbeat(lock_path, token, stop):
+    """Keep a held lock file's mtime fresh so long operations don't look stale"""
+    while not stop.wait(LOCK_HEARTBEAT):
+        try:
+            if lock_path.read_text() != token:
+                return
+            os.utime(lock_path)
+        except OSError:
+            return
+
+def _stale_lock_token(lock_path):
+    """
+    Return the contents ("host pid time") of a lock file that should be broken, or None.
+    
+    Age is checked first, so an old lock that is empty or half-written (a
+    crash between creating and writing it) is broken too.
+    """
+    try:
+        age = time.time() - lock_path.stat().st_mtime
+        token = lock_path.read_text()
+    except OSError:
+        return None
+    if age > LOCK_STALE_AGE:
+        return token
+    try:
+        host, pid = token.split()[:2]
+    except ValueError:
+        # Being written right now, or left half-written; wait until it is old
+        return None
+    if os.name != 'nt' and host == socket.gethostname():
+        try:
+            os.kill(int(pid), 0)
+        except ProcessLookupError:
+            return token
+        except (OSError, ValueError):
+            pass
+    return None
+
+class LibraryLock:
+    """
+    Advisory lock on a library folder, shared by every Blender session using it.
+    
+    The lock is a library.lock file created with O_EXCL, which is atomic on
+    local disks and on NFS. Locks left behind by crashed sessions are broken
+    once they are older than LOCK_STALE_AGE or their process is gone; a
+    held lock is touched periodically, however long the operation takes.
+    The lock is re-entrant within one thread.
+    """
+    
+    def __init__(self, root, timeout=DEFAULT_LOCK_TIMEOUT):
+        self.path = Path(root) / "library.lock"
+        self.timeout = timeout
+        with _thread_locks_guard:
+            self._thread_lock = _thread_locks.setdefault(self.path, threading.RLock())
+    
+    def acquire(self):
+        deadline = time.monotonic() + self.timeout
+        if not self._thread_lock.acquire(timeout=self.timeout):
+            raise LibraryLockTimeout(f"Timed out waiting for {self.path}")
+        
+        # Held by this thread already
+        if _lock_depths.get(self.path):
+            _lock_depths[self.path] += 1
+            return
+        
+        created = False
+        try:
+            delay = 0.01
+            while True:
+                try:
+                    fd = os.open(self.path, os.O_CREAT | os.O_EXCL | os.O_WRONLY)
+                except FileExistsError:
+                    token = _stale_lock_token(self.path)
+                    if token is not None:
+                        self._break_stale(token)
+                        continue
+                    if time.monotonic() >= deadline:
+                        raise LibraryLockTimeout(
+                            f"Library is locked by another session ({self.path})")
+                    time.sleep(delay)
+                    delay = min(delay * 2, 0.25)
+                    continue
+                created = True
+                token = f"{socket.gethostname()} {os.getpid()} {datetime.now().isoformat()}\n"
+                with os.fdopen(fd, 'w') as f:
+                    f.write(token)
+                break
+        except BaseException:
+            # Interrupted or failed (Ctrl+C, disk full...): leave no half-written
+            # lock behind and let the next caller in this process through
+            if created:
+                try:
+                    self.path.unlink()
+                except OSError:
+                    pass
+            self._thread_lock.release()
+            raise
+        _lock_depths[self.path] = 1
+        _lock_tokens[self.path] = token
+        stop = threading.Event()
+        threading.Thread(target=_lock_heartbeat, args=(self.path, token, stop),
+                         name="nodelib-lock-heartbeat", daemon=True).start()
+        _lock_heartbeats[self.path] = stop
+    
+    def _break_stale(self, token):
+        """
+        Remove the lock file if it still is the stale lock holding token.
+        
+        Another session may break the same lock first and create its own in
+        its place, so the file is renamed away and checked before deleting;
+        a live lock taken by mistake is put back.
+        """
+        stale = self.path.with_name(
+            f"{self.path.name}.stale.{socket.gethostname()}.{os.getpid()}.{threading.get_ident()}")
+        try:
+            os.replace(self.path, stale)
+        except OSError:
+            return
+        try:
+            taken = stale.read_text()
+        except OSError:
+            taken = None
+        if taken == token:
+            stale.unlink()
+            return
+        try:
+            # Restore without replacing a lock created since
+            os.link(stale, self.path)
+            stale.unlink()
+        except FileExistsError:
+            stale.unlink()
+        except OSError:
+            # No hard links on this filesystem
+            os.replace(stale, self.path)
+    
+    def release(self):
+        _lock_depths[self.path] -= 1
+        if not _lock_depths[self.path]:
+            token = _lock_tokens.pop(self.path)
+            _lock_heartbeats.pop(self.path).set()
+            try:
+                # Only remove our own lock, never one another session took over
+                if self.path.read_text() == token:
+                    self.path.unlink()
+            except FileNotFoundError:
+                pass
+        self._thread_lock.release()
+    
+    def __enter__(self):
+        self.acquire()
+        return self
+    
+    def __exit__(self, *exc):
+        self.release()
+
+def get_lock_timeout():
+    prefs = get_preferences()
+    return prefs.lock_timeout if prefs else DEFAULT_LOCK_TIMEOUT
+
+def get_retention_policy():
+    prefs = get_preferences()
+    if prefs is None:
+        return RetentionPolicy()
+    return RetentionPolicy(prefs.keep_versions, prefs.weekly_after_days, prefs.keep_noted_versions)
+
+class LibraryCache:
+    """
+    Process-wide cache of the parsed library.
+    
+    The catalog is re-read only when its file's mtime or size changes, and the
+    stat itself is throttled so repeated panel redraws touch neither disk nor
+    the parser.
+    """
+    
+    def __init__(self):
+        self.invalidate()
+    
+    def invalidate(self):
+        self.path = None
+        self.stamp = None
+        self.data = None
+        self.checked_at = 0.0
+    
+    def get(self, catalog, validate=False, reload=False):
+        now = time.monotonic()
+        if self.data is not None and self.path == catalog.path and not reload \
+                and not self.data.stale:
+            if not validate and now - self.checked_at < LIBRARY_STAT_INTERVAL:
+                return self.data
+            if catalog.stamp() == self.stamp:
+                self.checked_at = now
+                return self.data
+        
+        stamp = catalog.stamp()
+        previous = self.data if self.path == catalog.path else None
+        with profiler.timed("catalog.load"):
+            self.data = Library(catalog.load(), catalog.load_history, catalog.count_blob_refs,
+                                catalog.load_all_history)
+        if previous is not None:
+            with profiler.timed("search.carry_over"):
+                self.data.search.carry_over(previous.search)
+        profiler.count("library.node_groups", len(self.data))
+        self.path = catalog.path
+        self.stamp = stamp
+        self.checked_at = now
+        return self.data
+    
+    def put(self, catalog, data, stamp=None):
+        self.path = catalog.path
+        self.data = data
+        self.stamp = catalog.stamp() if stamp is None else stamp
+        self.checked_at = time.monotonic()
+
+_library_cache = LibraryCache()
+
+def load_library(validate=False):
+    """
+    Return the cached library, reloading it if the catalog changed on disk.
+    
+    Operators that modify the library pass validate=True so they always work
+    on the latest catalog instead of a copy up to LIBRARY_STAT_INTERVAL old.
+    """
+    return _library_cache.get(get_catalog(refresh=validate), validate=validate)
+
+def save_library(library):
+    catalog = get_catalog()
+    try:
+        with profiler.timed("catalog.save"):
+            catalog.commit(library)
+    except Exception:
+        # The in-memory copy may no longer match what is on disk
+        _library_cache.invalidate()
+        raise
+    library.clear_changes()
+    _delete_unused_files(library)
+    _library_cache.put(catalog, library)
+
+def invalidate_library_cache():
+    _library_cache.invalidate()
+
+@contextmanager
+def library_transaction():
+    """
+    Lock the library and yield an up-to-date copy to modify.
+    
+    Changes are saved when the block exits normally and discarded if it
+    raises. Blend files written inside the block are protected by the same
+    lock, so read-modify-write cycles from several sessions can't interleave.
+    """
+    with LibraryLock(get_library_path(), timeout=get_lock_timeout()):
+        catalog = get_catalog(refresh=True)
+        library = _library_cache.get(catalog, validate=True,
+                                     reload=catalog.reload_in_transaction)
+        try:
+            yield library
+        except BaseException:
+            _library_cache.invalidate()
+            raise
+        if library.changes:
+            save_library(library)
+
+@contextmanager
+def catalog_transaction(catalog, timeout=DEFAULT_LOCK_TIMEOUT):
+    """
+    Like library_transaction(), but on a private copy of the catalog.
+    
+    Safe to use from worker threads: it never touches bpy or the shared
+    cache. The yielded library gets a `stamp` attribute after committing.
+    """
+    with LibraryLock(catalog.path.parent, timeout=timeout):
+        with profiler.timed("catalog.load"):
+            library = Library(catalog.load(), catalog.load_history, catalog.count_blob_refs,
+                              catalog.load_all_history)
+        yield library
+        if library.changes:
+            with profiler.timed("catalog.save"):
+                catalog.commit(library)
+            library.clear_changes()
+            _delete_unused_files(library)
+        library.stamp = catalog.stamp()
+
+def adopt_library(catalog, library):
+    """Make a library saved by catalog_transaction() the cached one, if still current"""
+    if _library_cache.path == catalog.path and catalog.stamp() == library.stamp:
+        if _library_cache.data is not None:
+            library.search.carry_over(_library_cache.data.search)
+        _library_cache.put(catalog, library, library.stamp)
+    elif _library_cache.path == catalog.path:
+        _library_cache.invalidate()
+
+# Node tree fingerprints
+def _digest(value):
+    payload = json.dumps(value, sort_keys=True, separators=(",", ":"))
+    return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+def signature_hash(signature):
+    """SHA-256 of a node tree signature, identifying its content"""
+    return _digest(signature)
+
+def _interface_label(item):
+    direction = item.get("in_out") or ("OUTPUT" if item.get("is_output") else "INPUT")
+    socket_type = item.get("socket_type") or item.get("bl_socket_idname") or item.get("item_type", "")
+    return f"{direction.title()} {item.get('name', '')} ({socket_type})"
+
+def signature_fingerprint(signature):
+    """
+    Compact, diffable form of a node tree signature, stored with each version.
+    
+    Unlinked input values and links are kept so a diff can name them; other
+    node settings, interface sockets and nested groups are reduced to short
+    digests.
+    """
+    trees = signature["trees"]
+    root = trees[signature["root"]]
+    return {
+        "nodes": {
+            name: {"type": node["type"], "settings": _digest(node["properties"])[:12],
+                   "inputs": node["inputs"]}
+            for name, node in root["nodes"].items()
+        },
+        "links": [f"{a}.{b} > {c}.{d}" for a, b, c, d in root["links"]],
+        "interface": {_interface_label(item): _digest(item)[:12] for item in root["interface"]},
+        "groups": {name: _digest(tree)[:12] for name, tree in trees.items()
+                   if name != signature["root"]},
+    }
+
+def _format_value(value):
+    if isinstance(value, list):
+        return "(" + ", ".join(_format_value(v) for v in value) + ")"
+    if isinstance(value, float):
+        return f"{value:g}"
+    return str(value)
+
+def _diff_keyed(old, new, what, changed):
+    """Lines for entries added to, removed from or changed between two dicts"""
+    lines = [('ADD', f"{what} {key} added") for key in new if key not in old]
+    lines += [('REMOVE', f"{what} {key} removed") for key in old if key not in new]
+    lines += [line for key in old if key in new and old[key] != new[key]
+              for line in changed(key, old[key], new[key])]
+    return lines
+
+def diff_fingerprints(old, new):
+    """Describe how a node group changed between two fingerprints, as (icon, text) lines"""
+    def node_changes(name, before, after):
+        if before["type"] != after["type"]:
+            return [('MODIFIER', f"{name}: {before['type']} replaced by {after['type']}")]
+        lines = []
+        if before["settings"] != after["settings"]:
+            lines.append(('MODIFIER', f"{name}: settings changed"))
+        for ident in sorted(set(before["inputs"]) | set(after["inputs"])):
+            a, b = before["inputs"].get(ident), after["inputs"].get(ident)
+            if a == b:
+                continue
+            if a is None:
+                lines.append(('LINKED', f"{name}.{ident}: unlinked, now {_format_value(b)}"))
+            elif b is None:
+                lines.append(('LINKED', f"{name}.{ident}: now linked"))
+            else:
+                lines.append(('MODIFIER', f"{name}.{ident}: {_format_value(a)} → {_format_value(b)}"))
+        return lines
+    
+    def changed(what):
+        return lambda key, before, after: [('MODIFIER', f"{what} {key} changed")]
+    
+    old_links, new_links = set(old["links"]), set(new["links"])
+    return (
+        _diff_keyed(old["interface"], new["interface"], "Socket", changed("Socket"))
+        + _diff_keyed(old["nodes"], new["nodes"], "Node", node_changes)
+        + [('ADD', f"Link {link}") for link in sorted(new_links - old_links)]
+        + [('REMOVE', f"Link {link}") for link in sorted(old_links - new_links)]
+        + _diff_keyed(old["groups"], new["groups"], "Nested group", changed("Nested group"))
+    )
+
+def version_diff(old_info, new_info):
+    """Compare two version records using only what the catalog stores"""
+    if old_info.get("tree_hash") and old_info.get("tree_hash") == new_info.get("tree_hash"):
+        return [('CHECKMARK', "No changes")]
+    for version_info in (old_info, new_info):
+        if "fingerprint" not in version_info:
+            return [('INFO', f"v{version_info['version']} was saved before fingerprints "
+                             "were recorded, so it can't be compared")]
+    return diff_fingerprints(old_info["fingerprint"], new_info["fingerprint"]) or [
+        ('INFO', "Only nested group internals or layout changed")]
+
+def hash_file(path, chunk_size=1 << 20):
+    digest = hashlib.sha256()
+    with open(path, 'rb') as f:
+        for chunk in iter(lambda: f.read(chunk_size), b""):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+# Library operations
+def get_version_blend_path(name, version_info):
+    """
+    Return the .blend holding one version.
+    
+    Versions saved since content-addressed storage are named after the
+    SHA-256 of the file, so identical saves share one file. Older versions
+    still use <name>_v<N>.blend until the library is deduplicated.
+    """
+    sha = version_info.get("sha256")
+    if sha:
+        return get_blends_path() / f"{sha}.blend"
+    return get_blends_path() / f"{name}_v{version_info['version']}.blend"
+
+def get_version_preview_path(name, version_info):
+    """Return the preview image of one version, stored beside its .blend"""
+    return get_version_blend_path(name, version_info).with_suffix(".png")
+
+def delete_version_files(library, name, removed_versions):
+    """
+    Delete the blends and previews of removed versions once the library is saved.
+    
+    Files are only unlinked after the catalog commits, and only if no other
+    version uses them by then, so a failed save never leaves versions
+    pointing at missing files.
+    """
+    for version_info in removed_versions:
+        library.unused_files.append((version_info.get("sha256"),
+                                     get_version_blend_path(name, version_info)))
+
+def _delete_unused_files(library):
+    """Unlink the files delete_version_files() set aside; call after committing"""
+    for sha, blend_path in library.unused_files:
+        if sha and library.blob_ref_count(sha):
+            continue
+        for path in (blend_path, blend_path.with_suffix(".png")):
+            try:
+                path.unlink()
+            except FileNotFoundError:
+                pass
+    library.unused_files.clear()
+
+def _publish_file(tmp_path, final_path):
+    """
+    Move a finished temp file into place without ever replacing an existing one.
+    
+    Returns False (and removes the temp file) if final_path already exists,
+    which for content-addressed files means the same content is already stored.
+    """
+    try:
+        os.link(tmp_path, final_path)
+    except FileExistsError:
+        os.unlink(tmp_path)
+        return False
+    except OSError:
+        # No hard links on this filesystem: reserve the name, then rename over it
+        try:
+            os.close(os.open(final_path, os.O_CREAT | os.O_EXCL | os.O_WRONLY))
+        except FileExistsError:
+            os.unlink(tmp_path)
+            return False
+        os.replace(tmp_path, final_path)
+    else:
+        os.unlink(tmp_path)
+    return True
+
+def find_stored_version(library, name, storage_hash, blends_path):
+    """
+    Return the newest version of a group with this storage hash whose blend still exists.
+    
+    Versions saved before storage hashes were recorded never match, since
+    their tree hash alone doesn't cover layout.
+    """
+    entry = library.get(name)
+    if not entry:
+        return None
+    for version_info in reversed(library.versions(name)):
+        sha = version_info.get("sha256")
+        if version_info.get("storage_hash") == storage_hash and sha:
+            if (blends_path / f"{sha}.blend").exists():
+                return version_info
+    return None
+
+def _publish_job_blend(job):
+    """Copy a job's captured blend into content-addressed storage and return its SHA-256"""
+    if job.blend_path is None:
+        return None
+    with profiler.timed("blend.store"):
+        sha = hash_file(job.blend_path)
+        final_path = job.blends_path / f"{sha}.blend"
+        if not final_path.exists():
+            tmp_path = job.blends_path / f".{sha}.{os.getpid()}.{threading.get_ident()}.tmp"
+            try:
+                shutil.copyfile(job.blend_path, tmp_path)
+                _publish_file(tmp_path, final_path)
+            finally:
+                if tmp_path.exists():
+                    tmp_path.unlink()
+    return sha
+
+def _record_job(library, job, sha):
+    """Add a job's version to a locked library; returns (version number, SHA-256)"""
+    stored = find_stored_version(library, job.name, job.storage_hash, job.blends_path)
+    if stored is not None:
+        if sha is not None and sha != stored["sha256"]:
+            # Another session stored the same version meanwhile; drop our copy
+            # unless something else uses it
+            library.unused_files.append((sha, job.blends_path / f"{sha}.blend"))
+        sha = stored["sha256"]
+        node_group = stored.get("node_group", job.name)
+    elif sha is None:
+        raise RuntimeError(f"{job.name} was changed by another session while saving, "
+                           "save it again")
+    else:
+        node_group = job.node_group
+    
+    existing = library.get(job.name)
+    version_num = existing["latest_version"] + 1 if existing else 1
+    version_info = {
+        "version": version_num,
+        "timestamp": datetime.now().isoformat(),
+        "notes": job.notes,
+        "sha256": sha,
+        "tree_hash": job.tree_hash,
+        "storage_hash": job.storage_hash,
+        "fingerprint": job.fingerprint
+    }
+    if node_group != job.name:
+        # Saved from an appended copy such as "Wood v2"
+        version_info["node_group"] = node_group
+    if existing:
+        if job.tags is not None:
+            library.set_tags(job.name, job.tags)
+        library.add_version(job.name, version_info)
+    else:
+        library.add_entry({
+            "name": job.name,
+            "type": job.tree_type,
+            "latest_version": version_num,
+            "tags": job.tags or [],
+            "versions": [version_info]
+        })
+    return version_num, sha
+
+def store_save_jobs(jobs):
+    """
+    Copy captured node groups into the library and record their new versions.
+    
+    Does not use bpy, so it can run on a worker thread. Blends are copied to
+    the library under their content hash before locking; version numbers are
+    then allocated from the freshest catalog under the lock, so concurrent
+    sessions each get their own versions. All jobs are recorded in a single
+    catalog write, and must share a catalog. Returns the version numbers.
+    """
+    if not jobs:
+        return []
+    shas = [_publish_job_blend(job) for job in jobs]
+    
+    with catalog_transaction(jobs[0].catalog, jobs[0].lock_timeout) as library:
+        recorded = [_record_job(library, job, sha) for job, sha in zip(jobs, shas)]
+    
+    for job, (version_num, sha) in zip(jobs, recorded):
+        job.discard()
+        job.preview_path = job.blends_path / f"{sha}.png"
+        try:
+            write_preview(job.preview_path, job.layout)
+        except OSError as e:
+            # The version is saved; a missing preview only affects the panel
+            print(f"Node Library: could not write preview for {job.name}: {e}")
+        job.version = version_num
+        job.library = library
+        job.status = 'DONE'
+    return [version_num for version_num, _ in recorded]
+
+def store_save_job(job):
+    """Store one captured node group (see store_save_jobs) and return its version number"""
+    return store_save_jobs([job])[0]
+
+def remove_node_group(library, name):
+    """Remove a node group and the files no other version uses; returns its entry or None"""
+    removed = library.remove_entry(name)
+    if removed is not None:
+        delete_version_files(library, name, removed["versions"])
+    return removed
+
+def remove_node_group_version(library, name, version):
+    """Remove one version and its file if nothing else uses it; returns the record or None"""
+    if library.get_version(name, version) is None:
+        return None
+    version_info = library.remove_version(name, version)
+    delete_version_files(library, name, [version_info])
+    return version_info
+
+def find_entries(library, names=(), pattern=None, tree_type=None, tag=None):
+    """
+    Select library entries for bulk operations.
+    
+    names picks entries by exact name; pattern is a shell-style wildcard
+    matched against names (case-insensitive). tree_type and tag narrow the
+    selection further. With no names or pattern, every entry is a candidate.
+    """
+    if names:
+        entries = [library.get(name) for name in names if library.get(name)]
+    elif tag:
+        entries = list(library.with_tag(tag))
+    elif tree_type:
+        entries = list(library.of_type(tree_type))
+    else:
+        entries = list(library)
+    
+    if pattern:
+        pattern = pattern.lower()
+        entries = [e for e in entries if fnmatch.fnmatchcase(e["name"].lower(), pattern)]
+    if tree_type:
+        entries = [e for e in entries if e["type"] == tree_type]
+    if tag:
+        entries = [e for e in entries if tag.lower() in (t.lower() for t in e.get("tags", []))]
+    return entries
+
+def deduplicate_library():
+    """
+    Move <name>_v<N>.blend files into content-addressed storage.
+    
+    Byte-identical files collapse into one. Returns (files converted, bytes freed).
+    """
+    converted = freed = 0
+    blends_path = get_blends_path()
+    with library_transaction() as library:
+        library.load_histories()
+        for entry in list(library):
+            for version_info in list(library.versions(entry["name"])):
+                if version_info.get("sha256"):
+                    continue
+                legacy_path = get_version_blend_path(entry["name"], version_info)
+                if not legacy_path.exists():
+                    continue
+                
+                sha = hash_file(legacy_path)
+                size = legacy_path.stat().st_size
+                if not _publish_file(legacy_path, blends_path / f"{sha}.blend"):
+                    freed += size
+                library.update_version(entry["name"], version_info["version"], sha256=sha)
+                converted += 1
+    return converted, freed
+
+# Integrity
+class IntegrityReport:
+    """Result of comparing node_groups/ with the catalog"""
+    
+    def __init__(self):
+        # Directory listing: file name -> (size, mtime_ns)
+        self.files = {}
+        # File name -> [(group name, version)] for every referenced blend
+        self.referenced = {}
+        self.orphans = []
+        self.missing = []
+        self.damaged = []
+        self.verified = 0
+        self.unverified = 0
+        self.removed_files = 0
+        self.removed_versions = 0
+    
+    def summary(self):
+        parts = [f"{len(self.referenced)} files"]
+        if self.removed_files:
+            parts.append(f"{self.removed_files} orphans removed")
+        elif self.orphans:
+            parts.append(f"{len(self.orphans)} orphans")
+        if self.missing:
+            parts.append(f"{len(self.missing)} missing")
+        if self.removed_versions:
+            parts.append(f"{self.removed_versions} missing versions removed")
+        if self.verified or self.damaged:
+            parts.append(f"{self.verified} checksums verified")
+        if self.damaged:
+            parts.append(f"{len(self.damaged)} damaged")
+        if self.unverified:
+            parts.append(f"{self.unverified} left to verify")
+        return ", ".join(parts)
+
+def scan_library(library, now=None):
+    """
+    Compare node_groups/ with the catalog using a single directory listing.
+    
+    Finds versions whose blend is missing, and orphans: blends, previews and
+    leftover temp files nothing refers to that are older than ORPHAN_MIN_AGE.
+    """
+    report = IntegrityReport()
+    with os.scandir(get_blends_path()) as listing:
+        for item in listing:
+            if item.is_file():
+                st = item.stat()
+                report.files[item.name] = (st.st_size, st.st_mtime_ns)
+    
+    library.load_histories()
+    for entry in library:
+        for version_info in library.versions(entry["name"]):
+            filename = get_version_blend_path(entry["name"], version_info).name
+            report.referenced.setdefault(filename, []).append((entry["name"], version_info["version"]))
+            if filename not in report.files:
+                report.missing.append((entry["name"], version_info["version"]))
+    
+    cutoff = ((now or time.time()) - ORPHAN_MIN_AGE) * 1e9
+    for filename, (size, mtime_ns) in report.files.items():
+        stem, ext = os.path.splitext(filename)
+        if ext not in (".blend", ".png", ".tmp") or mtime_ns > cutoff:
+            continue
+        if ext == ".png" and stem + ".blend" in report.referenced:
+            continue
+        if filename not in report.referenced:
+            report.orphans.append(filename)
+    return report
+
+def verify_checksums(report, byte_budget=None):
+    """
+    Hash content-addressed blends and add mismatches to report.damaged.
+    
+    Files whose size and mtime match the last successful check are skipped,
+    and hashing stops once byte_budget bytes were read, so large libraries
+    can be verified a part at a time.
+    """
+    state_path = get_library_path() / INTEGRITY_STATE
+    try:
+        state = decode_library(state_path.read_bytes())
+    except (OSError, ValueError):
+        state = {}
+    verified = {name: stat for name, stat in state.get("verified", {}).items()
+                if name in report.files}
+    
+    blends_path = get_blends_path()
+    spent = 0
+    for filename in sorted(report.referenced):
+        sha, ext = os.path.splitext(filename)
+        if not _is_sha256(sha) or filename not in report.files:
+            continue
+        stat = list(report.files[filename])
+        if verified.get(filename) == stat:
+            continue
+        if byte_budget is not None and spent >= byte_budget:
+            report.unverified += 1
+            continue
+        spent += stat[0]
+        if hash_file(blends_path / filename) == sha:
+            verified[filename] = stat
+            report.verified += 1
+        else:
+            verified.pop(filename, None)
+            report.damaged.append(filename)
+    
+    write_library_file(state_path, {"verified": verified}, backups=0)
+    return report
+
+def check_library(remove_orphans=False, remove_missing=False, verify=False, byte_budget=None):
+    """
+    Scan the library and optionally repair it; returns an IntegrityReport.
+    
+    Orphans are removed and versions without a file dropped under the
+    library lock. Checksums are verified afterwards, without the lock, so a
+    long verification doesn't block saves from other sessions.
+    """
+    with library_transaction() as library:
+        report = scan_library(library)
+        blends_path = get_blends_path()
+        if remove_orphans:
+            for filename in report.orphans:
+                try:
+                    (blends_path / filename).unlink()
+                    report.removed_files += 1
+                except FileNotFoundError:
+                    pass
+        if remove_missing:
+            for name, version in report.missing:
+                library.remove_version(name, version)
+                report.removed_versions += 1
+    
+    if verify:
+        verify_checksums(report, byte_budget)
+    for filename in report.orphans:
+        print(f"Node Library: orphan {filename}")
+    for name, version in report.missing:
+        print(f"Node Library: {name} v{version} has no file")
+    for filename in report.damaged:
+        users = ", ".join(f"{name} v{version}" for name, version in report.referenced[filename])
+        print(f"Node Library: {filename} is damaged (used by {users})")
+    return report
+
+# Retention
+def _version_time(version_info):
+    try:
+        return datetime.fromisoformat(version_info["timestamp"])
+    except (KeyError, TypeError, ValueError):
+        return None
+
+class RetentionPolicy:
+    """
+    Rules for which versions prune_library() keeps.
+    
+    Each rule only adds versions to keep: the newest keep_last versions,
+    every version younger than weekly_after_days and, among older ones, the
+    newest of each calendar week (weekly_after_days 0 turns this off, so only
+    the newest keep_last are kept). Pinned versions, the latest version and
+    versions with unreadable timestamps are always kept, and versions with
+    notes too when keep_noted is set.
+    """
+    
+    def __init__(self, keep_last=DEFAULT_KEEP_VERSIONS, weekly_after_days=DEFAULT_WEEKLY_AFTER_DAYS,
+                 keep_noted=False):
+        self.keep_last = max(1, keep_last)
+        self.weekly_after_days = weekly_after_days
+        self.keep_noted = keep_noted
+    
+    def kept(self, history, now=None):
+        """Return the version numbers of a history (oldest first) to keep"""
+        keep = {v["version"] for v in history[-self.keep_last:]}
+        keep.add(max(v["version"] for v in history))
+        cutoff = (now or datetime.now()) - timedelta(days=self.weekly_after_days)
+        weeks = set()
+        for version_info in reversed(history):
+            if version_info.get("pinned") or (self.keep_noted and version_info.get("notes")):
+                keep.add(version_info["version"])
+                continue
+            when = _version_time(version_info)
+            if when is None:
+                keep.add(version_info["version"])
+            elif self.weekly_after_days and when >= cutoff:
+                keep.add(version_info["version"])
+            elif self.weekly_after_days and when.isocalendar()[:2] not in weeks:
+                weeks.add(when.isocalendar()[:2])
+                keep.add(version_info["version"])
+        return keep
+
+class PruneReport:
+    """Versions removed (or, for a dry run, that would be) by prune_library()"""
+    
+    def __init__(self, dry_run=False):
+        self.dry_run = dry_run
+        self.removed = []
+        self.bytes_reclaimed = 0
+    
+    def summary(self):
+        verb = "Would remove" if self.dry_run else "Removed"
+        groups = len({name for name, _ in self.removed})
+        return (f"{verb} {len(self.removed)} versions of {groups} node groups, "
+                f"{self.bytes_reclaimed / 1e6:.1f} MB")
+
+def _reclaimed_bytes(library, removed):
+    """Size of the files no version uses any more once `removed` [(name, record)] are gone"""
+    dropped = Counter(info["sha256"] for _, info in removed if info.get("sha256"))
+    paths = set()
+    for name, version_info in removed:
+        sha = version_info.get("sha256")
+        if sha and library.blob_ref_count(sha) > dropped[sha]:
+            continue
+        blend_path = get_version_blend_path(name, version_info)
+        paths.update((blend_path, blend_path.with_suffix(".png")))
+    
+    total = 0
+    for path in paths:
+        try:
+            total += path.stat().st_size
+        except FileNotFoundError:
+            pass
+    return total
+
+def prune_library(policy=None, entries=None, dry_run=False, now=None):
+    """
+    Remove the versions a RetentionPolicy doesn't keep; returns a PruneReport.
+    
+    entries limits pruning to those node group names (default: all). Every
+    removal happens in one library transaction, so the catalog is written
+    once. With dry_run nothing is changed, but the report still lists the
+    versions and the bytes that would be reclaimed.
+    """
+    policy = policy or get_retention_policy()
+    report = PruneReport(dry_run)
+    with library_transaction() as library:
+        if entries is None:
+            library.load_histories()
+        names = list(library.by_name) if entries is None else [n for n in entries if library.get(n)]
+        for name in names:
+            history = library.versions(name)
+            if len(history) <= policy.keep_last:
+                continue
+            kept = policy.kept(history, now)
+            report.removed.extend((name, v) for v in history if v["version"] not in kept)
+        
+        report.bytes_reclaimed = _reclaimed_bytes(library, report.removed)
+        if not dry_run:
+            for name, version_info in report.removed:
+                library.remove_version(name, version_info["version"])
+            for name, version_info in report.removed:
+                delete_version_files(library, name, [version_info])
+    
+    report.removed = [(name, version_info["version"]) for name, version_info in report.removed]
+    return report
+
+def set_version_pinned(library, name, version, pinned=True):
+    """Pin a version so retention never removes it; returns the record or None"""
+    version_info = library.get_version(name, version)
+    if version_info is None:
+        return None
+    if bool(version_info.get("pinned")) != pinned:
+        library.update_version(name, version, pinned=pinned)
+    return version_info
+
+# Previews
+_PREVIEW_BACKGROUND = (0.16, 0.16, 0.16)
+_PREVIEW_BODY = (0.30, 0.30, 0.30)
+_PREVIEW_LINK = (0.65, 0.65, 0.65)
+
+def encode_png(width, height, pixels):
+    """Encode 8-bit RGB rows (top to bottom) as a PNG"""
+    stride = width * 3
+    raw = b"".join(b"\x00" + bytes(pixels[y * stride:(y + 1) * stride]) for y in range(height))
+    
+    def chunk(tag, data):
+        return (struct.pack(">I", len(data)) + tag + data
+                + struct.pack(">I", zlib.crc32(tag + data) & 0xffffffff))
+    
+    return (b"\x89PNG\r\n\x1a\n"
+            + chunk(b"IHDR", struct.pack(">IIBBBBB", width, height, 8, 2, 0, 0, 0))
+            + chunk(b"IDAT", zlib.compress(raw, 9))
+            + chunk(b"IEND", b""))
+
+def render_preview_png(layout, size=PREVIEW_SIZE):
+    """
+    Draw a captured node layout as a size x size PNG snapshot of the graph.
+    
+    Pure Python and bpy-free, so it can run on the save worker thread.
+    """
+    pixels = bytearray(bytes(round(c * 255) for c in _PREVIEW_BACKGROUND) * (size * size))
+    boxes = [(x, y, w, h) for x, y, w, h, _ in layout["nodes"]] + layout["frames"]
+    if not boxes:
+        return encode_png(size, size, pixels)
+    
+    # Fit the graph into the image with a small margin, keeping its aspect
+    left = min(b[0] for b in boxes)
+    right = max(b[0] + b[2] for b in boxes)
+    top = max(b[1] for b in boxes)
+    bottom = min(b[1] - b[3] for b in boxes)
+    margin = size * 0.06
+    scale = (size - 2 * margin) / max(right - left, top - bottom, 1.0)
+    offset_x = margin + ((size - 2 * margin) - (right - left) * scale) / 2
+    offset_y = margin + ((size - 2 * margin) - (top - bottom) * scale) / 2
+    
+    def to_pixel(x, y):
+        return offset_x + (x - left) * scale, offset_y + (top - y) * scale
+    
+    def fill(x0, y0, x1, y1, color):
+        x0, x1 = max(0, int(x0)), min(size, max(int(x0) + 1, int(x1)))
+        y0, y1 = max(0, int(y0)), min(size, max(int(y0) + 1, int(y1)))
+        if x0 >= x1:
+            return
+        span = bytes(round(c * 255) for c in color[:3]) * (x1 - x0)
+        for row in range(y0, y1):
+            start = (row * size + x0) * 3
+            pixels[start:start + len(span)] = span
+    
+    def line(x0, y0, x1, y1, color):
+        steps = int(max(abs(x1 - x0), abs(y1 - y0))) + 1
+        for i in range(steps + 1):
+            t = i / steps
+            fill(x0 + (x1 - x0) * t, y0 + (y1 - y0) * t, 0, 0, color)
+    
+    for x, y, w, h in layout["frames"]:
+        x0, y0 = to_pixel(x, y)
+        x1, y1 = to_pixel(x + w, y - h)
+        for edge in ((x0, y0, x1, y0), (x0, y1, x1, y1), (x0, y0, x0, y1), (x1, y0, x1, y1)):
+            line(*edge, _PREVIEW_BODY)
+    
+    for x0, y0, x1, y1 in layout["links"]:
+        line(*to_pixel(x0, y0), *to_pixel(x1, y1), _PREVIEW_LINK)
+    
+    for x, y, w, h, color in layout["nodes"]:
+        x0, y0 = to_pixel(x, y)
+        x1, y1 = to_pixel(x + w, y - h)
+        fill(x0, y0, x1, y1, _PREVIEW_BODY)
+        fill(x0, y0, x1, y0 + max(1.0, (y1 - y0) * 0.2), color)
+    
+    return encode_png(size, size, pixels)
+
+def write_preview(path, layout):
+    """Render a preview to path unless one is already stored there"""
+    if path.exists():
+        return
+    tmp_path = path.with_name(f".{path.stem}.{os.getpid()}.{threading.get_ident()}.tmp")
+    try:
+        tmp_path.write_bytes(render_preview_png(layout))
+        _publish_file(tmp_path, path)
+    finally:
+        if tmp_path.exists():
+            tmp_path.unlink()
+
+# Export
+def export_members(library):
+    """
+    List the files an export needs as (archive name, path, content key, size).
+    
+    The content key is the SHA-256 for content-addressed blends and
+    size:mtime for previews and older <name>_v<N>.blend files. Missing files
+    are skipped.
+    """
+    members = {}
+    blends_path = get_blends_path()
+    library.load_histories()
+    for entry in library:
+        for version_info in library.versions(entry["name"]):
+            path = get_version_blend_path(entry["name"], version_info)
+            arcname = f"{blends_path.name}/{path.name}"
+            if arcname in members:
+                continue
+            try:
+                st = path.stat()
+            except FileNotFoundError:
+                continue
+            key = version_info.get("sha256") or f"{st.st_size}:{st.st_mtime_ns}"
+            members[arcname] = (arcname, path, key, st.st_size)
+            
+            preview = path.with_suffix(".png")
+            try:
+                st = preview.stat()
+            except FileNotFoundError:
+                continue
+            arcname = f"{blends_path.name}/{preview.name}"
+            members[arcname] = (arcname, preview, f"{st.st_size}:{st.st_mtime_ns}", st.st_size)
+    return list(members.values())
+
+def read_export_manifest(path):
+    """Read the manifest of a previous export, given the .zip or a manifest .json"""
+    path = Path(path)
+    if zipfile.is_zipfile(path):
+        with zipfile.ZipFile(path) as zipf:
+            return json.loads(zipf.read(EXPORT_MANIFEST))
+    return json.loads(path.read_bytes())
+
+def _read_ahead(pool, members, window):
+    """Yield (member, bytes) in order while later files are read on the pool"""
+    def read(member):
+        if member[3] > EXPORT_PREFETCH_LIMIT:
+            return None
+        try:
+            return member[1].read_bytes()
+        except FileNotFoundError:
+            return False
+    
+    members = iter(members)
+    pending = deque((m, pool.submit(read, m)) for m in itertools.islice(members, window))
+    while pending:
+        member, future = pending.popleft()
+        next_member = next(members, None)
+        if next_member is not None:
+            pending.append((next_member, pool.submit(read, next_member)))
+        yield member, future.result()
+
+def export_library(zip_path, library, compress_blends=False, base_manifest=None,
+                   progress=None, workers=None):
+    """
+    Write the catalog and its .blend files to a zip archive.
+    
+    Blend files are already compressed by Blender, so by default they are
+    stored rather than deflated. Files are read ahead on a thread pool to
+    hide network-share latency. With a base_manifest from an earlier export
+    only files that are new or changed since then are written; the manifest
+    of every export lists the full library, so incremental exports can be
+    chained. progress(done, total) is called with byte counts.
+    Returns (files written, files in library).
+    """
+    zip_path = Path(zip_path)
+    members = export_members(library)
+    previous = base_manifest.get("files", {}) if base_manifest else {}
+    to_write = [m for m in members if previous.get(m[0]) != m[2]]
+    total = sum(m[3] for m in to_write)
+    blend_compression = zipfile.ZIP_DEFLATED if compress_blends else zipfile.ZIP_STORED
+    workers = workers or min(8, (os.cpu_count() or 2))
+    
+    manifest = {
+        "created": datetime.now().isoformat(),
+        "incremental": bool(base_manifest),
+        "base": base_manifest.get("created") if base_manifest else None,
+        "files": {m[0]: m[2] for m in members},
+    }
+    
+    tmp_path = zip_path.with_name(f".{zip_path.name}.{os.getpid()}.tmp")
+    done = written = 0
+    try:
+        with zipfile.ZipFile(tmp_path, 'w', allowZip64=True, strict_timestamps=False) as zipf:
+            zipf.writestr("library.json", encode_library(library.to_dict()),
+                          compress_type=zipfile.ZIP_DEFLATED)
+            
+            with ThreadPoolExecutor(max_workers=workers) as pool:
+                for member, data in _read_ahead(pool, to_write, workers * 2):
+                    arcname, path, key, size = member
+                    if data is False:
+                        # Deleted by another session since the listing
+                        del manifest["files"][arcname]
+                        continue
+                    if data is None:
+                        zipf.write(path, arcname, compress_type=blend_compression)
+                    else:
+                        zinfo = zipfile.ZipInfo.from_file(path, arcname, strict_timestamps=False)
+                        zipf.writestr(zinfo, data, compress_type=blend_compression)
+                    written += 1
+                    done += size
+                    if progress:
+                        progress(done, total)
+            
+            zipf.writestr(EXPORT_MANIFEST, json.dumps(manifest, indent=2),
+                          compress_type=zipfile.ZIP_DEFLATED)
+        os.replace(tmp_path, zip_path)
+    finally:
+        if tmp_path.exists():
+            tmp_path.unlink()
+    
+    return written, len(members)
+
+# Import
+_SHA256_CHARS = set("0123456789abcdef")
+
+def is_safe_member_name(name):
+    """Reject zip member names that are absolute or climb out of the library"""
+    if not name or name.startswith(("/", "\\")) or ":" in name:
+        return False
+    return ".." not in name.replace("\\", "/").split("/")
+
+def _is_sha256(value):
+    return isinstance(value, str) and len(value) == 64 and set(value) <= _SHA256_CHARS
+
+def _extract_blob(zipf, member, blends_path, expected_sha=None):
+    """
+    Stream one zip member into content-addressed storage and return its SHA-256.
+    
+    Raises ValueError if the content doesn't match expected_sha.
+    """
+    digest = hashlib.sha256()
+    tmp_path = blends_path / f".import.{os.getpid()}.{threading.get_ident()}.tmp"
+    try:
+        with zipf.open(member) as src, open(tmp_path, 'wb') as dst:
+            for chunk in iter(lambda: src.read(1 << 20), b""):
+                digest.update(chunk)
+                dst.write(chunk)
+        sha = digest.hexdigest()
+        if expected_sha and sha != expected_sha:
+            raise ValueError(f"{member.filename} is damaged (checksum mismatch)")
+        _publish_file(tmp_path, blends_path / f"{sha}.blend")
+    finally:
+        if tmp_path.exists():
+            tmp_path.unlink()
+    return sha
+
+def _extract_preview(zipf, member, path):
+    """Copy a preview image out of an export unless one is already stored"""
+    if path.exists():
+        return
+    tmp_path = path.with_name(f".import.{os.getpid()}.{threading.get_ident()}.tmp")
+    try:
+        with zipf.open(member) as src, open(tmp_path, 'wb') as dst:
+            shutil.copyfileobj(src, dst)
+        _publish_file(tmp_path, path)
+    finally:
+        if tmp_path.exists():
+            tmp_path.unlink()
+
+def import_library(zip_path, progress=None):
+    """
+    Merge an exported library zip into the current library.
+    
+    Blends are streamed member by member into content-addressed storage,
+    skipping any whose content is already stored. Catalog entries are then
+    merged under the library lock: new groups are added, and versions of
+    existing groups are appended unless the same file or storage hash is
+    already in their history, taking the next free number when theirs is taken.
+    Only the known catalog and blend members are read; unsafe names are
+    rejected. Returns a dict of counts.
+    """
+    stats = Counter()
+    blends_path = get_blends_path()
+    folder = blends_path.name
+    
+    with zipfile.ZipFile(zip_path) as zipf:
+        members = {}
+        for info in zipf.infolist():
+            if is_safe_member_name(info.filename):
+                members[info.filename.replace("\\", "/")] = info
+            else:
+                stats["unsafe"] += 1
+        if "library.json" not in members:
+            raise ValueError("Not a node library export (library.json is missing)")
+        incoming = decode_library(zipf.read(members["library.json"]))
+        
+        # Phase 1: store payloads, without holding the lock
+        payloads = {}
+        versions = [(entry, v) for entry in incoming.get("node_groups", []) for v in entry["versions"]]
+        for i, (entry, version_info) in enumerate(versions):
+            sha = version_info.get("sha256")
+            if _is_sha256(sha):
+                member = members.get(f"{folder}/{sha}.blend")
+            else:
+                sha = None
+                member = members.get(f"{folder}/{entry['name']}_v{version_info['version']}.blend")
+            
+            if sha and (blends_path / f"{sha}.blend").exists():
+                stats["files_skipped"] += 1
+            elif member is None:
+                # Incremental exports only carry blends that were new at the time
+                stats["missing"] += 1
+                continue
+            elif sha is None and member.filename in payloads:
+                sha = payloads[member.filename]
+            else:
+                sha = _extract_blob(zipf, member, blends_path, expected_sha=sha)
+                payloads[member.filename] = sha
+                stats["files_written"] += 1
+                stats["bytes_written"] += member.file_size
+            
+            version_info["sha256"] = sha
+            blend_name = member.filename if member is not None else f"{folder}/{sha}.blend"
+            preview = members.get(blend_name[:-len(".blend")] + ".png")
+            if preview is not None:
+                _extract_preview(zipf, preview, blends_path / f"{sha}.png")
+            if progress:
+                progress(i + 1, len(versions))
+    
+    # Phase 2: merge the catalog
+    with library_transaction() as library:
+        for entry in incoming.get("node_groups", []):
+            versions = [v for v in entry["versions"] if v.get("sha256")]
+            if not versions:
+                continue
+            
+            local = library.get(entry["name"])
+            if local is None:
+                entry = dict(entry, versions=versions,
+                             latest_version=max(v["version"] for v in versions))
+                library.add_entry(entry)
+                stats["groups_added"] += 1
+                stats["versions_added"] += len(versions)
+                continue
+            
+            local_versions = library.versions(entry["name"])
+            known = {v.get("sha256") for v in local_versions}
+            known.update(v["storage_hash"] for v in local_versions if v.get("storage_hash"))
+            known.discard(None)
+            for version_info in versions:
+                if version_info["sha256"] in known or version_info.get("storage_hash") in known:
+                    stats["versions_skipped"] += 1
+                    continue
+                version_info = dict(version_info)
+                if version_info["version"] <= local["latest_version"]:
+                    version_info["version"] = local["latest_version"] + 1
+                    stats["versions_renumbered"] += 1
+                library.add_version(entry["name"], version_info)
+                known.add(version_info["sha256"])
+                stats["versions_added"] += 1
+            
+            merged_tags = local.get("tags", []) + [
+                t for t in entry.get("tags", []) if t not in local.get("tags", [])]
+            if merged_tags != local.get("tags", []):
+                library.set_tags(entry["name"], merged_tags)
+    
+    return stats
+
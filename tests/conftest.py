@@ -0,0 +1,54 @@
+"""
+Shared fixtures. The add-on is imported against the bpy stand-in from
+benchmarks/fake_bpy.py, so the tests run in plain Python:
+
+    python -m pytest -q
+"""
+
+import sys
+import types
+from pathlib import Path
+
+import pytest
+
+ROOT = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(ROOT))
+sys.path.insert(0, str(ROOT / "benchmarks"))
+
+import fake_bpy
+
+PREFERENCES = types.SimpleNamespace()
+fake_bpy.install(PREFERENCES)
+
+import node_library_manager as nlm
+from node_library_manager import core
+
+def use_library(root, backend='JSON'):
+    """Point the add-on at a library folder, as its preferences would"""
+    PREFERENCES.__dict__.update(
+        library_path=str(root),
+        storage_backend=backend,
+        compact_library=True,
+        lock_timeout=2.0,
+        page_size=nlm.DEFAULT_PAGE_SIZE,
+        show_previews=False,
+        link_node_groups=False,
+        background_saves=False,
+        keep_versions=core.DEFAULT_KEEP_VERSIONS,
+        weekly_after_days=core.DEFAULT_WEEKLY_AFTER_DAYS,
+        keep_noted_versions=False,
+        profiling=False,
+    )
+    core.configure(nlm.get_preferences)
+
+@pytest.fixture(params=['JSON', 'SQLITE'])
+def backend(request):
+    return request.param
+
+@pytest.fixture
+def library_root(tmp_path, backend):
+    """An empty library folder the add-on is configured to use"""
+    root = tmp_path / "library"
+    use_library(root, backend)
+    yield root
+    core.reset_catalogs()
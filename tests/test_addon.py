@@ -0,0 +1,19 @@
+import pytest
+import node_library_manager as nlm
+
+def test_register_and_unregister(library_root):
+    nlm.register()
+    nlm.unregister()
+
+def test_register_rejects_wrong_callback_signatures():
+    class Broken(nlm.bpy.types.Operator):
+        bl_idname = "nodelib.broken"
+        
+        @nlm.profiled("broken")
+        def execute(self, context):
+            return {'FINISHED'}
+    
+    nlm.bpy.utils.register_class(Broken)
+    Broken.draw = lambda *args: None
+    with pytest.raises(ValueError):
+        nlm.bpy.utils.register_class(Broken)
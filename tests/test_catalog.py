@@ -0,0 +1,96 @@
+import copy
+
+import pytest
+import synthetic
+from conftest import use_library
+from node_library_manager import core
+
+def loaded(catalog):
+    return core.Library(catalog.load(), catalog.load_history, catalog.count_blob_refs,
+                        catalog.load_all_history)
+
+def test_sqlite_round_trip(tmp_path):
+    data = synthetic.make_library(core, 40, blob_size=64)
+    expected = copy.deepcopy(data)
+    catalog = core.SqliteCatalog(tmp_path)
+    catalog.replace(data)
+    
+    assert loaded(catalog).to_dict() == expected
+    # A new instance reads the same file from scratch
+    assert loaded(core.SqliteCatalog(tmp_path)).to_dict() == expected
+
+def test_commit_round_trip(library_root):
+    synthetic.write_library(core, synthetic.make_library(core, 20, blob_size=64), blob_size=64)
+    
+    with core.library_transaction() as library:
+        library.set_tags("Group_000001", ["metal", "worn"])
+        library.remove_entry("Group_000002")
+        first = library.versions("Group_000003")[0]["version"]
+        library.remove_version("Group_000003", first)
+        library.update_version("Group_000004", library.get("Group_000004")["latest_version"],
+                               notes="Reviewed")
+        expected = copy.deepcopy(library.to_dict())
+    
+    core.reset_catalogs()
+    reloaded = loaded(core.get_catalog()).to_dict()
+    assert reloaded["node_groups"] == expected["node_groups"]
+    assert reloaded["tags"] == expected["tags"]
+
+def test_bulk_history_load_matches_lazy_load(library_root):
+    synthetic.write_library(core, synthetic.make_library(core, 30, blob_size=64), blob_size=64)
+    catalog = core.get_catalog()
+    lazy = core.Library(catalog.load(), catalog.load_history, catalog.count_blob_refs)
+    bulk = loaded(catalog)
+    for library in (lazy, bulk):
+        # Loaded and changed before the bulk read, which must not overwrite it
+        first = library.versions("Group_000003")[0]["version"]
+        library.remove_version("Group_000003", first)
+    with core.library_transaction() as library:
+        library.remove_entry("Group_000005")
+    
+    assert bulk.to_dict() == lazy.to_dict()
+    assert bulk.stale and lazy.stale
+    assert bulk.versions("Group_000005") == []
+
+def test_blob_ref_counts_follow_changes(library_root):
+    synthetic.write_library(core, synthetic.make_library(core, 5, blob_size=64), blob_size=64)
+    library = core.load_library(validate=True)
+    sha = library.versions("Group_000000")[-1]["sha256"]
+    assert library.blob_ref_count(sha) == 1
+    
+    with core.library_transaction() as library:
+        version = dict(library.versions("Group_000000")[-1],
+                       version=library.get("Group_000001")["latest_version"] + 1)
+        library.add_version("Group_000001", version)
+    assert core.load_library(validate=True).blob_ref_count(sha) == 2
+    
+    with core.library_transaction() as library:
+        library.remove_entry("Group_000000")
+    core.reset_catalogs()
+    assert core.load_library(validate=True).blob_ref_count(sha) == 1
+
+def test_backend_follows_the_folder(library_root, backend):
+    other = 'SQLITE' if backend == 'JSON' else 'JSON'
+    synthetic.write_library(core, synthetic.make_library(core, 10))
+    in_use = core.get_catalog()
+    
+    # A session preferring the other backend keeps using the existing catalog
+    use_library(library_root, other)
+    assert core.get_catalog().path == in_use.path
+    with core.library_transaction() as library:
+        library.set_tags("Group_000001", ["shared"])
+    other_file = core.SqliteCatalog.filename if backend == 'JSON' else core.JsonCatalog.filename
+    assert not (library_root / other_file).exists()
+    
+    migrated = core.migrate_library()
+    assert migrated.path != in_use.path
+    assert not in_use.exists()
+    assert in_use.path.with_name(in_use.path.name + core.MIGRATED_SUFFIX).exists()
+    assert core.load_library(validate=True).get("Group_000001")["tags"] == ["shared"]
+    
+    # Sessions still preferring the old backend follow the migration and
+    # never start a second catalog
+    use_library(library_root, backend)
+    assert core.get_catalog().path == migrated.path
+    with pytest.raises(core.CatalogConflict):
+        in_use.commit(core.load_library(validate=True))
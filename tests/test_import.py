@@ -0,0 +1,73 @@
+import copy
+import hashlib
+
+import synthetic
+from conftest import use_library
+from node_library_manager import core
+
+BLOB_SIZE = 64
+
+def export_groups(root, backend, tmp_path, group_count):
+    use_library(root, backend)
+    synthetic.write_library(core, synthetic.make_library(core, group_count, blob_size=BLOB_SIZE),
+                            blob_size=BLOB_SIZE)
+    zip_path = tmp_path / f"{root.name}.zip"
+    core.export_library(zip_path, core.load_library(validate=True))
+    return zip_path
+
+def test_import_into_empty_library(tmp_path, backend):
+    zip_path = export_groups(tmp_path / "source", backend, tmp_path, 10)
+    source = core.load_library(validate=True).to_dict()
+    
+    use_library(tmp_path / "target", backend)
+    stats = core.import_library(zip_path)
+    
+    library = core.load_library(validate=True)
+    assert stats["groups_added"] == 10
+    assert stats["versions_renumbered"] == 0
+    assert {e["name"]: e["versions"] for e in library.to_dict()["node_groups"]} == \
+        {e["name"]: e["versions"] for e in source["node_groups"]}
+    for entry in library:
+        for version_info in library.versions(entry["name"]):
+            assert core.get_version_blend_path(entry["name"], version_info).exists()
+
+def test_import_merges_and_renumbers(tmp_path, backend):
+    zip_path = export_groups(tmp_path / "source", backend, tmp_path, 4)
+    incoming = {e["name"]: e for e in core.load_library(validate=True).to_dict()["node_groups"]}
+    
+    # The target already has Group_000000's history, and its own version 1
+    # of Group_000001 with different content
+    use_library(tmp_path / "target", backend)
+    blob = b"a local blend"
+    sha = hashlib.sha256(blob).hexdigest()
+    (core.get_blends_path() / f"{sha}.blend").write_bytes(blob)
+    local_version = {"version": 1, "timestamp": "2023-06-01T10:00:00", "notes": "",
+                     "tree_hash": "f" * 64, "sha256": sha}
+    with core.library_transaction() as library:
+        library.add_entry(copy.deepcopy(dict(incoming["Group_000000"], tags=["local"])))
+        library.add_entry({"name": "Group_000001", "type": incoming["Group_000001"]["type"],
+                           "latest_version": 1, "tags": [], "versions": [local_version]})
+    
+    stats = core.import_library(zip_path)
+    library = core.load_library(validate=True)
+    
+    shared = incoming["Group_000000"]["versions"]
+    assert [v["version"] for v in library.versions("Group_000000")] == \
+        [v["version"] for v in shared]
+    assert library.get("Group_000000")["tags"] == ["local", "procedural", "set0"]
+    
+    theirs = incoming["Group_000001"]["versions"]
+    merged = library.versions("Group_000001")
+    assert merged[0] == local_version
+    assert [v["version"] for v in merged] == list(range(1, len(theirs) + 2))
+    assert [v["tree_hash"] for v in merged[1:]] == [v["tree_hash"] for v in theirs]
+    assert library.get("Group_000001")["latest_version"] == len(theirs) + 1
+    
+    assert stats["groups_added"] == 2
+    assert stats["versions_skipped"] == len(shared)
+    assert stats["versions_renumbered"] == len(theirs)
+    assert len(library) == 4
+    
+    # Importing again adds nothing
+    stats = core.import_library(zip_path)
+    assert stats["versions_added"] == 0 and stats["groups_added"] == 0
@@ -0,0 +1,87 @@
+import os
+import threading
+import time
+
+import pytest
+from node_library_manager import core
+
+def test_lock_is_reentrant(tmp_path):
+    lock = core.LibraryLock(tmp_path, timeout=0.5)
+    with lock:
+        token = lock.path.read_text()
+        with core.LibraryLock(tmp_path, timeout=0.5):
+            with lock:
+                assert lock.path.read_text() == token
+        # Inner releases leave the lock file in place
+        assert lock.path.exists()
+    assert not lock.path.exists()
+
+def test_transactions_nest(library_root):
+    with core.library_transaction():
+        with core.library_transaction():
+            pass
+        assert (library_root / "library.lock").exists()
+    assert not (library_root / "library.lock").exists()
+
+def test_other_threads_wait(tmp_path):
+    lock = core.LibraryLock(tmp_path, timeout=0.2)
+    results = []
+    
+    def other():
+        try:
+            with core.LibraryLock(tmp_path, timeout=0.2):
+                results.append("acquired")
+        except core.LibraryLockTimeout:
+            results.append("timed out")
+    
+    with lock:
+        thread = threading.Thread(target=other)
+        thread.start()
+        thread.join()
+    assert results == ["timed out"]
+    
+    thread = threading.Thread(target=other)
+    thread.start()
+    thread.join()
+    assert results == ["timed out", "acquired"]
+
+def test_lock_held_by_another_session(tmp_path):
+    (tmp_path / "library.lock").write_text(f"otherhost 1 {time.time()}\n")
+    with pytest.raises(core.LibraryLockTimeout):
+        core.LibraryLock(tmp_path, timeout=0.1).acquire()
+    # The failed attempt doesn't keep other threads of this session waiting
+    (tmp_path / "library.lock").unlink()
+    acquired = []
+    
+    def other():
+        with core.LibraryLock(tmp_path, timeout=0.1):
+            acquired.append(True)
+    thread = threading.Thread(target=other)
+    thread.start()
+    thread.join()
+    assert acquired == [True]
+
+def test_stale_lock_is_broken(tmp_path):
+    lock_path = tmp_path / "library.lock"
+    lock_path.write_text("otherhost 1 2020-01-01T00:00:00\n")
+    old = time.time() - core.LOCK_STALE_AGE - 10
+    os.utime(lock_path, (old, old))
+    with core.LibraryLock(tmp_path, timeout=0.5) as lock:
+        assert lock.path.read_text().split()[1] == str(os.getpid())
+    assert not lock_path.exists()
+
+def test_old_empty_lock_is_broken(tmp_path):
+    # Left by a crash between creating the lock file and writing to it
+    lock_path = tmp_path / "library.lock"
+    lock_path.write_text("")
+    old = time.time() - core.LOCK_STALE_AGE - 10
+    os.utime(lock_path, (old, old))
+    with core.LibraryLock(tmp_path, timeout=0.5) as lock:
+        assert lock.path.read_text().split()[1] == str(os.getpid())
+    assert not lock_path.exists()
+
+def test_new_empty_lock_is_respected(tmp_path):
+    # May be a lock another session is just writing
+    (tmp_path / "library.lock").write_text("")
+    with pytest.raises(core.LibraryLockTimeout):
+        core.LibraryLock(tmp_path, timeout=0.1).acquire()
@@ -0,0 +1,44 @@
+from datetime import datetime, timedelta
+
+from node_library_manager import core
+
+NOW = datetime(2024, 6, 30, 12, 0)
+
+def history(days_ago, fields=None):
+    """Versions 1..n, oldest first, made the given number of days before NOW"""
+    fields = fields or {}
+    return [dict({"version": i, "timestamp": (NOW - timedelta(days=days)).isoformat(),
+                  "notes": ""}, **fields.get(i, {}))
+            for i, days in enumerate(days_ago, 1)]
+
+def test_keeps_newest_only_without_weekly_rule():
+    versions = history([50, 40, 30, 20, 10, 5])
+    assert core.RetentionPolicy(2, 0).kept(versions, NOW) == {5, 6}
+
+def test_keeps_latest_even_with_keep_last_zero():
+    versions = history([30, 20, 10])
+    assert core.RetentionPolicy(0, 0).kept(versions, NOW) == {3}
+
+def test_weekly_thinning_keeps_recent_and_newest_per_week():
+    # 2024-06-30 is a Sunday: days 40 and 38 fall in the same ISO week, as do 20 and 19
+    versions = history([40, 38, 20, 19, 6, 2])
+    kept = core.RetentionPolicy(1, 14).kept(versions, NOW)
+    assert kept == {2, 4, 5, 6}
+
+def test_pinned_noted_and_undated_versions():
+    versions = history([40, 39, 38, 37], {
+        1: {"pinned": True},
+        2: {"notes": "Reference look"},
+        3: {"timestamp": "not a date"},
+    })
+    assert core.RetentionPolicy(1, 0).kept(versions, NOW) == {1, 3, 4}
+    assert core.RetentionPolicy(1, 0, keep_noted=True).kept(versions, NOW) == {1, 2, 3, 4}
+
+def test_kept_is_independent_of_history_length():
+    versions = history(range(100, 0, -1))
+    kept = core.RetentionPolicy(10, 30).kept(versions, NOW)
+    assert set(range(70, 101)) <= kept
+    # Older than 30 days: one per ISO week
+    older = [v for v in versions if v["version"] in kept and v["version"] < 70]
+    weeks = [datetime.fromisoformat(v["timestamp"]).isocalendar()[:2] for v in older]
+    assert len(weeks) == len(set(weeks)) > 0
@@ -0,0 +1,128 @@
+import tempfile
+from pathlib import Path
+
+import pytest
+
+import node_library_manager as nlm
+from conftest import use_library
+from node_library_manager import core
+
+EMPTY_LAYOUT = {"frames": [], "nodes": [], "links": []}
+
+class Job:
+    """What SaveJob captures on the main thread, without Blender"""
+    
+    def __init__(self, name, tree_hash, storage_hash, blend=None):
+        self.name = name
+        self.node_group = name
+        self.tree_type = 'ShaderNodeTree'
+        self.notes = ""
+        self.tags = None
+        self.tree_hash = tree_hash
+        self.storage_hash = storage_hash
+        self.fingerprint = {"nodes": {}, "links": [], "interface": {}, "groups": {}}
+        self.layout = EMPTY_LAYOUT
+        self.preview_path = None
+        self.catalog = core.get_catalog()
+        self.blends_path = core.get_blends_path()
+        self.lock_timeout = 2.0
+        self.blend_path = None
+        # Like SaveJob, only write a file if no stored version can be reused
+        if blend is not None and core.find_stored_version(
+                core.load_library(validate=True), name, storage_hash, self.blends_path) is None:
+            fd, path = tempfile.mkstemp(suffix=".blend")
+            with open(fd, "wb") as f:
+                f.write(blend)
+            self.blend_path = Path(path)
+    
+    def discard(self):
+        if self.blend_path is not None and self.blend_path.exists():
+            self.blend_path.unlink()
+
+def test_layout_only_change_is_stored(library_root):
+    core.store_save_job(Job("Wood", "content", "layout-1", b"first save"))
+    # Same content, but a label or muted link changed: the new file is kept
+    core.store_save_job(Job("Wood", "content", "layout-2", b"relabelled"))
+    # Saved again unchanged: the stored file is reused
+    job = Job("Wood", "content", "layout-2", b"relabelled again")
+    assert job.blend_path is None
+    core.store_save_job(job)
+    
+    versions = core.load_library(validate=True).versions("Wood")
+    assert [v["tree_hash"] for v in versions] == ["content"] * 3
+    assert versions[0]["sha256"] != versions[1]["sha256"] == versions[2]["sha256"]
+    assert core.get_version_blend_path("Wood", versions[1]).read_bytes() == b"relabelled"
+
+def test_concurrent_identical_save_leaves_no_orphan(library_root):
+    # Both captured before either is stored, so both wrote a file
+    first = Job("Wood", "content", "layout-1", b"first capture")
+    second = Job("Wood", "content", "layout-1", b"second capture")
+    core.store_save_job(first)
+    core.store_save_job(second)
+    
+    versions = core.load_library(validate=True).versions("Wood")
+    assert versions[0]["sha256"] == versions[1]["sha256"]
+    blends = sorted(p.name for p in core.get_blends_path().glob("*.blend"))
+    assert blends == [f"{versions[0]['sha256']}.blend"]
+
+def test_files_survive_a_failed_delete(library_root, monkeypatch):
+    core.store_save_job(Job("Wood", "content", "layout-1", b"first save"))
+    core.store_save_job(Job("Wood", "content", "layout-2", b"second save"))
+    first = core.load_library(validate=True).versions("Wood")[0]
+    blend_path = core.get_version_blend_path("Wood", first)
+    
+    def fail(catalog, library):
+        raise OSError("disk full")
+    monkeypatch.setattr(type(core.get_catalog()), "commit", fail)
+    with pytest.raises(OSError):
+        with core.library_transaction() as library:
+            core.remove_node_group_version(library, "Wood", first["version"])
+    assert blend_path.exists()
+    
+    monkeypatch.undo()
+    with core.library_transaction() as library:
+        core.remove_node_group_version(library, "Wood", first["version"])
+    assert not blend_path.exists()
+    assert len(core.load_library(validate=True).versions("Wood")) == 1
+
+def test_appended_version_saves_back_to_its_group(library_root):
+    node_groups = nlm.bpy.data.node_groups
+    wood = node_groups.new("Wood")
+    assert nlm.save_node_group_version(wood, notes="First") == 1
+    
+    library = core.load_library(validate=True)
+    first = library.get_version("Wood", 1)
+    appended = nlm.import_node_group("Wood", first, core.get_version_blend_path("Wood", first))
+    assert appended.name == "Wood v1"
+    assert nlm.library_name(appended) == "Wood"
+    
+    # Saving the appended copy adds a version to Wood, not a "Wood v1" entry
+    assert nlm.save_node_group_version(appended, notes="Tweaked") == 2
+    library = core.load_library(validate=True)
+    assert [entry["name"] for entry in library] == ["Wood"]
+    second = library.get_version("Wood", 2)
+    assert second["tree_hash"] == first["tree_hash"]
+    
+    # The new version loads from the file it was saved in under the copy's name
+    loaded = nlm.import_node_group("Wood", second, core.get_version_blend_path("Wood", second))
+    assert loaded is not None and loaded is not appended
+    assert loaded.name == "Wood v2"
+    assert loaded[nlm.IMPORT_VERSION_KEY] == 2
+
+def test_retry_after_migration_uses_the_new_catalog(library_root, backend):
+    core.store_save_job(Job("Wood", "content", "layout-1", b"first save"))
+    failed = Job("Wood", "content", "layout-2", b"second save")
+    failed.status, failed.error = 'FAILED', "Library is locked by another session"
+    pipeline = nlm.SavePipeline()
+    pipeline.jobs.append(failed)
+    
+    use_library(library_root, 'SQLITE' if backend == 'JSON' else 'JSON')
+    old_catalog = failed.catalog
+    new_catalog = core.migrate_library()
+    pipeline.retry_failed()
+    pipeline.shutdown()
+    
+    assert failed.status == 'DONE', failed.error
+    assert not old_catalog.exists()
+    assert len(core.load_library(validate=True).versions("Wood")) == 2
+    assert core.get_catalog().path == new_catalog.path
@@ -0,0 +1,77 @@
+import copy
+
+import pytest
+import synthetic
+from node_library_manager import core
+
+SEARCHES = ("", "g", "gr", "group_00001", "GROUP_0000", "set1", "SET4", "proc", "dural",
+            "oup_000", "xyz", "set", "p_000002")
+SORT_MODES = ('NAME', 'DATE', 'VERSIONS')
+
+def naive_query(library, tree_type, search, sort_mode):
+    """What SearchIndex.query() must return, by filtering everything every time"""
+    search = search.lower()
+    matches = [entry for entry in library.of_type(tree_type)
+               if search in entry["name"].lower()
+               or any(search in tag.lower() for tag in entry.get("tags", []))]
+    sort_key, reverse = core._sort_key(sort_mode)
+    return [entry["name"] for entry in sorted(matches, key=sort_key, reverse=reverse)]
+
+def assert_matches_naive(library):
+    for tree_type in synthetic.TREE_TYPES:
+        for search in SEARCHES:
+            for sort_mode in SORT_MODES:
+                found = [entry["name"] for entry in library.search.query(tree_type, search, sort_mode)]
+                assert found == naive_query(library, tree_type, search, sort_mode), \
+                    (tree_type, search, sort_mode)
+
+@pytest.fixture
+def library():
+    data = synthetic.make_library(core, 300)
+    for entry in data["node_groups"][::7]:
+        entry["tags"].append("Worn Metal")
+    return core.Library(copy.deepcopy(data))
+
+def test_query_matches_naive_filter(library):
+    assert_matches_naive(library)
+    # Memoized results stay correct
+    assert_matches_naive(library)
+
+def test_query_after_changes(library):
+    assert_matches_naive(library)
+    library.set_tags("Group_000010", ["set4", "renamed"])
+    library.remove_entry("Group_000011")
+    entry = copy.deepcopy(library.full_entry("Group_000012"))
+    entry["name"] = "Group_set1_copy"
+    library.add_entry(entry)
+    library.add_version("Group_000013", dict(library.versions("Group_000013")[-1],
+                                             version=library.get("Group_000013")["latest_version"] + 1,
+                                             timestamp="2030-01-01T00:00:00"))
+    assert_matches_naive(library)
+
+def test_typing_refines_previous_results(library):
+    for tree_type in synthetic.TREE_TYPES:
+        for sort_mode in SORT_MODES:
+            for word in ("group_00001", "worn metal", "set4"):
+                for n in range(1, len(word) + 1):
+                    found = [entry["name"] for entry in library.search.query(tree_type, word[:n], sort_mode)]
+                    assert found == naive_query(library, tree_type, word[:n], sort_mode), \
+                        (tree_type, word[:n], sort_mode)
+
+def test_reload_carries_the_index_over(library):
+    assert_matches_naive(library)
+    data = library.summary_dict()
+    groups = {entry["name"]: entry for entry in data["node_groups"]}
+    groups["Group_000010"]["tags"] = ["set4", "renamed"]
+    groups["Group_000012"]["version_count"] += 5
+    moved = groups["Group_000014"]
+    moved["type"] = next(t for t in synthetic.TREE_TYPES if t != moved["type"])
+    del groups["Group_000011"]
+    groups["Group_set1_copy"] = dict(groups["Group_000013"], name="Group_set1_copy")
+    data["node_groups"] = list(groups.values())
+    
+    reloaded = core.Library(copy.deepcopy(data))
+    reloaded.search.carry_over(library.search)
+    assert_matches_naive(reloaded)
+    # The old copy still answers correctly, from a rebuilt index
+    assert_matches_naive(library)